@@ -1,15 +1,27 @@
 # backend/api/agent_api.py
 
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+import os
+import numpy as np
 
-from backend.core.rl.qlearning_agent import QLearningAgent
+from backend.core.rl.qlearning_agent import QLearningAgent, STATE_FIELDS
+from backend.core.rl.qtable import encode_bins_arr
 from backend.core.rl.env_definition import PricingEnv
-from backend.core.rl.xai.explain_decision import explain_action
+from backend.core.rl.model_store import SnapshotStore, SnapshotWatcher
+from backend.core.rl.agent_registry import AgentRegistry
+from backend.core.rl.discretizer import Discretizer
+from backend.core.rl.demand_simulator import DemandModel
+from backend.core.rl.xai.explain_decision import EXPLAIN_UNSEEN, explain_code
+from backend.core.metrics import StageTimer, gauge, record_guard, record_lookups
+from backend.api.cost_profile_api import resolve_profile
+from backend.api.forecast_api import demand_params
+from backend.api.competitor_api import resolve_competitor_prices, COMPETITOR_STAT
 from backend.core.rules_guard import (
-    CostParams, break_even_price, target_price_for_margin, breakdown
+    CostParams, GuardValues, guard_values, profile_key, GUARD_CACHE,
+    CostArrays, break_even_price_arr, target_price_for_margin_arr, breakdown_arr,
 )
 
 # -------------------- FastAPI App (geliştirme için CORS açık) --------------------
@@ -29,7 +41,7 @@ router = APIRouter(prefix="/agent", tags=["Pricing Agent"])
 class StateInput(BaseModel):
     stock_level: int = Field(ge=0)
     last_price: float = Field(gt=0)
-    competitor_price: float = Field(gt=0)
+    competitor_price: Optional[float] = Field(None, gt=0)   # sku_id ile depoda güncel rakip fiyatı varsa o kullanılır
     sales_last_week: int = Field(ge=0)
 
 class CostInput(BaseModel):
@@ -45,48 +57,169 @@ class CostInput(BaseModel):
 class RecommendRequest(BaseModel):
     state: StateInput
     costs: Optional[CostInput] = None
+    cost_profile_id: Optional[str] = None   # kayıtlı profil (costs yerine)
+    group_id: Optional[str] = None          # SKU grubu: grubun kendi Q tablosu (yoksa paylaşılan)
+    sku_id: Optional[str] = None            # talep modeli deposundaki SKU (esneklik + mevsimsellik)
+    week: Optional[int] = Field(None, ge=1, le=53)   # takvim haftası (yoksa nötr mevsim: 1.0)
+    elasticity: Optional[float] = None      # verilirse SKU modelinin/varsayılanın (-1.2) yerine
+    seasonality: Optional[float] = None     # verilirse bu haftanın mevsimsellik çarpanı (varsayılan 1.0)
+
+class BatchRecommendRequest(BaseModel):
+    items: List[RecommendRequest]
+    costs: Optional[CostInput] = None   # kalem bazında costs yoksa kullanılır
+    cost_profile_id: Optional[str] = None
+    group_id: Optional[str] = None
 
 class SimulateRequest(BaseModel):
     price: float = Field(gt=0)
     costs: Optional[CostInput] = None
+    cost_profile_id: Optional[str] = None
     apply_guard: bool = True
 
 # -------------------- Ortam & Ajan --------------------
 product_info = {"base_price": 100.0, "unit_cost": 60.0}
 env = PricingEnv(product_info)
-agent = QLearningAgent(action_space=env.action_space)
+
+# Sürümlü snapshot'lar: her işçi manifest'i izler ve yeni sürümü kendisi yükler
+SNAPSHOT_DIR = os.environ.get("QTABLE_SNAPSHOT_DIR", "backend/data/snapshots")
+SNAPSHOT_POLL_SECONDS = float(os.environ.get("QTABLE_SNAPSHOT_POLL_SECONDS", "2"))
+snapshots = SnapshotStore(SNAPSHOT_DIR)
+watcher = SnapshotWatcher(snapshots, poll_interval=SNAPSHOT_POLL_SECONDS)
+
+def _agent_from_snapshot(version: str) -> QLearningAgent:
+    ag = QLearningAgent(action_space=env.action_space, q_backend="array")
+    ag.q_table = snapshots.load_table(version, len(env.action_space))
+    ag.discretizer = Discretizer.from_meta(snapshots.meta(version).get("discretization"))
+    ag.version = version
+    ag.policy = snapshots.load_policy(version) or ag.compile_policy()
+    return ag
+
+agent = QLearningAgent(action_space=env.action_space, q_backend="array")
 try:
-    agent.load_q_table("backend/data/q_table.pkl")
+    if snapshots.active_version():
+        agent = _agent_from_snapshot(snapshots.active_version())
+    elif os.path.exists("backend/data/q_table.npz"):
+        agent.load_q_table("backend/data/q_table.npz")   # checkpoint
+    else:
+        agent.load_q_table("backend/data/q_table.pkl")   # eski tek dosya formatı
 except Exception:
     print("[!] Q tablosu bulunamadı: backend/data/q_table.pkl. Yeni tablo başlatılıyor.")
+if agent.policy is None:
+    agent.compile_policy()
+watcher.current = agent.version
+
+# SKU grubu başına ajanlar: ilk istekte diskten tembel yüklenir, LRU ile sınırlı tutulur
+GROUP_MODEL_DIR = os.environ.get("GROUP_MODEL_DIR", "backend/data/groups")
+groups = AgentRegistry(
+    GROUP_MODEL_DIR,
+    make_agent=lambda: QLearningAgent(action_space=env.action_space, q_backend="array"),
+    max_resident=int(os.environ.get("GROUP_MODEL_MAX_RESIDENT", "64")),
+    max_bytes=int(os.environ["GROUP_MODEL_MAX_BYTES"]) if os.environ.get("GROUP_MODEL_MAX_BYTES") else None,
+    poll_interval=SNAPSHOT_POLL_SECONDS,
+    max_tracked=int(os.environ.get("GROUP_MODEL_MAX_TRACKED", "1024")),
+)
+
+# kazıma anında okunan göstergeler (sıcak yolda maliyet yok)
+gauge("qtable_states", "Servis edilen Q tablosundaki state sayısı").set_function(lambda: len(agent.q_table))
+gauge("policy_bytes", "Derlenmiş politikanın bellek boyutu").set_function(
+    lambda: agent.policy.nbytes if agent.policy is not None else 0)
+gauge("group_models_resident", "Bellekteki SKU grubu modelleri").set_function(lambda: groups.stats()["resident"])
+gauge("group_models_resident_bytes", "Bellekteki SKU grubu modellerinin boyutu").set_function(
+    groups.resident_bytes)
+
+def current_agent() -> QLearningAgent:
+    return agent
+
+def agent_for(group_id: Optional[str]) -> QLearningAgent:
+    """Grubun ajanı; group_id yoksa veya grubun modeli henüz yoksa paylaşılan ajan."""
+    if group_id is None:
+        return agent
+    try:
+        ag = groups.get(group_id)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return ag if ag is not None else agent
+
+def swap_agent(new_agent: QLearningAgent) -> QLearningAgent:
+    """
+    Servis edilen ajanı atomik olarak değiştirir (tek referans ataması).
+    Devam eden istekler eski ajanı kullanarak tamamlanır.
+    """
+    global agent
+    if new_agent.policy is None:
+        new_agent.compile_policy()   # servis yolu yalnızca politikayı okur
+    old, agent = agent, new_agent
+    watcher.current = new_agent.version
+    return old
+
+def maybe_reload(force: bool = False) -> Optional[str]:
+    """Manifest'te yeni aktif sürüm varsa yükleyip devreye alır; yüklenen sürümü döner."""
+    version = watcher.check(force=force)
+    if version is None:
+        return None
+    try:
+        swap_agent(_agent_from_snapshot(version))
+    except Exception as e:   # bozuk/eksik snapshot: mevcut tabloyla devam
+        print(f"[!] Snapshot yüklenemedi ({version}): {e}")
+        return None
+    return version
 
 # -------------------- Fiyat Öneri Endpoint --------------------
-@router.post("/recommend-price")
-def recommend_price(req: RecommendRequest) -> Dict[str, Any]:
-    # 1) RL kararı
-    s = req.state.model_dump()
-    action = agent.choose_action(s)           # 0: düşür, 1: koru, 2: artır
-    rl_pct = [-0.05, 0.0, 0.05][action]
-    rl_price = round(req.state.last_price * (1 + rl_pct), 2)
+def _guard_for(ci: Optional[CostInput], profile_id: Optional[str] = None) -> GuardValues:
+    """
+    Guard değerleri (CostParams, başabaş, min marj fiyatı). Öncelik: satır içi
+    costs, sonra kayıtlı profil (cost_profile_id), sonra varsayılan maliyetler.
+    """
+    if ci is None and profile_id is not None:
+        return resolve_profile(profile_id)
+    return guard_values((ci or CostInput()).model_dump())
 
-    # 2) Margin Guard
-    ci = (req.costs or CostInput())
-    cp = CostParams(**ci.model_dump())
+RL_PCTS = [-0.05, 0.0, 0.05]   # 0: düşür, 1: koru, 2: artır
 
-    be_price = break_even_price(cp)
-    guard_price = target_price_for_margin(cp, cp.min_margin_pct)  # min marj hedef fiyatı
-    guard_applied = False
+def _decide(state: StateInput, ag: QLearningAgent):
+    """
+    RL kararı derlenmiş politikadan okunur (tabloya yazmaz, keşif yok):
+    (state dict, aksiyon, RL fiyatı, güven, açıklama kodu, model sürümü).
+    ag istek başında bir kez alınır; swap'a karşı istek boyunca tek ajan.
+    """
+    s = state.model_dump()
+    action, confidence, xai_code = ag.policy.lookup(ag.get_state_key(s))
+    rl_price = round(state.last_price * (1 + RL_PCTS[action]), 2)
+    return s, action, rl_price, confidence, xai_code, ag.version
 
-    final_price = rl_price
-    if final_price < guard_price:
-        final_price = round(guard_price, 2)
-        guard_applied = True
+def _decide_many(states: List[StateInput], ag: QLearningAgent):
+    """_decide'ın toplu hali: state anahtarları ve politika araması vektöreldir."""
+    dumps = [st.model_dump() for st in states]
+    cols = [np.array([d[k] for d in dumps], dtype=np.float64) for k in STATE_FIELDS]
+    codes = encode_bins_arr(ag.get_state_bins_arr(*cols)) if dumps else np.zeros(0, dtype=np.int64)
+    actions, confidence, xai_codes = ag.policy.lookup_many(codes)
+    return [
+        (d, int(a), round(st.last_price * (1 + RL_PCTS[int(a)]), 2), float(c), int(x), ag.version)
+        for d, st, a, c, x in zip(dumps, states, actions.tolist(), confidence.tolist(), xai_codes.tolist())
+    ]
 
-    # 3) Döküm & XAI
-    brk = breakdown(final_price, cp)  # brk["margin_pct"] => 0–1 arası
-    state_key = agent.get_state_key(s)
-    q_values = agent.q_table.get(state_key, [0, 0, 0])
-    explanation = explain_action(s, q_values)
+def _with_competitor_prices(items: List[RecommendRequest]):
+    """
+    Kalemlerin state'leri rakip fiyatı çözülmüş olarak (depo özeti > istek)
+    ve kalem başına rakip fiyatı bilgisi (yanıtın "competitor" bloğu).
+    """
+    prices, from_store = resolve_competitor_prices([it.sku_id for it in items],
+                                                   [it.state.competitor_price for it in items])
+    states = [it.state if it.state.competitor_price == p else it.state.model_copy(update={"competitor_price": p})
+              for it, p in zip(items, prices.tolist())]
+    info = [{"price": p, "source": "store" if f else "request", "stat": COMPETITOR_STAT if f else None}
+            for p, f in zip(prices.tolist(), from_store.tolist())]
+    return states, info
+
+def _build_response(state: StateInput, s: Dict[str, Any], action: int, rl_price: float,
+                    confidence: float, xai_code: int, model_version: Optional[str],
+                    cp: CostParams, be_price: float, guard_price: float,
+                    final_price: float, guard_applied: bool,
+                    net_profit: float, margin: float, pct_total: float, fixed_total: float,
+                    expected_sales: float, timer: Optional[StageTimer] = None) -> Dict[str, Any]:
+    explanation = explain_code(xai_code)
+    if timer is not None:
+        timer.lap("explain")
     if guard_applied:
         explanation += " | Margin Guard: En az kâr marjı sağlanmadığı için fiyat yukarı düzeltildi."
 
@@ -100,25 +233,38 @@ def recommend_price(req: RecommendRequest) -> Dict[str, Any]:
             "target_margin_price": round(guard_price, 2),
         },
         "profit": {
-            "net_profit": round(brk["net_profit"], 2),
-            "margin_pct": float(brk["margin_pct"]),  # 0–1 arası
+            "net_profit": round(net_profit, 2),
+            "margin_pct": float(margin),  # 0–1 arası
+        },
+        "demand": {   # önerilen fiyatta talep modeli (DemandModel) tahmini
+            "expected_sales": round(expected_sales, 2),
+            "expected_profit": round(expected_sales * net_profit, 2),
         },
         "xai": explanation,
+        "confidence": round(confidence, 4),   # en iyi ile ikinci en iyi Q farkı
+        "model_version": model_version,
     }
 
     # ---- Geriye dönük uyumluluk ----
     response.update({
         "recommended_action": action,
         "rl_price_estimate": rl_price,
-        "price_change_pct": (final_price / req.state.last_price) - 1.0,
+        "price_change_pct": (final_price / state.last_price) - 1.0,
         "new_price_estimate": round(final_price, 2),
         "breakdown": {
-            "net_profit": round(brk["net_profit"], 2),
-            "margin_pct": round(brk["margin_pct"] * 100, 2),
+            "net_profit": round(net_profit, 2),
+            "margin_pct": round(margin * 100, 2),
             "unit_cost": cp.unit_cost,
-            "percentage_fees_total_pct": round(brk["percentage_fees_total_pct"] * 100, 2),
-            "fixed_fees_total": brk["fixed_fees_total"],
-            "components": brk["components"],
+            "percentage_fees_total_pct": round(pct_total * 100, 2),
+            "fixed_fees_total": fixed_total,
+            "components": {
+                "commission_pct": cp.commission_pct,
+                "payment_fee_pct": cp.payment_fee_pct,
+                "tax_pct": cp.tax_pct,
+                "shipping_cost": cp.shipping_cost,
+                "packaging_cost": cp.packaging_cost,
+                "other_fixed_cost": cp.other_fixed_cost,
+            },
         },
         "guard_legacy": {
             "break_even_price": round(be_price, 2),
@@ -129,14 +275,141 @@ def recommend_price(req: RecommendRequest) -> Dict[str, Any]:
 
     return response
 
+@router.post("/recommend-price")
+def recommend_price(req: RecommendRequest) -> Dict[str, Any]:
+    tm = StageTimer("recommend_price")
+    maybe_reload()
+    (state,), (competitor,) = _with_competitor_prices([req])
+    tm.lap("inputs")
+    # 1) RL kararı
+    s, action, rl_price, confidence, xai_code, version = _decide(state, agent_for(req.group_id))
+    tm.lap("decide")
+
+    # 2) Margin Guard
+    gv = _guard_for(req.costs, req.cost_profile_id)
+    final_price = rl_price
+    guard_applied = False
+    if final_price < gv.min_margin_price:
+        final_price = round(gv.min_margin_price, 2)
+        guard_applied = True
+    brk = gv.breakdown(final_price)  # brk["margin_pct"] => 0–1 arası
+    tm.lap("guard")
+
+    # 3) Talep, XAI & yanıt
+    dp = demand_params([req.sku_id], [req.elasticity], [req.seasonality], [req.week])
+    sales = DemandModel(float(dp["elasticity"][0]), float(dp["seasonality"][0])).predict_one(
+        state.sales_last_week, final_price, state.competitor_price)
+    tm.lap("demand")
+    response = _build_response(state, s, action, rl_price, confidence, xai_code, version,
+                               gv.cp, gv.break_even, gv.min_margin_price, final_price, guard_applied,
+                               brk["net_profit"], brk["margin_pct"],
+                               brk["percentage_fees_total_pct"], brk["fixed_fees_total"], sales, timer=tm)
+    response["group_id"] = req.group_id
+    response["sku_id"] = req.sku_id
+    response["demand"]["fitted"] = bool(dp["known"][0])   # SKU modeli depodan mı geldi
+    response["demand"]["week"] = req.week
+    response["demand"]["seasonal"] = bool(dp["seasonal"][0])   # hafta yoksa False (nötr mevsim)
+    response["competitor"] = competitor
+    record_lookups(xai_code, EXPLAIN_UNSEEN)
+    record_guard(int(guard_applied))
+    tm.lap("response")
+    return response
+
+# -------------------- Toplu Fiyat Öneri Endpoint --------------------
+@router.post("/recommend-prices")
+def recommend_prices(req: BatchRecommendRequest) -> Dict[str, Any]:
+    """
+    Katalog ölçeğinde toplu öneri. Guard fiyatları ve kâr/marj dökümü tüm
+    kalemler için tek vektörel geçişte (rules_guard dizi motoru) hesaplanır;
+    her kalem tekil /recommend-price ile aynı yanıt şemasını döner.
+    """
+    tm = StageTimer("recommend_prices")
+    maybe_reload()
+    states, competitor = _with_competitor_prices(req.items)
+    # maliyet profillerini tekilleştir: profil -> indeks (guard önbelleği / profil kaydı üzerinden)
+    profiles: Dict[tuple, int] = {}
+    cps: List[CostParams] = []
+    inv = np.empty(len(req.items), dtype=np.int64)
+    for i, it in enumerate(req.items):
+        if it.costs is not None or it.cost_profile_id is not None:
+            gv = _guard_for(it.costs, it.cost_profile_id)
+        else:
+            gv = _guard_for(req.costs, req.cost_profile_id)
+        key = profile_key(gv.cp)
+        j = profiles.get(key)
+        if j is None:
+            j = profiles[key] = len(cps)
+            cps.append(gv.cp)
+        inv[i] = j
+    tm.lap("inputs")
+
+    # 1) RL kararları: kalemler gruba göre toplanır, her grup tek vektörel aramada
+    by_group: Dict[Optional[str], List[int]] = {}
+    for i, it in enumerate(req.items):
+        by_group.setdefault(it.group_id or req.group_id, []).append(i)
+    decisions: List[Any] = [None] * len(req.items)
+    for gid, idx in by_group.items():
+        for i, d in zip(idx, _decide_many([states[i] for i in idx], agent_for(gid))):
+            decisions[i] = d
+    tm.lap("decide")
+
+    # 2) Margin Guard (vektörel)
+    ca = CostArrays.from_params(cps).take(inv)
+    be = break_even_price_arr(ca)
+    guard = target_price_for_margin_arr(ca)
+    rl = np.array([d[2] for d in decisions], dtype=np.float64)
+    applied = rl < guard
+    final = rl.copy()
+    for i in np.flatnonzero(applied):
+        final[i] = round(float(guard[i]), 2)   # tekil yol ile aynı yuvarlama
+    brk = breakdown_arr(final, ca)
+    tm.lap("guard")
+
+    # 3) Talep (vektörel) & yanıt; kalem başına esneklik/mevsimsellik
+    #    (açık değer > SKU modeli deposu > varsayılan)
+    dp = demand_params([it.sku_id for it in req.items], [it.elasticity for it in req.items],
+                       [it.seasonality for it in req.items], [it.week for it in req.items])
+    demand = DemandModel(elasticity=dp["elasticity"], seasonality=dp["seasonality"].reshape(-1, 1))
+    sales = demand.predict([st.sales_last_week for st in states], final,
+                           [st.competitor_price for st in states])
+    tm.lap("demand")
+    items = []
+    for i, (it, (s, action, rl_price, confidence, xai_code, version)) in enumerate(zip(req.items, decisions)):
+        item = _build_response(
+            states[i], s, action, rl_price, confidence, xai_code, version,
+            cps[inv[i]], float(be[i]), float(guard[i]), float(final[i]), bool(applied[i]),
+            float(brk["net_profit"][i]), float(brk["margin_pct"][i]),
+            float(brk["percentage_fees_total_pct"][i]), float(brk["fixed_fees_total"][i]),
+            float(sales[i]),
+        )
+        item["group_id"] = it.group_id or req.group_id
+        item["sku_id"] = it.sku_id
+        item["demand"]["fitted"] = bool(dp["known"][i])
+        item["demand"]["week"] = it.week
+        item["demand"]["seasonal"] = bool(dp["seasonal"][i])
+        item["competitor"] = competitor[i]
+        items.append(item)
+    record_lookups([d[4] for d in decisions], EXPLAIN_UNSEEN)
+    record_guard(int(applied.sum()), len(applied))
+    tm.lap("response")
+    return {"count": len(items), "cost_profiles": len(cps), "groups": len(by_group),
+            "model_version": decisions[0][5] if decisions else agent.version, "items": items}
+
+@router.get("/groups")
+def list_groups() -> Dict[str, Any]:
+    """Modeli olan SKU grupları ve bellekteki (resident) tabloların durumu."""
+    return {"groups": groups.groups(), "registry": groups.stats()}
+
+@router.get("/guard-cache")
+def guard_cache_stats() -> Dict[str, Any]:
+    """Guard önbelleği sayaçları (isabet/ıska/tahliye)."""
+    return GUARD_CACHE.stats()
+
 # -------------------- Senaryo Simülasyonu Endpoint --------------------
 @router.post("/simulate")
 def simulate_price(req: SimulateRequest) -> Dict[str, Any]:
-    ci = (req.costs or CostInput())
-    cp = CostParams(**ci.model_dump())
-
-    be_price = break_even_price(cp)
-    guard_price = target_price_for_margin(cp, cp.min_margin_pct)
+    gv = _guard_for(req.costs, req.cost_profile_id)
+    cp, be_price, guard_price = gv.cp, gv.break_even, gv.min_margin_price
 
     final_price = req.price
     guard_applied = False
@@ -144,7 +417,7 @@ def simulate_price(req: SimulateRequest) -> Dict[str, Any]:
         final_price = round(guard_price, 2)
         guard_applied = True
 
-    brk = breakdown(final_price, cp)
+    brk = gv.breakdown(final_price)
 
     return {
         "input_price": req.price,
@@ -165,12 +438,17 @@ def root():
     return {
         "status": "ok",
         "service": "Cognitive Pricing Agent API",
-        "endpoints": ["/agent/recommend-price", "/agent/simulate", "/docs"]
+        "endpoints": ["/agent/recommend-price", "/agent/recommend-prices", "/agent/simulate",
+                      "/agent/cost-profiles", "/agent/forecast", "/agent/competitors", "/metrics", "/docs"]
     }
 
 # Router'ı app'e ekle
 app.include_router(router)
 
 # ...
-from backend.api import retrain_api
+from backend.api import retrain_api, cost_profile_api, forecast_api, competitor_api, metrics_api
+metrics_api.install(app)
 app.include_router(retrain_api.router)
+app.include_router(cost_profile_api.router)
+app.include_router(forecast_api.router)
+app.include_router(competitor_api.router)
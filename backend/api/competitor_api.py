@@ -0,0 +1,137 @@
+# backend/api/competitor_api.py
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import atexit
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.core.competitor_store import CompetitorPriceStore, DEFAULT_CAPACITY, STATS
+from backend.core.fetch_data import iter_competitor_feed
+
+# Rakip fiyat deposu; COMPETITOR_STORE_PATH varsa açılışta yüklenir. Eklemeler
+# diske ertelenerek yazılır: COMPETITOR_PERSIST_SECONDS içinde gelen tüm eklemeler
+# tek tam yazımda birleşir (0: her eklemeden sonra yaz); kapanışta kalan yazılır.
+COMPETITOR_STORE_PATH = os.environ.get("COMPETITOR_STORE_PATH", "backend/data/competitors.npz")
+COMPETITOR_PERSIST_SECONDS = float(os.environ.get("COMPETITOR_PERSIST_SECONDS", "5"))
+COMPETITOR_WINDOW_HOURS = float(os.environ.get("COMPETITOR_WINDOW_HOURS", "168"))
+COMPETITOR_STAT = os.environ.get("COMPETITOR_STAT", "median")   # önerilerde kullanılan özet
+competitors = CompetitorPriceStore(int(os.environ.get("COMPETITOR_CAPACITY", DEFAULT_CAPACITY)))
+try:
+    if os.path.exists(COMPETITOR_STORE_PATH):
+        competitors = CompetitorPriceStore.load(COMPETITOR_STORE_PATH)
+except Exception as e:
+    print(f"[!] Rakip fiyat deposu yüklenemedi ({COMPETITOR_STORE_PATH}): {e}")
+
+router = APIRouter(prefix="/agent", tags=["Competitor Prices"])
+
+class CompetitorObservation(BaseModel):
+    sku_id: str
+    price: float = Field(gt=0)
+    competitor: Optional[str] = None
+    ts: Optional[float] = None   # epoch saniye (yoksa şimdi)
+
+class CompetitorIngestRequest(BaseModel):
+    observations: List[CompetitorObservation]
+
+def resolve_competitor_prices(sku_ids: Sequence[Optional[str]],
+                              given: Sequence[Optional[float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Kalem başına rakip fiyatı: SKU'nun penceredeki depo özeti (COMPETITOR_STAT),
+    yoksa istekteki değer. Dönüş: (fiyatlar, depodan mı). İkisi de yoksa 422.
+    """
+    req = np.array([np.nan if g is None else g for g in given], dtype=np.float64).reshape(len(sku_ids))
+    if any(s is not None for s in sku_ids) and len(competitors):
+        stored = competitors.competitor_price(sku_ids, stat=COMPETITOR_STAT,
+                                              window=COMPETITOR_WINDOW_HOURS * 3600.0)
+    else:
+        stored = np.full(len(sku_ids), np.nan)
+    from_store = np.isfinite(stored)
+    prices = np.where(from_store, stored, req)
+    missing = np.flatnonzero(~np.isfinite(prices))
+    if len(missing):
+        raise HTTPException(status_code=422, detail=(
+            "competitor_price gerekli (depoda bu SKU için güncel rakip fiyatı yok): "
+            f"kalem {missing[:10].tolist()}"))
+    return prices, from_store
+
+_persist_lock = threading.Lock()
+_persist_timer: Optional[threading.Timer] = None
+
+def flush():
+    """Yazılmamış eklemeler varsa depoyu diske yazar."""
+    global _persist_timer
+    with _persist_lock:
+        _persist_timer = None
+    if COMPETITOR_STORE_PATH and competitors.dirty:
+        competitors.save(COMPETITOR_STORE_PATH)
+
+def _persist():
+    """Kaydı ertele: aralık başına en fazla bir tam yazım (istek yolu O(ekleme) kalır)."""
+    global _persist_timer
+    if not COMPETITOR_STORE_PATH:
+        return
+    if COMPETITOR_PERSIST_SECONDS <= 0:
+        flush()
+        return
+    with _persist_lock:
+        if _persist_timer is None:
+            _persist_timer = threading.Timer(COMPETITOR_PERSIST_SECONDS, flush)
+            _persist_timer.daemon = True
+            _persist_timer.start()
+
+atexit.register(flush)
+
+# -------------------- Toplu ekleme --------------------
+@router.post("/competitors/ingest")
+def ingest_competitor_prices(req: CompetitorIngestRequest) -> Dict[str, Any]:
+    obs = req.observations
+    ts = None
+    if any(o.ts is not None for o in obs):
+        ts = np.array([np.nan if o.ts is None else o.ts for o in obs], dtype=np.float64)
+        ts = np.where(np.isnan(ts), time.time(), ts)
+    out = competitors.ingest([o.sku_id for o in obs], [o.price for o in obs], ts,
+                             [o.competitor for o in obs])
+    _persist()
+    return out
+
+@router.post("/competitors/upload")
+def upload_competitor_feed(
+    file: UploadFile = File(..., description="CSV: sku_id, price [, competitor, ts | timestamp]"),
+    chunk_rows: int = Form(100_000, ge=1_000),
+) -> Dict[str, Any]:
+    """Besleme dosyası parça parça okunup depoya eklenir (satır başına nesne yok)."""
+    total = {"accepted": 0, "rejected": 0}
+    try:
+        for chunk in iter_competitor_feed(file.file, chunk_rows=chunk_rows):
+            out = competitors.ingest(chunk["sku_id"], chunk["price"], chunk["ts"], chunk["competitor"])
+            total["accepted"] += out["accepted"]
+            total["rejected"] += out["rejected"]
+    except (ValueError, pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+        raise HTTPException(status_code=422, detail=f"Dosya okunamadı: {e}")
+    _persist()
+    return {**total, "skus": len(competitors)}
+
+# -------------------- Sorgu --------------------
+@router.get("/competitors/{sku_id}")
+def get_competitor_prices(sku_id: str,
+                          window_hours: Optional[float] = Query(None, gt=0)) -> Dict[str, Any]:
+    """
+    SKU'nun pencere özetleri. Pencere en fazla son max_observations (depo
+    capacity'si) gözlemi kapsar; pencerede daha fazlası geldiyse truncated=true.
+    """
+    window = (window_hours or COMPETITOR_WINDOW_HOURS) * 3600.0
+    d = competitors.describe(sku_id, window=window)
+    if d is None:
+        raise HTTPException(status_code=404, detail=f"SKU için rakip fiyatı yok: {sku_id}")
+    return dict(d, stat=COMPETITOR_STAT, competitor_price=d.get(COMPETITOR_STAT))
+
+@router.get("/competitors")
+def competitor_summary() -> Dict[str, Any]:
+    return {"skus": len(competitors), "capacity": competitors.capacity,
+            "max_observations_per_window": competitors.capacity,
+            "window_hours": COMPETITOR_WINDOW_HOURS, "stat": COMPETITOR_STAT, "stats": list(STATS)}
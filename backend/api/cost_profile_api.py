@@ -0,0 +1,60 @@
+# backend/api/cost_profile_api.py
+from fastapi import APIRouter, HTTPException, Response
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+import os
+
+from backend.core.cost_profiles import CostProfileRegistry
+from backend.core.rules_guard import GuardValues
+
+# COST_PROFILES_PATH verilirse kayıt JSON dosyasında kalıcıdır ve işçiler arasında
+# paylaşılır (değişiklikler en geç COST_PROFILES_POLL_SECONDS içinde görülür);
+# yoksa yalnızca bu işçinin belleğinde (tek işçi)
+profiles = CostProfileRegistry(os.environ.get("COST_PROFILES_PATH") or None,
+                               poll_interval=float(os.environ.get("COST_PROFILES_POLL_SECONDS", "2")))
+
+router = APIRouter(prefix="/agent", tags=["Cost Profiles"])
+
+class CostProfileInput(BaseModel):
+    unit_cost: Optional[float] = 60.0
+    commission_pct: Optional[float] = 0.12
+    payment_fee_pct: Optional[float] = 0.02
+    tax_pct: Optional[float] = 0.00
+    shipping_cost: Optional[float] = 25.0
+    packaging_cost: Optional[float] = 3.0
+    other_fixed_cost: Optional[float] = 0.0
+    min_margin_pct: Optional[float] = 0.10
+    description: Optional[str] = None
+
+def resolve_profile(profile_id: str) -> GuardValues:
+    """cost_profile_id -> önceden hesaplanmış guard değerleri; yoksa 404."""
+    gv = profiles.get(profile_id)
+    if gv is None:
+        raise HTTPException(status_code=404, detail=f"Maliyet profili bulunamadı: {profile_id}")
+    return gv
+
+# -------------------- CRUD --------------------
+@router.get("/cost-profiles")
+def list_profiles() -> Dict[str, Any]:
+    return {"count": len(profiles), "profiles": profiles.list()}
+
+@router.get("/cost-profiles/{profile_id}")
+def get_profile(profile_id: str) -> Dict[str, Any]:
+    resolve_profile(profile_id)
+    return profiles.describe(profile_id)
+
+@router.put("/cost-profiles/{profile_id}")
+def put_profile(profile_id: str, req: CostProfileInput, response: Response) -> Dict[str, Any]:
+    costs = req.model_dump(exclude={"description"})
+    try:
+        created = profiles.put(profile_id, costs, description=req.description)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    response.status_code = 201 if created else 200
+    return profiles.describe(profile_id)
+
+@router.delete("/cost-profiles/{profile_id}")
+def delete_profile(profile_id: str) -> Dict[str, Any]:
+    if not profiles.delete(profile_id):
+        raise HTTPException(status_code=404, detail=f"Maliyet profili bulunamadı: {profile_id}")
+    return {"deleted": profile_id}
@@ -0,0 +1,120 @@
+# backend/api/forecast_api.py
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from typing import Any, Dict, Optional, Sequence
+import datetime
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from backend.core.forecasting import ForecastStore
+from backend.core.rl.demand_simulator import DemandModel
+
+DEFAULT_ELASTICITY = -1.2
+
+# Uydurulmuş SKU talep modelleri (sütunsal .npz); açılışta varsa yüklenir
+FORECAST_STORE_PATH = os.environ.get("FORECAST_STORE_PATH", "backend/data/forecast.npz")
+forecasts = ForecastStore()
+try:
+    if os.path.exists(FORECAST_STORE_PATH):
+        forecasts = ForecastStore.load(FORECAST_STORE_PATH)
+except Exception as e:
+    print(f"[!] Talep modeli deposu yüklenemedi ({FORECAST_STORE_PATH}): {e}")
+_fit_lock = threading.Lock()   # yenilemeler sıralı; okuyucular kilitsiz (referans takası)
+
+router = APIRouter(prefix="/agent", tags=["Demand Forecast"])
+
+def current_week() -> int:
+    return datetime.date.today().isocalendar()[1]
+
+def swap_store(new_store: ForecastStore) -> ForecastStore:
+    """Servis edilen depoyu atomik olarak değiştirir (tek referans ataması)."""
+    global forecasts
+    old, forecasts = forecasts, new_store
+    return old
+
+def demand_params(sku_ids: Sequence[Optional[str]], elasticity: Sequence[Optional[float]],
+                  seasonality: Sequence[Optional[float]], week: Sequence[Optional[int]]) -> Dict[str, np.ndarray]:
+    """
+    Kalem başına esneklik ve mevsimsellik. Öncelik: istekte açıkça verilen
+    değer, sonra depodaki SKU modeli (sku_id), sonra genel varsayılanlar.
+    Hafta verilmeyen kalemlerde mevsimsellik nötrdür (1.0): yanıt isteğin
+    geldiği tarihe bağlı olmasın. "seasonal": SKU profilinden mevsim uygulandı mı.
+    """
+    n = len(sku_ids)
+    has_week = np.array([w is not None for w in week], dtype=bool).reshape(n)
+    wk = np.array([1 if w is None else w for w in week], dtype=np.int64)
+    p = forecasts.season_at(sku_ids, wk)
+    el = np.where(p["known"], p["elasticity"], DEFAULT_ELASTICITY)
+    se = np.where(p["known"] & has_week, p["seasonality"], 1.0)
+    given_el = np.array([np.nan if e is None else e for e in elasticity], dtype=np.float64).reshape(n)
+    given_se = np.array([np.nan if s is None else s for s in seasonality], dtype=np.float64).reshape(n)
+    return {
+        "known": p["known"],
+        "seasonal": p["known"] & has_week & np.isnan(given_se),
+        "elasticity": np.where(np.isnan(given_el), el, given_el),
+        "seasonality": np.where(np.isnan(given_se), se, given_se),
+    }
+
+def training_demand(sku_ids: Optional[np.ndarray], elasticity: Optional[np.ndarray], default_elasticity: float,
+                    seasonality, start_week: Optional[int] = None) -> DemandModel:
+    """
+    Eğitim ortamının talep modeli. Depoda modeli olan SKU'lar kendi esneklik
+    ve mevsimsellik profilini (start_week'ten başlayarak) kullanır; satırda
+    açık esneklik varsa o önceliklidir. Diğerleri config değerlerine düşer.
+    """
+    if sku_ids is None or not len(forecasts):
+        el = None if elasticity is None else np.where(np.isfinite(elasticity), elasticity, default_elasticity)
+        return DemandModel(elasticity=default_elasticity if el is None else el, seasonality=seasonality)
+    model = forecasts.demand_model(sku_ids.tolist(), start_week=current_week() if start_week is None else start_week)
+    known = forecasts.rows_for(sku_ids.tolist()) >= 0
+    el = np.where(known, model.elasticity, default_elasticity)
+    if elasticity is not None:
+        el = np.where(np.isfinite(elasticity), elasticity, el)
+    fallback = np.broadcast_to(np.resize(np.asarray(seasonality, dtype=np.float64), model.n_weeks),
+                               model.seasonality.shape)
+    return DemandModel(el, np.where(known[:, None], model.seasonality, fallback))
+
+# -------------------- Uydurma / yenileme --------------------
+@router.post("/forecast/fit")
+def fit_forecast(
+    file: UploadFile = File(..., description="Satış geçmişi CSV: sku_id, week|date, price, units [, competitor_price]"),
+    mode: str = Form("refresh", description="refresh: yalnızca yeni haftalar eklenir; replace: sıfırdan"),
+    workers: int = Form(1, ge=1, le=32),
+    chunk_rows: int = Form(200_000, ge=1_000),
+    season_length: Optional[int] = Form(None, ge=1, le=104, description="Yalnızca replace modunda"),
+) -> Dict[str, Any]:
+    """
+    Satış geçmişinden SKU talep modellerini uydurur. refresh modunda mevcut
+    yeterli istatistiklere yalnızca depodaki son haftadan sonraki satırlar
+    eklenir; tüm SKU'lar tek vektörel adımda yeniden çözülür.
+    """
+    if mode not in ("refresh", "replace"):
+        raise HTTPException(status_code=422, detail="mode 'refresh' veya 'replace' olmalı")
+    with _fit_lock:
+        if mode == "replace":
+            work = ForecastStore(season_length or forecasts.season_length)
+        else:
+            work = forecasts.copy()
+        try:
+            ingest = work.fit_csv(file.file, chunk_rows=chunk_rows, workers=workers,
+                                  only_new=mode == "refresh" and len(work) > 0)
+        except (ValueError, pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+            raise HTTPException(status_code=422, detail=f"Dosya okunamadı: {e}")
+        work.save(FORECAST_STORE_PATH)
+        swap_store(work)
+    return {"mode": mode, **ingest, "season_length": work.season_length}
+
+# -------------------- Sorgu --------------------
+@router.get("/forecast")
+def forecast_summary() -> Dict[str, Any]:
+    st = forecasts
+    return {"skus": len(st), **st.meta()}
+
+@router.get("/forecast/{sku_id}")
+def get_forecast(sku_id: str) -> Dict[str, Any]:
+    d = forecasts.describe(sku_id)
+    if d is None:
+        raise HTTPException(status_code=404, detail=f"SKU için talep modeli yok: {sku_id}")
+    return d
@@ -0,0 +1,133 @@
+# backend/api/jobs.py
+"""
+Arka plan eğitim işleri.
+
+İşler tek işçili bir thread havuzunda sırayla çalışır; istek işçisi
+(uvicorn) eğitim boyunca bloklanmaz. İlerleme, her episode sonunda
+fit(on_episode=...) geri çağrısıyla güncellenir; iptal de aynı geri çağrı
+üzerinden (False dönerek) yapılır. Episode ayrıntıları (ödül, TD hatası,
+epsilon, ziyaret dağılımı) işin telemetri tamponuna yazılır; iş bittiğinde
+tampon kapatılır ve akış okuyucuları sonlanır.
+
+Son durum devreye alma anında belirlenir: commit() (should_swap) iptal
+istenmemişse işi devreye alınmış işaretler ve sonraki iptaller yok sayılır;
+devreye alınan iş SUCCEEDED, alınmayan iptal edilmiş iş CANCELLED biter.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.core.rl.telemetry import TrainingTelemetry
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+
+@dataclass
+class RetrainJob:
+    job_id: str
+    episodes_total: int
+    status: str = QUEUED
+    episodes_done: int = 0
+    rewards: List[float] = field(default_factory=list)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    committed: bool = False   # model devreye alındı (iptal artık geçersiz)
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    telemetry: TrainingTelemetry = field(default_factory=TrainingTelemetry, repr=False)
+    _state_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def on_episode(self, done: int, reward: float) -> bool:
+        """fit() geri çağrısı: ilerlemeyi kaydeder, iptal istenmişse False döner."""
+        self.episodes_done = done
+        self.rewards.append(float(reward))
+        return not self.cancel_event.is_set()
+
+    def commit(self) -> bool:
+        """should_swap geri çağrısı: iptal yoksa işi devreye alınmış işaretler ve True döner."""
+        with self._state_lock:
+            if self.cancel_event.is_set():
+                return False
+            self.committed = True
+            return True
+
+    def request_cancel(self) -> bool:
+        """İptal ister; model zaten devreye alındıysa etkisizdir (False)."""
+        with self._state_lock:
+            if self.committed:
+                return False
+            self.cancel_event.set()
+            return True
+
+    def to_dict(self, trend: int = 10) -> Dict[str, Any]:
+        last = self.telemetry.last() or {}
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "progress": {
+                "episodes_done": self.episodes_done,
+                "episodes_total": self.episodes_total,
+                "reward_trend": [round(r, 4) for r in self.rewards[-trend:]],
+                "td_abs_mean": last.get("td_abs_mean"),
+                "states": last.get("states"),
+            },
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+class JobManager:
+    """Eğitim işlerini kuyruğa alır, durumlarını tutar ve iptal eder."""
+    def __init__(self, max_workers: int = 1, max_history: int = 100):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="retrain")
+        self._jobs: Dict[str, RetrainJob] = {}
+        self._lock = threading.Lock()
+        self.max_history = max_history
+
+    def submit(self, episodes_total: int, fn: Callable[[RetrainJob], Dict[str, Any]]) -> RetrainJob:
+        job = RetrainJob(job_id=uuid.uuid4().hex[:12], episodes_total=episodes_total)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._trim()
+        self._pool.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job: RetrainJob, fn: Callable[[RetrainJob], Dict[str, Any]]):
+        if job.cancel_event.is_set():
+            job.status, job.finished_at = CANCELLED, time.time()
+            job.telemetry.close()
+            return
+        job.status, job.started_at = RUNNING, time.time()
+        try:
+            job.result = fn(job)
+            job.status = CANCELLED if job.cancel_event.is_set() and not job.committed else SUCCEEDED
+        except Exception as e:   # iş hatası sunucuyu düşürmesin
+            job.status, job.error = FAILED, f"{type(e).__name__}: {e}"
+        finally:
+            job.finished_at = time.time()
+            job.telemetry.close()
+
+    def get(self, job_id: str) -> Optional[RetrainJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[RetrainJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[RetrainJob]:
+        job = self._jobs.get(job_id)
+        if job is not None and job.status in (QUEUED, RUNNING):
+            job.request_cancel()
+        return job
+
+    def _trim(self):
+        # bitmiş eski işleri unut
+        finished = [j for j in self._jobs.values() if j.status in (SUCCEEDED, FAILED, CANCELLED)]
+        for j in finished[:max(0, len(self._jobs) - self.max_history)]:
+            self._jobs.pop(j.job_id, None)
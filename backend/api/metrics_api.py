@@ -0,0 +1,34 @@
+# backend/api/metrics_api.py
+from fastapi import APIRouter, FastAPI, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from backend.core.metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware, SamplingProfiler, profiler_enabled
+
+router = APIRouter(tags=["Metrics"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus metin biçimi (text/plain; version=0.0.4)."""
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@router.get("/metrics/profile", response_class=PlainTextResponse)
+def profile(seconds: float = Query(5.0, gt=0, le=60),
+            interval_ms: float = Query(5.0, ge=0.5, le=1000),
+            format: str = Query("folded", pattern="^(folded|top)$")):
+    """
+    Örnekleyici profilleyici (yalnızca PROFILER_ENABLED=1 iken). Süre boyunca
+    diğer iş parçacıklarının yığınları örneklenir; folded çıktı flamegraph /
+    speedscope ile açılır, top en sık görülen yaprak fonksiyonları listeler.
+    """
+    if not profiler_enabled():
+        raise HTTPException(status_code=403, detail="Profilleyici kapalı (PROFILER_ENABLED=1 ile açın)")
+    prof = SamplingProfiler(interval=interval_ms / 1000.0).run_for(seconds)
+    if format == "top":
+        lines = [f"{n:8d}  {name}" for name, n in prof.top(30)]
+        return PlainTextResponse(f"# {prof.samples} örnek\n" + "\n".join(lines) + "\n")
+    return PlainTextResponse(prof.folded())
+
+def install(app: FastAPI):
+    """İstek metrikleri ara katmanı + /metrics uç noktaları."""
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(router)
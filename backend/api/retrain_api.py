@@ -1,12 +1,31 @@
 # backend/api/retrain_api.py
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, UploadFile, File, Form, Header, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 from typing import List, Dict, Any, Optional
-import io, csv
+import io, csv, os, json, threading, time
+import numpy as np
+import pandas as pd
 
-from backend.core.rl.qlearning_agent import QLearningAgent
+from backend.core.rl.qlearning_agent import QLearningAgent, STATE_FIELDS
+from backend.core.data_utils import detect_format, read_training_columns
 from backend.core.rl.env_definition import EnhancedPricingEnv
-from backend.core.rules_guard import CostParams, breakdown
+from backend.core.rl.demand_simulator import DemandModel, predict_sales_arr
+from backend.core.rules_guard import CostParams, CostArrays, breakdown_arr
+from backend.core.rl.checkpoint import checkpoint_meta
+from backend.core.rl.agent_registry import valid_group_id
+from backend.core.rl.discretizer import BIN_KINDS, FEATURES, Discretizer
+from backend.core.metrics import RETRAIN_LATENCY, RETRAIN_RUNS
+from backend.core.rl.telemetry import visit_labels
+from backend.core.rl.early_stopping import StopCriteria
+from backend.core.rl.replay import ReplayConfig
+from backend.api.jobs import JobManager
+from backend.api.cost_profile_api import resolve_profile
+from backend.api.forecast_api import training_demand
+
+CHECKPOINT_PATH = "backend/data/q_table.npz"
+# senkron /retrain ve iş thread'i aynı ebeveynden kopyalayıp yayınlamasın: eğitimler sırayla
+_RETRAIN_LOCK = threading.Lock()
 
 router = APIRouter(prefix="/agent", tags=["Training & Tools"])
 
@@ -15,9 +34,11 @@ class TrainRow(BaseModel):
     last_price: float
     competitor_price: float
     sales_last_week: float
+    elasticity: Optional[float] = None   # SKU başına esneklik (yoksa SKU modeli, o da yoksa config.elasticity)
+    sku_id: Optional[str] = None         # talep modeli deposundaki SKU (esneklik + mevsimsellik profili)
 
 class TrainConfig(BaseModel):
-    episodes: int = 40
+    episodes: int = 40              # erken durdurma ölçütleri verilirse üst sınır
     alpha: float = 0.2
     gamma: float = 0.92
     epsilon_start: float = 0.3
@@ -26,6 +47,8 @@ class TrainConfig(BaseModel):
     min_margin_pct: float = 0.10
     elasticity: float = -1.2
     seasonality: float = 1.0
+    seasonality_profile: Optional[List[float]] = None   # haftalık çarpanlar (ufukta döner); seasonality yerine
+    start_week: Optional[int] = Field(None, ge=1, le=53)  # SKU modellerinde ufkun ilk haftası (yoksa bugün)
     # default maliyet (satırlarda yoksa kullanılacak)
     unit_cost: float = 60.0
     commission_pct: float = 0.12
@@ -34,12 +57,48 @@ class TrainConfig(BaseModel):
     shipping_cost: float = 25.0
     packaging_cost: float = 3.0
     other_fixed_cost: float = 0.0
+    cost_profile_id: Optional[str] = None   # verilirse yukarıdaki maliyet alanları yerine kullanılır
+    group_id: Optional[str] = None          # verilirse yalnızca bu SKU grubunun tablosu eğitilir
+    # eğitim modu
+    batched: bool = True            # tüm yörüngeler NumPy dizileriyle birlikte ilerler
+    seed: Optional[int] = None
+    workers: int = Field(1, ge=1)   # >1: yörüngeler süreçlere bölünür (batched)
+    sync_every: int = Field(5, ge=1)  # paralel modda Q tablosu birleştirme aralığı (episode)
+    # erken durdurma: ilk sağlanan ölçütte eğitim biter (training.stop_reason)
+    stop_q_delta: Optional[float] = Field(None, gt=0)        # episode içi en büyük |ΔQ| bunun altına inerse
+    stop_patience: int = Field(1, ge=1)                      # ... bu kadar episode üst üste
+    stop_plateau_window: Optional[int] = Field(None, ge=2)   # son N episode ödülü düzleşirse
+    stop_plateau_tol: float = Field(0.01, ge=0)              # göreli aralık toleransı
+    time_budget_seconds: Optional[float] = Field(None, gt=0)  # duvar saati bütçesi
+    min_episodes: int = Field(1, ge=1)
+    # deneyim tekrarı (batched): geçişler halka tampona yazılır, adım başına ek toplu güncelleme
+    replay_capacity: int = Field(0, ge=0)          # 0: kapalı
+    replay_batch: int = Field(256, ge=1)
+    replay_updates: int = Field(1, ge=1)           # ortam adımı başına tampon güncellemesi
+    replay_prioritized: bool = False               # TD hatası öncelikli örnekleme
+    # ayrıklaştırma: özellik -> şema, ör. {"last_price": {"kind": "log", "bins": 24},
+    # "stock_level": {"kind": "quantile", "bins": 10}}. Verilirse sınırlar eğitim
+    # verisinden uydurulur ve (tablo anahtarları değiştiği için) eğitim boş tablodan başlar.
+    discretization: Optional[Dict[str, Dict[str, Any]]] = None
 
 class RetrainRequest(BaseModel):
     data: List[TrainRow]
     config: Optional[TrainConfig] = None
 
+def _validate(cfg: TrainConfig):
+    """İş kuyruğa alınmadan önce: bilinmeyen profil -> 404, geçersiz grup -> 422."""
+    _costs_from_cfg(cfg)
+    for name, spec in (cfg.discretization or {}).items():
+        if name not in FEATURES or spec.get("kind", "width") not in BIN_KINDS:
+            raise HTTPException(status_code=422, detail=f"Geçersiz discretization: {name}: {spec}")
+    if cfg.group_id is not None and not valid_group_id(cfg.group_id):
+        raise HTTPException(status_code=422, detail=f"Geçersiz group_id: {cfg.group_id!r}")
+    if cfg.replay_capacity and not cfg.batched and cfg.workers <= 1:
+        raise HTTPException(status_code=422, detail="replay_capacity batched=true gerektirir")
+
 def _costs_from_cfg(cfg: TrainConfig):
+    if cfg.cost_profile_id is not None:
+        return resolve_profile(cfg.cost_profile_id).cp
     base_cp = CostParams(
         unit_cost=cfg.unit_cost,
         commission_pct=cfg.commission_pct,
@@ -52,43 +111,292 @@ def _costs_from_cfg(cfg: TrainConfig):
     )
     return base_cp
 
-@router.post("/retrain")
-def retrain(req: RetrainRequest):
-    cfg = req.config or TrainConfig()
+def _demand_from(cfg: TrainConfig, columns: Dict[str, np.ndarray]) -> DemandModel:
+    """
+    Satır başına talep modeli: açık esneklik sütunu, sonra sku_id ile talep
+    modeli deposu (esneklik + mevsimsellik), sonra config değerleri.
+    """
+    return training_demand(columns.get("sku_id"), columns.get("elasticity"), cfg.elasticity,
+                           cfg.seasonality_profile or cfg.seasonality, cfg.start_week)
+
+def _stop_criteria(cfg: TrainConfig) -> StopCriteria:
+    return StopCriteria(q_delta=cfg.stop_q_delta, patience=cfg.stop_patience,
+                        plateau_window=cfg.stop_plateau_window, plateau_tol=cfg.stop_plateau_tol,
+                        time_budget=cfg.time_budget_seconds, min_episodes=cfg.min_episodes)
+
+def _replay_config(cfg: TrainConfig) -> Optional[ReplayConfig]:
+    if not cfg.replay_capacity:
+        return None
+    return ReplayConfig(capacity=cfg.replay_capacity, batch_size=cfg.replay_batch,
+                        updates_per_step=cfg.replay_updates, prioritized=cfg.replay_prioritized)
+
+def _train(cfg: TrainConfig, trajectories, on_episode=None, should_swap=lambda: True,
+           mode: str = "sync", telemetry=None) -> Dict[str, Any]:
+    """Eğitim + yayın; süre ve sonuç retrain_* metriklerine yazılır (mode: sync | job | upload)."""
+    t0 = time.perf_counter()
+    status = "error"
+    try:
+        result = _fit_and_publish(cfg, trajectories, on_episode, should_swap, telemetry)
+        status = result["status"]
+        return result
+    finally:
+        RETRAIN_LATENCY.labels(mode).observe(time.perf_counter() - t0)
+        RETRAIN_RUNS.labels(mode, status).inc()
+
+def _fit_and_publish(cfg: TrainConfig, trajectories, on_episode=None, should_swap=lambda: True,
+                     telemetry=None) -> Dict[str, Any]:
+    """
+    Servis edilen ajanın kopyası üzerinde eğitir; bitince yeni tabloyu atomik
+    olarak devreye alır. Eğitim sürerken canlı trafik eski tabloyu okur.
+    Eğitimler (senkron ya da iş) tek kilitle sıralanır: her eğitim bir öncekinin
+    yayınladığı ajandan başlar, yayın/checkpoint yarışı olmaz.
+    """
+    with _RETRAIN_LOCK:
+        return _fit_and_publish_locked(cfg, trajectories, on_episode, should_swap, telemetry)
+
+def _fit_and_publish_locked(cfg: TrainConfig, trajectories, on_episode, should_swap,
+                            telemetry) -> Dict[str, Any]:
+    from backend.api import agent_api
+
+    base_cp = _costs_from_cfg(cfg)
     env = EnhancedPricingEnv(
         holding_cost_per_unit=cfg.holding_cost_per_unit,
-        min_margin_pct=cfg.min_margin_pct,
+        min_margin_pct=base_cp.min_margin_pct,
         elasticity=cfg.elasticity,
         seasonality=cfg.seasonality,
+        demand=_demand_from(cfg, trajectories),
     )
-    # mevcut global ajanı al
-    from backend.api.agent_api import agent as GLOBAL_AGENT
+    # servis edilen ajanın kopyası (canlı/eşlenmiş tabloya dokunulmaz); grubun
+    # henüz modeli yoksa paylaşılan ajandan başlar
+    serving = agent_api.agent_for(cfg.group_id)
+    parent_version = serving.version
+    if cfg.discretization:
+        disc = Discretizer.fit(trajectories, cfg.discretization)
+        work = QLearningAgent(action_space=serving.action_space, epsilon=serving.epsilon,
+                              q_backend="array", discretizer=disc)
+        parent_version = None   # farklı anahtar uzayı: artımlı checkpoint yazılamaz
+    else:
+        work = serving.clone()
 
     # ajan hiperparametre güncelle
-    GLOBAL_AGENT.alpha = cfg.alpha
-    GLOBAL_AGENT.gamma = cfg.gamma
-
-    base_cp = _costs_from_cfg(cfg)
-    def cp_fn(_s): return base_cp
+    work.alpha = cfg.alpha
+    work.gamma = cfg.gamma
 
     # eğitim
-    trajectories = [r.model_dump() for r in req.data]
-    GLOBAL_AGENT.fit(env, trajectories, cp_fn,
+    stats = work.fit(env, trajectories, base_cp,
                      episodes=cfg.episodes,
                      epsilon_start=cfg.epsilon_start,
-                     epsilon_end=cfg.epsilon_end)
+                     epsilon_end=cfg.epsilon_end,
+                     batched=cfg.batched,
+                     seed=cfg.seed,
+                     workers=cfg.workers,
+                     sync_every=cfg.sync_every,
+                     on_episode=on_episode,
+                     telemetry=telemetry,
+                     stop=_stop_criteria(cfg),
+                     replay=_replay_config(cfg))
+
+    swapped = should_swap()
+    ckpt = None
+    meta = {"episodes": stats["episodes"], "alpha": work.alpha, "gamma": work.gamma,
+            "discretization": work.discretization}
+    if swapped and cfg.group_id is not None:
+        # grup modeli: grubun kendi snapshot deposuna yayınlanır, paylaşılan ajan değişmez
+        agent_api.groups.put(cfg.group_id, work, meta=meta)
+    elif swapped:
+        # değişmez snapshot olarak yayınla (diğer işçiler manifest'ten alır), sonra devreye al
+        policy = work.compile_policy()
+        work.version = agent_api.snapshots.publish(work.q_table, policy=policy, meta=meta)
+        policy.version = work.version
+        agent_api.swap_agent(work)
+        # checkpoint: disktaki son checkpoint bu eğitimin başladığı sürümse yalnızca
+        # değişen state'ler yazılır, aksi halde (ilk kayıt / geri alma sonrası) tam kayıt
+        last = checkpoint_meta(CHECKPOINT_PATH) or {}
+        incremental = parent_version is not None and last.get("version") == parent_version
+        ckpt = work.save_checkpoint(CHECKPOINT_PATH, incremental=incremental)
+
+    return {
+        "status": "ok" if swapped else "cancelled",
+        "swapped": swapped,
+        "group_id": cfg.group_id,
+        "model_version": work.version if swapped else None,
+        "checkpoint": ckpt,
+        "q_states": len(work.q_table),
+        "alpha": work.alpha,
+        "gamma": work.gamma,
+        "epsilon": work.epsilon,
+        "training": {
+            "batched": cfg.batched,
+            "workers": stats["workers"],
+            "episodes": stats["episodes"],
+            "episodes_requested": stats["episodes_requested"],
+            "stop_reason": stats["stop_reason"],
+            "seconds": stats["seconds"],
+            "episodes_per_sec": stats["episodes_per_sec"],
+            "mean_episode_reward": stats["mean_episode_reward"],
+            "last_episode_reward": stats["last_episode_reward"],
+            "td_abs_mean": stats["episode_td_errors"][-1] if stats["episode_td_errors"] else None,
+            "replay": stats["replay"],
+        },
+    }
+
+def _columns(rows: List[TrainRow]) -> Dict[str, np.ndarray]:
+    """TrainRow listesi -> trainer'ın beklediği sütun dizileri (ara dict kopyası yok)."""
+    cols = {k: np.fromiter((getattr(r, k) for r in rows), dtype=np.float64, count=len(rows))
+            for k in STATE_FIELDS}
+    if any(r.elasticity is not None for r in rows):
+        cols["elasticity"] = np.array([np.nan if r.elasticity is None else r.elasticity for r in rows])
+    if any(r.sku_id is not None for r in rows):
+        cols["sku_id"] = np.array([r.sku_id for r in rows], dtype=object)
+    return cols
+
+@router.post("/retrain")
+def retrain(req: RetrainRequest):
+    cfg = req.config or TrainConfig()
+    _validate(cfg)
+    return _train(cfg, _columns(req.data))
+
+# -------------------- Arka plan eğitim işleri --------------------
+JOBS = JobManager()
+
+@router.post("/retrain/jobs", status_code=202)
+def submit_retrain_job(req: RetrainRequest):
+    cfg = req.config or TrainConfig()
+    _validate(cfg)
+    trajectories = _columns(req.data)
+    job = JOBS.submit(cfg.episodes, lambda job: _train(
+        cfg, trajectories, on_episode=job.on_episode,
+        should_swap=job.commit, mode="job", telemetry=job.telemetry))
+    return job.to_dict()
+
+@router.post("/retrain/upload", status_code=202)
+def submit_retrain_upload(
+    file: UploadFile = File(...),
+    config: Optional[str] = Form(None, description="TrainConfig JSON"),
+    max_rows: Optional[int] = Form(None, ge=1, description="Üst sınır; aşılırsa rezervuar örnekleme"),
+    chunk_rows: int = Form(100_000, ge=1_000),
+):
+    """
+    CSV/Parquet dosyasından arka plan eğitimi. Dosya parça parça okunup
+    doğrudan sütun dizilerine yazılır (satır başına Pydantic/dict nesnesi yok);
+    başlangıç state'leri batched fit'e dizi olarak verilir.
+    """
+    try:
+        cfg = TrainConfig.model_validate_json(config) if config else TrainConfig()
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
+    _validate(cfg)
+    try:
+        data = read_training_columns(file.file, fmt=detect_format(file.filename, file.content_type),
+                                     chunk_rows=chunk_rows, max_rows=max_rows, seed=cfg.seed)
+    except ImportError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except (ValueError, pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+        raise HTTPException(status_code=422, detail=f"Dosya okunamadı: {e}")
+    if data["rows_used"] == 0:
+        raise HTTPException(status_code=422, detail="Dosyada geçerli satır yok")
+
+    ingest = {k: data[k] for k in ("rows_read", "rows_used", "sampled")}
+    columns = data.pop("columns")
 
-    # kaydet
-    GLOBAL_AGENT.save_q_table("backend/data/q_table.pkl")
+    def run(job):
+        result = _train(cfg, columns, on_episode=job.on_episode,
+                        should_swap=job.commit, mode="upload",
+                        telemetry=job.telemetry)
+        result["ingest"] = ingest
+        return result
 
+    job = JOBS.submit(cfg.episodes, run)
+    return dict(job.to_dict(), ingest=ingest)
+
+@router.get("/retrain/jobs")
+def list_retrain_jobs():
+    return {"jobs": [j.to_dict(trend=1) for j in JOBS.list()]}
+
+@router.get("/retrain/jobs/{job_id}")
+def get_retrain_job(job_id: str):
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Eğitim işi bulunamadı")
+    return job.to_dict()
+
+SSE_KEEPALIVE = 15.0   # saniye; proxy'ler boşta bağlantıyı kesmesin
+
+def _sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+def _telemetry_stream(job, after: int):
+    """Tampondaki kayıtlar, sonra yenileri; iş bitince son durum ile 'end' olayı."""
+    seq = after
+    yield _sse("meta", {"job_id": job.job_id, "episodes_total": job.episodes_total,
+                        "visit_buckets": visit_labels()})
+    while True:
+        events = job.telemetry.wait(seq, timeout=SSE_KEEPALIVE)
+        for e in events:
+            seq = e["seq"]
+            yield _sse("episode", e, seq)
+        if not events:
+            if job.telemetry.closed:
+                yield _sse("end", job.to_dict(trend=1))
+                return
+            yield ": keep-alive\n\n"
+
+@router.get("/retrain/jobs/{job_id}/events")
+def stream_retrain_job(job_id: str, after: int = 0,
+                       last_event_id: Optional[str] = Header(None)):
+    """
+    Eğitim telemetrisi (server-sent events). Her episode bir "episode" olayıdır:
+    mean_reward, total_reward, td_abs_mean, epsilon, new_states, states,
+    visit_hist (kova etiketleri ilk "meta" olayında). Yeniden bağlanan istemci Last-Event-ID
+    (ya da ?after=seq) ile kaldığı yerden devam eder.
+    """
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Eğitim işi bulunamadı")
+    if last_event_id is not None and last_event_id.isdigit():
+        after = max(after, int(last_event_id))
+    return StreamingResponse(_telemetry_stream(job, after), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/retrain/jobs/{job_id}/telemetry")
+def get_retrain_telemetry(job_id: str, after: int = 0):
+    """Tampondaki telemetri kayıtları (akış yerine yoklama yapan istemciler için)."""
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Eğitim işi bulunamadı")
+    return {"job_id": job_id, "status": job.status, "visit_buckets": visit_labels(),
+            "events": job.telemetry.since(after)}
+
+@router.delete("/retrain/jobs/{job_id}")
+def cancel_retrain_job(job_id: str):
+    job = JOBS.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Eğitim işi bulunamadı")
+    return job.to_dict()
+
+# -------------------- Model sürümleri --------------------
+@router.get("/models")
+def list_models():
+    from backend.api import agent_api
+    manifest = agent_api.snapshots.read_manifest()
     return {
-        "status":"ok",
-        "q_states": len(GLOBAL_AGENT.q_table),
-        "alpha": GLOBAL_AGENT.alpha,
-        "gamma": GLOBAL_AGENT.gamma,
-        "epsilon": GLOBAL_AGENT.epsilon
+        "active": manifest.get("active"),
+        "serving": agent_api.current_agent().version,   # bu işçide yüklü sürüm
+        "versions": manifest.get("versions", []),
     }
 
+@router.post("/models/{version}/activate")
+def activate_model(version: str):
+    """Aktif sürümü değiştirir (rollforward/rollback); tüm işçiler manifest'ten alır."""
+    from backend.api import agent_api
+    try:
+        agent_api.snapshots.activate(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Model sürümü bulunamadı")
+    agent_api.maybe_reload(force=True)
+    return {"active": version, "serving": agent_api.current_agent().version}
+
 class CurveCosts(BaseModel):
     unit_cost: float = 60.0
     commission_pct: float = 0.12
@@ -108,22 +416,129 @@ class CurveRequest(BaseModel):
     pct_max: int = 20
     step: int = 1
     apply_guard: bool = True
+    # verilirse satış adedi talep modelinden (fiyata duyarlı) hesaplanır; yoksa sabit base_sales
+    elasticity: Optional[float] = None
+    seasonality: float = 1.0
 
 @router.post("/simulate-curve")
 def simulate_curve(req: CurveRequest):
     labels = list(range(req.pct_min, req.pct_max+1, req.step))
     cp = CostParams(**req.costs.model_dump())
-    out = {"labels": labels, "net_profit": [], "margin_pct": [], "guard": []}
-
-    for pct in labels:
-        price = max(0.01, req.base_price * (1 + pct/100))
-        brk = breakdown(price, cp)
-        out["net_profit"].append(round(brk["net_profit"] * req.base_sales, 2))
-        out["margin_pct"].append(round(brk["margin_pct"]*100, 2))
-        out["guard"].append({
-            "break_even": round(req.base_price*(1+0),2),  # sade placeholder
-            "min_margin_price": round(
-                price if brk["margin_pct"] >= cp.min_margin_pct else
-                price / max(1e-9, brk["margin_pct"]) * cp.min_margin_pct, 2)
-        })
+
+    # tüm eğri tek vektörel geçişte
+    pcts = np.asarray(labels, dtype=np.float64)
+    prices = np.maximum(0.01, req.base_price * (1 + pcts/100))
+    brk = breakdown_arr(prices, CostArrays.repeat(cp, len(labels)))
+    margin = brk["margin_pct"]
+    min_margin_price = np.where(
+        margin >= cp.min_margin_pct, prices,
+        prices / np.maximum(1e-9, margin) * cp.min_margin_pct)
+    break_even = round(req.base_price*(1+0),2)  # sade placeholder
+
+    if req.elasticity is None:
+        units = req.base_sales
+    else:
+        units = DemandModel(req.elasticity, req.seasonality).predict(req.base_sales, prices, req.competitor_price)
+
+    out = {
+        "labels": labels,
+        "net_profit": np.round(brk["net_profit"] * units, 2).tolist(),
+        "margin_pct": np.round(margin*100, 2).tolist(),
+        "guard": [{"break_even": break_even, "min_margin_price": mp}
+                  for mp in np.round(min_margin_price, 2).tolist()],
+    }
+    if req.elasticity is not None:
+        out["units"] = np.round(units, 2).tolist()
     return out
+
+class SurfaceSku(BaseModel):
+    sku_id: Optional[str] = None
+    base_price: float
+    competitor_price: float
+    base_sales: float = 12
+    costs: CurveCosts = CurveCosts()
+
+SURFACE_MAX_POINTS = 1_000_000   # N x E x P x C üst sınırı (yanıt ~3 liste x nokta sayısı)
+
+class SurfaceRequest(BaseModel):
+    skus: List[SurfaceSku] = Field(..., min_length=1, max_length=1_000)
+    pct_min: int = Field(-20, ge=-100, le=1_000)   # kendi fiyat ekseni (% değişim)
+    pct_max: int = Field(20, ge=-100, le=1_000)
+    step: int = Field(1, ge=1, le=1_000)
+    comp_pct_min: int = Field(-20, ge=-100, le=1_000)   # rakip fiyat ekseni (% değişim)
+    comp_pct_max: int = Field(20, ge=-100, le=1_000)
+    comp_step: int = Field(1, ge=1, le=1_000)
+    elasticities: List[float] = Field(default_factory=lambda: [-1.2], min_length=1, max_length=64)
+    seasonality: float = 1.0
+    decimals: int = Field(2, ge=0, le=6)
+
+def simulate_surface_arr(base_price, competitor_price, base_sales, ca: CostArrays,
+                         own_pcts, comp_pcts, elasticities, seasonality: float = 1.0) -> Dict[str, np.ndarray]:
+    """
+    N SKU x E esneklik x P kendi fiyat x C rakip fiyat yüzeyi, tek broadcast geçişinde.
+    Dönüş dizileri: price (N, P), comp_price (N, C), margin_pct / unit_profit (N, P),
+    units / net_profit / revenue (N, E, P, C).
+    """
+    base_price = np.asarray(base_price, dtype=np.float64)
+    own = np.asarray(own_pcts, dtype=np.float64)
+    comp = np.asarray(comp_pcts, dtype=np.float64)
+    el = np.asarray(elasticities, dtype=np.float64)
+
+    prices = np.maximum(0.01, base_price[:, None] * (1 + own / 100))                            # (N, P)
+    comp_prices = np.maximum(0.01, np.asarray(competitor_price, dtype=np.float64)[:, None] * (1 + comp / 100))  # (N, C)
+    brk = breakdown_arr(prices, ca.take(np.arange(len(ca))[:, None]))                          # maliyetler (N, 1)
+
+    units = predict_sales_arr(
+        np.asarray(base_sales, dtype=np.float64)[:, None, None, None],
+        prices[:, None, :, None],
+        comp_prices[:, None, None, :],
+        el[None, :, None, None],
+        seasonality,
+    )                                                                                           # (N, E, P, C)
+    return {
+        "price": prices,
+        "comp_price": comp_prices,
+        "unit_profit": brk["net_profit"],
+        "margin_pct": brk["margin_pct"],
+        "units": units,
+        "net_profit": units * brk["net_profit"][:, None, :, None],
+        "revenue": units * prices[:, None, :, None],
+    }
+
+@router.post("/simulate-surface")
+def simulate_surface(req: SurfaceRequest):
+    """
+    Kendi fiyat x rakip fiyat x esneklik duyarlılık yüzeyi (çoklu SKU).
+    Talep predict_sales ile hesaplanır; toplam nokta sayısı SURFACE_MAX_POINTS
+    ile sınırlıdır (aşılırsa 422). Yanıt sütunsaldır: her metrik düz bir
+    liste, "shape" alanındaki boyut sırasıyla (C-order) yeniden şekillendirilir.
+    """
+    own = list(range(req.pct_min, req.pct_max + 1, req.step))
+    comp = list(range(req.comp_pct_min, req.comp_pct_max + 1, req.comp_step))
+    if not own or not comp:
+        raise HTTPException(status_code=422, detail="Boş fiyat ekseni")
+    points = len(req.skus) * len(req.elasticities) * len(own) * len(comp)
+    if points > SURFACE_MAX_POINTS:
+        raise HTTPException(status_code=422,
+                            detail=f"Yüzey çok büyük: {points} nokta (sınır {SURFACE_MAX_POINTS})")
+    ca = CostArrays.from_params(CostParams(**sku.costs.model_dump()) for sku in req.skus)
+    surf = simulate_surface_arr(
+        [s.base_price for s in req.skus], [s.competitor_price for s in req.skus],
+        [s.base_sales for s in req.skus], ca, own, comp, req.elasticities, req.seasonality,
+    )
+    d = req.decimals
+    flat = lambda a, scale=1.0: np.round(a * scale, d).ravel().tolist()
+    n, e, p, c = surf["units"].shape
+    # büyük yüzeylerde jsonable_encoder'ın eleman eleman dolaşmasını atla
+    return JSONResponse({
+        "sku_ids": [s.sku_id for s in req.skus],
+        "axes": {"own_pct": own, "comp_pct": comp, "elasticity": list(req.elasticities)},
+        "shape": {"sku_own": [n, p], "sku_comp": [n, c], "surface": [n, e, p, c]},
+        "price": flat(surf["price"]),
+        "comp_price": flat(surf["comp_price"]),
+        "unit_profit": flat(surf["unit_profit"]),
+        "margin_pct": flat(surf["margin_pct"], 100),
+        "units": flat(surf["units"]),
+        "net_profit": flat(surf["net_profit"]),
+        "revenue": flat(surf["revenue"]),
+    })
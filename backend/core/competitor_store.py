@@ -0,0 +1,238 @@
+# backend/core/competitor_store.py
+"""
+SKU başına rakip fiyat deposu (halka tampon) ve zaman pencereli özetler.
+
+Her SKU için son `capacity` gözlem (fiyat, zaman, rakip kodu) sabit boyutlu
+dizilerde tutulur:
+    price[s, j], ts[s, j], source[s, j]   j = yazma sırası mod capacity
+    head[s]                               toplam yazım sayısı (sonraki yuva = head mod capacity)
+    last_price[s], last_ts[s]             en son görülen fiyat (zamana göre)
+Toplu eklemede her gözlem tek yuva yazımıdır (O(1)); satır başına Python
+nesnesi yoktur. Pencere özetleri (min, medyan, kırpılmış ortalama, adet,
+rakip sayısı) sorguda, istenen SKU'lar için vektörel hesaplanır (SKU başına
+capacity elemanlı bir sıralama; geçmişin uzunluğundan bağımsız).
+
+Son-N sınırı: pencere yalnızca halkada kalan son `capacity` gözlemi kapsar.
+Pencere süresi içinde capacity'den fazla gözlem geldiyse eskileri özetlere
+girmez; bu durum özetlerde `truncated` ile bildirilir (last / last_ts
+etkilenmez).
+
+Depo sütunsal .npz olarak saklanır (pickle yok).
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_CAPACITY = 64
+DEFAULT_WINDOW = 7 * 24 * 3600.0   # saniye
+DEFAULT_TRIM = 0.1                 # kırpılmış ortalama: her uçtan %10
+STATS = ("min", "median", "trimmed_mean", "last")
+FORMAT_VERSION = 1
+
+class CompetitorPriceStore:
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        if capacity < 1:
+            raise ValueError("capacity en az 1 olmalı")
+        self.capacity = int(capacity)
+        self.sku_ids = np.zeros(0, dtype="<U1")
+        self.sources = np.zeros(0, dtype="<U1")   # rakip kodu -> ad
+        self.price = np.zeros((0, self.capacity))
+        self.ts = np.zeros((0, self.capacity))
+        self.source = np.zeros((0, self.capacity), dtype=np.int32)
+        self.head = np.zeros(0, dtype=np.int64)
+        self.last_price = np.zeros(0)
+        self.last_ts = np.zeros(0)
+        self._index: Dict[str, int] = {}
+        self._source_index: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.version = 0          # her başarılı ingest'te artar
+        self.saved_version = 0    # diske son yazılan sürüm
+
+    @property
+    def dirty(self) -> bool:
+        """Son kayıttan beri yazılmamış gözlem var mı."""
+        return self.version != self.saved_version
+
+    def __len__(self) -> int:
+        return len(self.sku_ids)
+
+    def __contains__(self, sku_id: str) -> bool:
+        return sku_id in self._index
+
+    # ---- yazma ----
+    def _rows(self, sku_ids: Sequence[str]) -> np.ndarray:
+        """SKU -> satır; yeni SKU'lar için diziler büyütülür."""
+        new = list(dict.fromkeys(s for s in sku_ids if s not in self._index))
+        if new:
+            m, C = len(new), self.capacity
+            self.sku_ids = np.concatenate([self.sku_ids, np.array(new)])
+            self.price = np.vstack([self.price, np.full((m, C), np.nan)])
+            self.ts = np.vstack([self.ts, np.full((m, C), -np.inf)])
+            self.source = np.vstack([self.source, np.full((m, C), -1, dtype=np.int32)])
+            self.head = np.concatenate([self.head, np.zeros(m, dtype=np.int64)])
+            self.last_price = np.concatenate([self.last_price, np.full(m, np.nan)])
+            self.last_ts = np.concatenate([self.last_ts, np.full(m, -np.inf)])
+            for s in new:
+                self._index[s] = len(self._index)
+        return np.fromiter((self._index[s] for s in sku_ids), dtype=np.int64, count=len(sku_ids))
+
+    def _source_codes(self, sources: Optional[Sequence[Optional[str]]], n: int) -> np.ndarray:
+        if sources is None:
+            return np.full(n, -1, dtype=np.int32)
+        new = list(dict.fromkeys(s for s in sources if s is not None and s not in self._source_index))
+        if new:
+            self.sources = np.concatenate([self.sources, np.array(new)])
+            for s in new:
+                self._source_index[s] = len(self._source_index)
+        return np.fromiter((-1 if s is None else self._source_index[s] for s in sources),
+                           dtype=np.int32, count=n)
+
+    def ingest(self, sku_ids: Sequence[str], prices, ts=None,
+               sources: Optional[Sequence[Optional[str]]] = None) -> Dict[str, int]:
+        """
+        Toplu gözlem ekleme. ts (epoch saniye) verilmezse şimdiki zaman.
+        Geçersiz fiyatlar (<= 0, NaN) atlanır. Aynı SKU için bir partide
+        capacity'den fazla gözlem gelirse yalnızca son capacity kadarı yazılır.
+        """
+        prices = np.asarray(prices, dtype=np.float64).reshape(-1)
+        n = len(prices)
+        ts = np.full(n, time.time()) if ts is None else \
+            np.broadcast_to(np.asarray(ts, dtype=np.float64), (n,)).copy()
+        ok = np.isfinite(prices) & (prices > 0) & np.isfinite(ts)
+        with self._lock:
+            rows = self._rows([str(s) for s, k in zip(sku_ids, ok) if k])
+            src = self._source_codes(None if sources is None else [s for s, k in zip(sources, ok) if k],
+                                     len(rows))
+            p, t = prices[ok], ts[ok]
+            if len(rows):
+                # SKU'ya, sonra zamana göre sırala; grup içi sıra -> halka yuvası
+                order = np.lexsort((t, rows))
+                rows, p, t, src = rows[order], p[order], t[order], src[order]
+                starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+                counts = np.diff(np.r_[starts, len(rows)])
+                rank = np.arange(len(rows)) - np.repeat(starts, counts)
+                keep = rank >= np.repeat(counts, counts) - self.capacity   # tekrar eden yuva yok
+                slot = (self.head[rows] + rank) % self.capacity
+                self.price[rows[keep], slot[keep]] = p[keep]
+                self.ts[rows[keep], slot[keep]] = t[keep]
+                self.source[rows[keep], slot[keep]] = src[keep]
+                grp = rows[starts]
+                self.head[grp] += counts
+                last = starts + counts - 1   # grubun en yeni gözlemi
+                newer = t[last] >= self.last_ts[grp]
+                self.last_price[grp[newer]] = p[last][newer]
+                self.last_ts[grp[newer]] = t[last][newer]
+                self.version += 1
+        return {"accepted": int(ok.sum()), "rejected": int(n - ok.sum()), "skus": len(self)}
+
+    # ---- okuma ----
+    def rows_for(self, sku_ids: Sequence[Optional[str]]) -> np.ndarray:
+        """SKU id -> satır indeksi (-1: depoda yok)."""
+        return np.array([self._index.get(s, -1) if isinstance(s, str) else -1 for s in sku_ids], dtype=np.int64)
+
+    def aggregate(self, sku_ids: Sequence[Optional[str]], window: float = DEFAULT_WINDOW,
+                  now: Optional[float] = None, trim: float = DEFAULT_TRIM) -> Dict[str, np.ndarray]:
+        """
+        SKU listesi için pencere [now - window, now] özetleri (k,) diziler:
+        count, n_sources, min, median, trimmed_mean; last / last_ts pencereden
+        bağımsız en son gözlemdir. Pencerede gözlem yoksa özetler NaN.
+        truncated: halkadan düşen (capacity'yi aşan) gözlemler pencereye
+        girebilirdi; özetler yalnızca son capacity gözlemi kapsar.
+        """
+        now = time.time() if now is None else float(now)
+        rows = self.rows_for(sku_ids)
+        known = rows >= 0
+        k, C = len(rows), self.capacity
+        with self._lock:
+            if len(self):
+                safe = np.where(known, rows, 0)
+                price, ts, src = self.price[safe], self.ts[safe], self.source[safe]
+                last, last_ts = self.last_price[safe], self.last_ts[safe]
+                wrapped = known & (self.head[safe] > C)
+            else:
+                price, ts = np.full((k, C), np.nan), np.full((k, C), -np.inf)
+                src = np.full((k, C), -1, dtype=np.int32)
+                last, last_ts = np.full(k, np.nan), np.full(k, -np.inf)
+                wrapped = np.zeros(k, dtype=bool)
+        mask = known[:, None] & (ts >= now - window) & (ts <= now) & np.isfinite(price)
+        vals = np.where(mask, price, np.nan)
+        count = mask.sum(axis=1)
+        srt = np.sort(vals, axis=1)   # NaN'lar sona
+        has = count > 0
+        # medyan: sıralı satırda (count-1)/2 ve count/2 elemanlarının ortalaması
+        lo = np.take_along_axis(srt, ((np.maximum(count, 1) - 1) // 2)[:, None], axis=1)[:, 0]
+        hi = np.take_along_axis(srt, (np.maximum(count, 1) // 2)[:, None], axis=1)[:, 0]
+        # kırpılmış ortalama: her uçtan floor(count * trim) eleman atlanır (kümülatif toplamla)
+        g = np.floor(count * trim).astype(np.int64)
+        csum = np.concatenate([np.zeros((k, 1)), np.cumsum(np.nan_to_num(srt), axis=1)], axis=1)
+        upper = np.take_along_axis(csum, (count - g)[:, None], axis=1)[:, 0]
+        lower = np.take_along_axis(csum, g[:, None], axis=1)[:, 0]
+        # rakip sayısı: penceredeki farklı kodlar (kodsuz gözlemler sayılmaz)
+        codes = np.sort(np.where(mask, src, -1), axis=1)
+        n_sources = ((codes[:, 1:] != codes[:, :-1]) & (codes[:, 1:] >= 0)).sum(axis=1) + (codes[:, 0] >= 0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return {
+                "known": known,
+                "count": count,
+                "n_sources": n_sources,
+                "min": np.where(has, srt[:, 0], np.nan),
+                "median": np.where(has, (lo + hi) / 2, np.nan),
+                "trimmed_mean": np.where(has, (upper - lower) / np.maximum(count - 2 * g, 1), np.nan),
+                "last": np.where(known, last, np.nan),
+                "last_ts": np.where(known & np.isfinite(last_ts), last_ts, np.nan),
+                # halka dolup üzerine yazıldı ve en eski kalan gözlem hâlâ pencere içinde
+                "truncated": wrapped & (ts.min(axis=1) >= now - window),
+            }
+
+    def competitor_price(self, sku_ids: Sequence[Optional[str]], stat: str = "median",
+                         window: float = DEFAULT_WINDOW, now: Optional[float] = None) -> np.ndarray:
+        """Öneri yolunun kullandığı tek rakip fiyatı (SKU başına); veri yoksa NaN."""
+        if stat not in STATS:
+            raise ValueError(f"Bilinmeyen özet: {stat} ({', '.join(STATS)})")
+        return self.aggregate(sku_ids, window=window, now=now)[stat]
+
+    def describe(self, sku_id: str, window: float = DEFAULT_WINDOW, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        if sku_id not in self._index:
+            return None
+        a = self.aggregate([sku_id], window=window, now=now)
+        out = {"sku_id": sku_id, "window_seconds": window, "max_observations": self.capacity,
+               "truncated": bool(a["truncated"][0])}
+        for key in ("count", "n_sources"):
+            out[key] = int(a[key][0])
+        for key in ("min", "median", "trimmed_mean", "last", "last_ts"):
+            v = float(a[key][0])
+            out[key] = None if np.isnan(v) else v
+        return out
+
+    # ---- kalıcılık ----
+    def save(self, path: str):
+        """
+        Atomik yazım: benzersiz geçici dosya + os.replace, ikisi de kilit altında
+        (aynı süreçteki eşzamanlı kayıtlar birbirinin dosyasını ezmez).
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        head, tail = os.path.split(path)
+        tmp = os.path.join(head, f".{tail}.tmp-{os.getpid()}-{uuid.uuid4().hex}.npz")
+        meta = {"format": FORMAT_VERSION, "capacity": self.capacity}
+        with self._lock:
+            np.savez(tmp, sku_ids=self.sku_ids, sources=self.sources, price=self.price, ts=self.ts,
+                     source=self.source, head=self.head, last_price=self.last_price, last_ts=self.last_ts,
+                     meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8))
+            os.replace(tmp, path)
+            self.saved_version = self.version
+
+    @classmethod
+    def load(cls, path: str) -> "CompetitorPriceStore":
+        with np.load(path, allow_pickle=False) as z:
+            meta = json.loads(z["meta"].tobytes().decode("utf-8"))
+            st = cls(meta["capacity"])
+            for name in ("sku_ids", "sources", "price", "ts", "source", "head", "last_price", "last_ts"):
+                setattr(st, name, z[name])
+        st._index = {s: i for i, s in enumerate(st.sku_ids.tolist())}
+        st._source_index = {s: i for i, s in enumerate(st.sources.tolist())}
+        return st
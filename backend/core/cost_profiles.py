@@ -0,0 +1,168 @@
+# backend/core/cost_profiles.py
+"""
+Adlandırılmış maliyet profili kaydı.
+
+İstekler sekiz alanlı maliyet bloğu yerine yalnızca cost_profile_id
+gönderebilir. Kayıt bellekte tutulur ve her profil için CostParams ile
+türetilmiş guard değerleri (GuardValues) kayıt anında önceden hesaplanır;
+istek yolunda profil çözümü tek bir dict aramasıdır.
+
+path verilirse kayıt JSON dosyasına atomik olarak yazılır ve açılışta
+oradan yüklenir. Birden fazla uvicorn işçisi aynı dosyayı paylaşır: okumalar
+en fazla poll_interval saniyede bir dosyanın kimliğine (mtime, inode, boyut;
+tek os.stat) bakar ve değiştiyse kaydı yeniden yükler (SnapshotWatcher gibi).
+Yazımlar süreçler arası dosya kilidi altında önce diskteki son hali okur, sonra
+yazar; başka işçinin eklediği profil ezilmez.
+"""
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, fields
+from typing import Any, Dict, List, Mapping, Optional
+
+from backend.core.rules_guard import CostParams, GuardValues
+
+try:
+    import fcntl
+except ImportError:  # Windows: süreçler arası kilit yok
+    fcntl = None
+
+_FIELDS = tuple(f.name for f in fields(CostParams))
+_ID_RE = re.compile(r"^[A-Za-z0-9_.:-]{1,64}$")
+
+class CostProfileRegistry:
+    def __init__(self, path: Optional[str] = None, poll_interval: float = 2.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._profiles: Dict[str, GuardValues] = {}
+        self._meta: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self._stamp = None   # yüklenen dosyanın (mtime_ns, inode, boyut)
+        if path:
+            self._reload(force=True)
+
+    # ---- okuma ----
+    def get(self, profile_id: str) -> Optional[GuardValues]:
+        self._reload()
+        return self._profiles.get(profile_id)
+
+    def __contains__(self, profile_id: str) -> bool:
+        self._reload()
+        return profile_id in self._profiles
+
+    def __len__(self) -> int:
+        self._reload()
+        return len(self._profiles)
+
+    def describe(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        self._reload()
+        gv = self._profiles.get(profile_id)
+        if gv is None:
+            return None
+        return {
+            "id": profile_id,
+            "costs": asdict(gv.cp),
+            "derived": {
+                "percentage_fees_total_pct": gv.pct_total,
+                "fixed_fees_total": gv.fixed_total,
+                "break_even": gv.break_even,
+                "min_margin_price": gv.min_margin_price,
+            },
+            **self._meta.get(profile_id, {}),
+        }
+
+    def list(self) -> List[Dict[str, Any]]:
+        self._reload()
+        return [self.describe(pid) for pid in sorted(self._profiles)]
+
+    # ---- yazma ----
+    def put(self, profile_id: str, costs: Mapping[str, Any], description: Optional[str] = None) -> bool:
+        """Profili ekler veya değiştirir; yeni eklendiyse True. Geçersiz id -> ValueError."""
+        if not _ID_RE.match(profile_id or ""):
+            raise ValueError("Geçersiz profil id (harf, rakam, _ . : - ; en fazla 64 karakter)")
+        default = CostParams()
+        cp = CostParams(**{f: float(costs.get(f) if costs.get(f) is not None else getattr(default, f))
+                           for f in _FIELDS})
+        gv = GuardValues.compute(cp)
+        with self._lock, self._file_lock():
+            self._reload(force=True)   # başka işçinin son yazımı üzerine
+            created = profile_id not in self._profiles
+            meta = dict(self._meta.get(profile_id, {"created_at": time.time()}))
+            meta["updated_at"] = time.time()
+            if description is not None or created:
+                meta["description"] = description
+            self._profiles[profile_id] = gv
+            self._meta[profile_id] = meta
+            self._save()
+        return created
+
+    def delete(self, profile_id: str) -> bool:
+        with self._lock, self._file_lock():
+            self._reload(force=True)
+            if self._profiles.pop(profile_id, None) is None:
+                return False
+            self._meta.pop(profile_id, None)
+            self._save()
+        return True
+
+    # ---- kalıcılık ----
+    @contextmanager
+    def _file_lock(self):
+        """Süreçler arası yazım kilidi (<path>.lock); path yoksa no-op."""
+        if not self.path or fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.path}.lock", "w") as lf:
+            fcntl.flock(lf, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lf, fcntl.LOCK_UN)
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_ino, st.st_size
+
+    def _reload(self, force: bool = False):
+        """Dosya başka bir işçi tarafından değiştirildiyse kaydı yeniden yükler."""
+        if not self.path:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_check < self.poll_interval:
+            return
+        self._last_check = now
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+        self._load() if stamp is not None else self._replace({}, {})
+        self._stamp = stamp
+
+    def _replace(self, profiles: Dict[str, GuardValues], meta: Dict[str, Dict[str, Any]]):
+        # referans değişimi: okuyucular ya eski ya yeni kaydı görür
+        self._profiles, self._meta = profiles, meta
+
+    def _save(self):
+        if not self.path:
+            return
+        data = {pid: {"costs": asdict(gv.cp), **self._meta.get(pid, {})}
+                for pid, gv in self._profiles.items()}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self._stamp = self._file_stamp()   # kendi yazımımızı yeniden yükleme
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self._replace({pid: GuardValues.compute(CostParams(**entry["costs"])) for pid, entry in data.items()},
+                      {pid: {k: v for k, v in entry.items() if k != "costs"} for pid, entry in data.items()})
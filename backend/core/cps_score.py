@@ -1,5 +1,35 @@
+from typing import Optional
+
+import numpy as np
+
 def analyze_competitors(competitor_data):
     prices = [c["price"] for c in competitor_data if "price" in c]
     if not prices:
         return 0
     return sum(prices) / len(prices)
+
+# -------------------- Vektörel (toplu) --------------------
+def analyze_competitors_arr(sku_index, prices, n_skus: Optional[int] = None) -> np.ndarray:
+    """
+    analyze_competitors'ın toplu hali: uzun biçimli rakip gözlemleri
+    (sku_index[i], prices[i]) -> SKU başına ortalama (n_skus,). Geçersiz
+    fiyatlar (NaN, <= 0) sayılmaz; gözlemi olmayan SKU'lar NaN.
+    """
+    idx = np.asarray(sku_index, dtype=np.int64)
+    p = np.asarray(prices, dtype=np.float64)
+    ok = np.isfinite(p) & (p > 0) & (idx >= 0)
+    n = int(n_skus if n_skus is not None else (idx[ok].max() + 1 if ok.any() else 0))
+    total = np.bincount(idx[ok], weights=p[ok], minlength=n)
+    count = np.bincount(idx[ok], minlength=n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+def cps_score_arr(price, competitor_price) -> np.ndarray:
+    """
+    Rekabetçi fiyat skoru: rakip fiyatının kendi fiyatımıza oranı - 1.
+    > 0: rakipten ucuzuz, < 0: pahalıyız; rakip fiyatı yoksa NaN.
+    """
+    price = np.asarray(price, dtype=np.float64)
+    comp = np.asarray(competitor_price, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where((price > 0) & (comp > 0), comp / price - 1.0, np.nan)
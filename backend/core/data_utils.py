@@ -1,4 +1,112 @@
+from typing import IO, Dict, Iterator, Optional, Union
+
+import numpy as np
 import pandas as pd
 
+from backend.core.rl.qlearning_agent import STATE_FIELDS as STATE_COLUMNS
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet desteği opsiyonel
+    pq = None
+
+# varsa okunan, yoksa atlanan sütunlar (SKU başına esneklik; talep modeli deposu için SKU kimliği)
+OPTIONAL_COLUMNS = ("elasticity", "sku_id")
+TEXT_COLUMNS = ("sku_id",)   # metin olarak kalır (object dizi)
+
 def load_training_data(path: str):
     return pd.read_csv(path)
+
+# -------------------- Parçalı (chunked) okuma --------------------
+def detect_format(filename: Optional[str], content_type: Optional[str] = None) -> str:
+    """Dosya adı / içerik tipi -> "csv" | "parquet"."""
+    name = (filename or "").lower()
+    if name.endswith((".parquet", ".pq")) or "parquet" in (content_type or ""):
+        return "parquet"
+    return "csv"
+
+def iter_training_chunks(source: Union[str, IO], fmt: str = "csv",
+                         chunk_rows: int = 100_000) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Eğitim dosyasını parça parça okur; her parça STATE_COLUMNS (+ dosyada
+    varsa OPTIONAL_COLUMNS) -> float64 dizi (TEXT_COLUMNS: object dizi). Yalnızca bu sütunlar okunur;
+    state sütunu eksik satırlar atlanır (opsiyonel sütunda boş değer NaN kalır).
+    """
+    if fmt == "parquet":
+        if pq is None:
+            raise ImportError("Parquet okumak için pyarrow gerekli (pip install pyarrow)")
+        pf = pq.ParquetFile(source)
+        missing = [c for c in STATE_COLUMNS if c not in pf.schema_arrow.names]
+        if missing:
+            raise ValueError(f"Eksik sütunlar: {', '.join(missing)}")
+        wanted = list(STATE_COLUMNS) + [c for c in OPTIONAL_COLUMNS if c in pf.schema_arrow.names]
+        for batch in pf.iter_batches(batch_size=chunk_rows, columns=wanted):
+            yield _clean_chunk({c: batch.column(c).to_numpy(zero_copy_only=False) for c in wanted})
+        return
+
+    reader = pd.read_csv(source, usecols=lambda c: c in STATE_COLUMNS or c in OPTIONAL_COLUMNS,
+                         dtype={c: str for c in TEXT_COLUMNS}, chunksize=chunk_rows)
+    for df in reader:
+        missing = [c for c in STATE_COLUMNS if c not in df.columns]
+        if missing:
+            raise ValueError(f"Eksik sütunlar: {', '.join(missing)}")
+        yield _clean_chunk({c: df[c].to_numpy(object) if c in TEXT_COLUMNS
+                            else pd.to_numeric(df[c], errors="coerce").to_numpy(np.float64) for c in df.columns})
+
+def _clean_chunk(cols: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    cols = {c: np.asarray(v, dtype=object if c in TEXT_COLUMNS else np.float64) for c, v in cols.items()}
+    ok = np.logical_and.reduce([np.isfinite(cols[c]) for c in STATE_COLUMNS])
+    if ok.all():
+        return cols
+    return {c: v[ok] for c, v in cols.items()}
+
+def read_training_columns(source: Union[str, IO], fmt: Optional[str] = None, chunk_rows: int = 100_000,
+                          max_rows: Optional[int] = None, seed: Optional[int] = None) -> Dict[str, object]:
+    """
+    Dosyayı parça parça okuyup doğrudan sütun dizilerine yazar (satır başına
+    Python nesnesi oluşmaz; sku_id dışında). Bellek: satır başına sütun sayısı x float64.
+    max_rows verilirse rezervuar örnekleme ile en fazla max_rows satır tutulur;
+    bellek dosya boyutundan bağımsız olarak sınırlı kalır.
+    Dönüş: {"columns": {sütun: dizi}, "rows_read": int, "rows_used": int, "sampled": bool}
+    """
+    if fmt is None:
+        fmt = detect_format(source if isinstance(source, str) else getattr(source, "name", None))
+    rng = np.random.default_rng(seed)
+    cap = max_rows if max_rows else 1024
+    names = STATE_COLUMNS   # ilk parçada opsiyonel sütunlarla genişler
+    buf = None
+    n = 0        # tampondaki satır
+    seen = 0     # okunan geçerli satır
+    for chunk in iter_training_chunks(source, fmt, chunk_rows):
+        m = len(chunk["stock_level"])
+        if buf is None:
+            names = tuple(chunk)
+            buf = {c: np.empty(cap, dtype=object if c in TEXT_COLUMNS else np.float64) for c in names}
+        if max_rows is None:
+            if n + m > cap:   # amortize büyütme
+                cap = max(cap * 2, n + m)
+                buf = {c: np.resize(v, cap) for c, v in buf.items()}
+            for c in names:
+                buf[c][n:n + m] = chunk[c]
+            n += m
+        else:
+            # önce tamponu doldur, kalanlara rezervuar (Algoritma R) uygula
+            fill = min(m, max_rows - n)
+            for c in names:
+                buf[c][n:n + fill] = chunk[c][:fill]
+            n += fill
+            if fill < m:
+                t = seen + np.arange(fill, m)
+                j = rng.integers(0, t + 1)
+                keep = j < max_rows
+                for c in names:
+                    buf[c][j[keep]] = chunk[c][fill:][keep]   # tekrar eden hedefte sonuncu kazanır
+        seen += m
+    if buf is None:
+        buf = {c: np.empty(0, dtype=np.float64) for c in names}
+    return {
+        "columns": {c: buf[c][:n].copy() if n < len(buf[c]) else buf[c] for c in names},
+        "rows_read": seen,
+        "rows_used": n,
+        "sampled": seen > n,
+    }
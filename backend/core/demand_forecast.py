@@ -1,17 +1,8 @@
-# backend/core/rl/demand_simulator.py
-import math
+# backend/core/demand_forecast.py
+# Talep modeli tek yerde: backend/core/rl/demand_simulator.py (skaler + vektörel).
+# Satış geçmişinden uydurulan SKU modelleri: backend/core/forecasting.py.
+# Bu modül geri uyum için yeniden dışa aktarır.
+from backend.core.forecasting import ForecastStore, forecast_demand
+from backend.core.rl.demand_simulator import DemandModel, predict_sales, predict_sales_arr
 
-def predict_sales(base_sales: float,
-                  price: float,
-                  competitor_price: float,
-                  elasticity: float = -1.2,
-                  seasonality: float = 1.0) -> float:
-    """
-    Basit sabit esneklikli talep modeli.
-    rel = price / competitor_price; talep ~ rel ** elasticity
-    """
-    base_sales = base_sales if base_sales is not None else 10.0
-    competitor_price = max(0.01, competitor_price)
-    rel = price / competitor_price
-    demand = base_sales * (rel ** elasticity) * seasonality
-    return max(0.0, float(demand))
+__all__ = ["DemandModel", "ForecastStore", "forecast_demand", "predict_sales", "predict_sales_arr"]
@@ -0,0 +1,42 @@
+# backend/core/fetch_data.py
+"""
+Rakip fiyat beslemelerinin okunması (parçalı CSV).
+
+Beklenen sütunlar: sku_id, price; opsiyonel competitor (kaynak) ve zaman
+(ts: epoch saniye ya da timestamp: ISO 8601). Her parça sütun dizileri
+olarak döner; CompetitorPriceStore.ingest doğrudan tüketir.
+"""
+from typing import IO, Dict, Iterator, Union
+
+import numpy as np
+import pandas as pd
+
+FEED_COLUMNS = ("sku_id", "price")
+FEED_OPTIONAL = ("competitor", "ts", "timestamp")
+
+def iter_competitor_feed(source: Union[str, IO], chunk_rows: int = 100_000) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Parça başına {"sku_id": object, "price": float64, "ts": float64 | None,
+    "competitor": object | None}. Zaman yoksa ts None (ingest şimdiki zamanı kullanır).
+    """
+    reader = pd.read_csv(source, usecols=lambda c: c in FEED_COLUMNS or c in FEED_OPTIONAL,
+                         dtype={"sku_id": str, "competitor": str}, chunksize=chunk_rows)
+    for df in reader:
+        missing = [c for c in FEED_COLUMNS if c not in df.columns]
+        if missing:
+            raise ValueError(f"Eksik sütunlar: {', '.join(missing)}")
+        df = df[df["sku_id"].notna()]
+        if "ts" in df.columns:
+            ts = pd.to_numeric(df["ts"], errors="coerce").to_numpy(np.float64)
+        elif "timestamp" in df.columns:
+            stamp = pd.to_datetime(df["timestamp"], errors="coerce", utc=True)
+            ts = np.where(stamp.isna(), np.nan, stamp.astype("int64") / 1e9)
+        else:
+            ts = None
+        yield {
+            "sku_id": df["sku_id"].to_numpy(object),
+            "price": pd.to_numeric(df["price"], errors="coerce").to_numpy(np.float64),
+            "ts": ts,
+            "competitor": df["competitor"].where(df["competitor"].notna(), None).to_numpy(object)
+            if "competitor" in df.columns else None,
+        }
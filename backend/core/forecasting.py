@@ -0,0 +1,345 @@
+# backend/core/forecasting.py
+"""
+Satış geçmişinden SKU başına talep modeli (esneklik + mevsimsel taban).
+
+Model (SKU s, sezon haftası w = hafta mod W, x = log(fiyat / rakip fiyatı)):
+    log(1 + adet) = a[s] + d[s, w] + e[s] * x
+
+Tahmin için yeterli istatistikler (SKU x hafta) toplanır:
+    n[s, w], sx[s, w], sy[s, w]   hafta başına gözlem sayısı ve toplamlar
+    sxx[s], sxy[s]                SKU başına çapraz toplamlar
+İstatistikler toplanabilir olduğundan yeni haftalar geldiğinde yalnızca yeni
+satırlar eklenir ve tüm SKU'lar tek vektörel adımda yeniden çözülür
+(artımlı yenileme). Hafta etkileri d sıfıra (ridge), esneklik önsel
+esnekliğe doğru büzülür; az gözlemli SKU/haftalar varsayılanlara yakın kalır.
+
+Çözüm DemandModel'e şöyle eşlenir: elasticity = e, taban = exp(a) - 1,
+mevsimsellik[w] = exp(d[w]).
+
+Depo (ForecastStore) sütunsal .npz'dir (pickle yok): sku_ids, istatistikler,
+uydurulmuş parametreler ve JSON meta.
+"""
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import IO, Any, Dict, Iterable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from backend.core.rl.demand_simulator import DemandModel
+
+SEASON_LENGTH = 52
+PRIOR_ELASTICITY = -1.2
+PRIOR_STRENGTH = 0.05    # esneklik önseli: Σx² biriminde (±%10 fiyat farkıyla ~5 gözlem)
+WEEK_SHRINK = 1.0        # hafta etkisi ridge cezası (gözlem biriminde)
+FORMAT_VERSION = 1
+
+HISTORY_COLUMNS = ("sku_id", "price", "units")   # + week | date, opsiyonel competitor_price
+
+EPOCH_MONDAY = pd.Timestamp("1970-01-05")   # date sütunundan mutlak hafta indeksi için
+
+# -------------------- Satır -> yeterli istatistik --------------------
+def _weeks(df: pd.DataFrame, season_length: int):
+    """
+    (mutlak hafta, sezon indeksi). week sütunu olduğu gibi kullanılır; date
+    sütununda mutlak hafta 1970-01-05'ten (pazartesi) beri geçen hafta sayısı,
+    sezon indeksi ISO takvim haftasıdır. Mutlak hafta artımlı yenilemede
+    "daha önce görüldü mü" karşılaştırmasında kullanılır (okunamayan: NaN).
+    """
+    if "week" in df.columns:
+        week_abs = pd.to_numeric(df["week"], errors="coerce").to_numpy(np.float64)
+        week = np.nan_to_num(week_abs, nan=1).astype(np.int64)
+    elif "date" in df.columns:
+        date = pd.to_datetime(df["date"], errors="coerce")
+        week_abs = ((date - EPOCH_MONDAY).dt.days // 7).to_numpy(np.float64, na_value=np.nan)
+        week = date.dt.isocalendar().week.fillna(1).to_numpy(np.int64)
+    else:
+        raise ValueError("Satış geçmişinde 'week' veya 'date' sütunu gerekli")
+    return week_abs, (week - 1) % season_length
+
+def chunk_stats(df: pd.DataFrame, season_length: int = SEASON_LENGTH) -> Dict[str, Any]:
+    """
+    Bir veri parçasının SKU bazında yeterli istatistikleri.
+    Dönüş: {"sku_ids": (k,), "n"/"sx"/"sy": (k, W), "sxx"/"sxy": (k,), "last_week": (k,)}
+    competitor_price sütunu varsa rakip fiyatı eksik/geçersiz satırlar atlanır
+    (göreli fiyat regresyonuna mutlak fiyat karışmasın); sütun hiç yoksa tüm
+    parçada mutlak fiyat kullanılır. Haftası okunamayan satırlar da atlanır.
+    """
+    missing = [c for c in HISTORY_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Eksik sütunlar: {', '.join(missing)}")
+    price = pd.to_numeric(df["price"], errors="coerce").to_numpy(np.float64)
+    units = pd.to_numeric(df["units"], errors="coerce").to_numpy(np.float64)
+    comp = (pd.to_numeric(df["competitor_price"], errors="coerce").to_numpy(np.float64)
+            if "competitor_price" in df.columns else np.ones_like(price))
+    week_abs, w = _weeks(df, season_length)
+    ok = (np.isfinite(price) & (price > 0) & np.isfinite(units) & (units >= 0)
+          & np.isfinite(comp) & (comp > 0) & np.isfinite(week_abs))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = np.log(price) - np.log(comp)
+    y = np.log1p(units)
+    skus = df["sku_id"].astype(str).to_numpy()[ok]
+    x, y, w = x[ok], y[ok], w[ok]
+
+    sku_ids, inv = np.unique(skus, return_inverse=True)
+    k = len(sku_ids)
+    flat = inv * season_length + w
+    size = k * season_length
+    out = {
+        "sku_ids": sku_ids,
+        "n": np.bincount(flat, minlength=size).astype(np.float64).reshape(k, season_length),
+        "sx": np.bincount(flat, weights=x, minlength=size).reshape(k, season_length),
+        "sy": np.bincount(flat, weights=y, minlength=size).reshape(k, season_length),
+        "sxx": np.bincount(inv, weights=x * x, minlength=k),
+        "sxy": np.bincount(inv, weights=x * y, minlength=k),
+    }
+    last = np.full(k, -np.inf)
+    np.maximum.at(last, inv, week_abs[ok])
+    out["last_week"] = last
+    return out
+
+def _chunk_stats_task(args):
+    df, season_length = args
+    return chunk_stats(df, season_length)
+
+# -------------------- Çözüm (tüm SKU'lar vektörel) --------------------
+def solve(n: np.ndarray, sx: np.ndarray, sy: np.ndarray, sxx: np.ndarray, sxy: np.ndarray,
+          prior_elasticity: float = PRIOR_ELASTICITY, prior_strength: float = PRIOR_STRENGTH,
+          week_shrink: float = WEEK_SHRINK) -> Dict[str, np.ndarray]:
+    """
+    Yeterli istatistiklerden (S, W) -> elasticity (S,), base (S,), seasonality (S, W), n_obs (S,).
+
+    Amaç (SKU başına):  Σ (y - a - d[w] - e x)² + λ Σ d[w]² + k (e - e0)²
+    d[w] kapalı biçimde profillenince (a, e) için 2x2 doğrusal sistem kalır;
+    tüm SKU'lar için aynı anda (Cramer) çözülür.
+    """
+    lam, k = week_shrink, prior_strength
+    c = 1.0 / (n + lam)                      # hafta başına büzülme
+    n_tot = n.sum(axis=1)
+    a11 = n_tot - (c * n * n).sum(axis=1)   # = Σ n λ / (n + λ) >= 0
+    a12 = sx.sum(axis=1) - (c * n * sx).sum(axis=1)
+    a22 = sxx - (c * sx * sx).sum(axis=1) + k
+    r1 = sy.sum(axis=1) - (c * n * sy).sum(axis=1)
+    r2 = sxy - (c * sx * sy).sum(axis=1) + k * prior_elasticity
+    det = a11 * a22 - a12 * a12
+    has = det > 1e-12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a = np.where(has, (r1 * a22 - a12 * r2) / det, 0.0)
+        e = np.where(has, (a11 * r2 - a12 * r1) / det, prior_elasticity)
+    d = c * (sy - a[:, None] * n - e[:, None] * sx)   # büzülmüş hafta etkileri
+    return {
+        "elasticity": e,
+        "base": np.expm1(a),
+        "seasonality": np.exp(d),
+        "n_obs": n_tot,
+    }
+
+# -------------------- Depo --------------------
+class ForecastStore:
+    """SKU -> talep parametreleri; sütunsal, artımlı güncellenir."""
+    def __init__(self, season_length: int = SEASON_LENGTH, prior_elasticity: float = PRIOR_ELASTICITY,
+                 prior_strength: float = PRIOR_STRENGTH, week_shrink: float = WEEK_SHRINK):
+        self.season_length = int(season_length)
+        self.prior_elasticity = float(prior_elasticity)
+        self.prior_strength = float(prior_strength)
+        self.week_shrink = float(week_shrink)
+        W = self.season_length
+        self.sku_ids = np.zeros(0, dtype="<U1")
+        self.n = np.zeros((0, W))
+        self.sx = np.zeros((0, W))
+        self.sy = np.zeros((0, W))
+        self.sxx = np.zeros(0)
+        self.sxy = np.zeros(0)
+        self.last_week = np.zeros(0)
+        self.params: Dict[str, np.ndarray] = solve(self.n, self.sx, self.sy, self.sxx, self.sxy)
+        self._index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.sku_ids)
+
+    def __contains__(self, sku_id: str) -> bool:
+        return sku_id in self._index
+
+    # ---- güncelleme ----
+    def update(self, stats: Dict[str, Any]):
+        """chunk_stats çıktısını ekler (yeni SKU'lar büyütülür) ve tüm parametreleri yeniden çözer."""
+        self._merge(stats)
+        self._solve()
+
+    def _merge(self, stats: Dict[str, Any]):
+        new = [s for s in stats["sku_ids"].tolist() if s not in self._index]
+        if new:
+            W, m = self.season_length, len(new)
+            self.sku_ids = np.concatenate([self.sku_ids, np.array(new)])
+            self.n, self.sx, self.sy = (np.vstack([a, np.zeros((m, W))]) for a in (self.n, self.sx, self.sy))
+            self.sxx, self.sxy = (np.concatenate([a, np.zeros(m)]) for a in (self.sxx, self.sxy))
+            self.last_week = np.concatenate([self.last_week, np.full(m, -np.inf)])
+            self._index = {s: i for i, s in enumerate(self.sku_ids.tolist())}
+        rows = np.array([self._index[s] for s in stats["sku_ids"].tolist()], dtype=np.int64)
+        if not len(rows):
+            return
+        self.n[rows] += stats["n"]
+        self.sx[rows] += stats["sx"]
+        self.sy[rows] += stats["sy"]
+        self.sxx[rows] += stats["sxx"]
+        self.sxy[rows] += stats["sxy"]
+        self.last_week[rows] = np.maximum(self.last_week[rows], stats["last_week"])
+
+    def _solve(self):
+        self.params = solve(self.n, self.sx, self.sy, self.sxx, self.sxy,
+                            self.prior_elasticity, self.prior_strength, self.week_shrink)
+
+    def fit_frame(self, df: pd.DataFrame):
+        self.update(chunk_stats(df, self.season_length))
+
+    def fit_csv(self, source: Union[str, IO], chunk_rows: int = 200_000, workers: int = 1,
+                only_new: bool = False) -> Dict[str, Any]:
+        """
+        Satış geçmişi CSV'sini parça parça okuyup istatistiklere ekler.
+        workers > 1: parçaların istatistikleri süreç havuzunda paralel hesaplanır
+        (toplanabilir oldukları için sıradan bağımsız birleşir). Havuzda en fazla
+        2 x workers parça bekler; bellek chunk_rows ile sınırlı kalır.
+        only_new: artımlı yenileme; SKU'nun depodaki son haftasına kadar olan
+        satırlar atlanır (aynı haftalar iki kez sayılmaz). 'week' ya da 'date'
+        sütunu gerekir; yüklemeler arasında aynı sütun kullanılmalıdır.
+        """
+        reader = pd.read_csv(source, chunksize=chunk_rows, dtype={"sku_id": str})
+        seen_until = dict(zip(self.sku_ids.tolist(), self.last_week.tolist())) if only_new else {}
+        counts = {"rows_read": 0, "rows_used": 0}
+
+        def chunks():
+            for df in reader:
+                counts["rows_read"] += len(df)
+                if seen_until:
+                    week_abs, _ = _weeks(df, self.season_length)
+                    last = df["sku_id"].astype(str).map(seen_until).fillna(-np.inf).to_numpy(np.float64)
+                    df = df[week_abs > last]
+                counts["rows_used"] += len(df)
+                yield df
+
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = set()
+                for df in chunks():
+                    if len(pending) >= 2 * workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for fut in done:
+                            self._merge(fut.result())
+                    pending.add(pool.submit(_chunk_stats_task, (df, self.season_length)))
+                for fut in pending:
+                    self._merge(fut.result())
+        else:
+            for df in chunks():
+                self._merge(chunk_stats(df, self.season_length))
+        self._solve()
+        return {**counts, "skus": len(self)}
+
+    def copy(self) -> "ForecastStore":
+        """Bağımsız kopya (servis edilen depo yerinde değiştirilmez; yenileme kopyada yapılıp takas edilir)."""
+        st = ForecastStore(self.season_length, self.prior_elasticity, self.prior_strength, self.week_shrink)
+        st.sku_ids = self.sku_ids.copy()
+        st.n, st.sx, st.sy = self.n.copy(), self.sx.copy(), self.sy.copy()
+        st.sxx, st.sxy, st.last_week = self.sxx.copy(), self.sxy.copy(), self.last_week.copy()
+        st.params = dict(self.params)
+        st._index = dict(self._index)
+        return st
+
+    # ---- okuma ----
+    def rows_for(self, sku_ids: Iterable[Optional[str]]) -> np.ndarray:
+        """SKU id -> satır indeksi (-1: depoda yok)."""
+        return np.array([self._index.get(s, -1) if isinstance(s, str) else -1 for s in sku_ids], dtype=np.int64)
+
+    def lookup(self, sku_ids: Sequence[Optional[str]]) -> Dict[str, np.ndarray]:
+        """
+        SKU listesi için parametreler; depoda olmayanlar önsel değerlerle
+        (esneklik = önsel, mevsimsellik = 1, taban = NaN) doldurulur.
+        """
+        rows = self.rows_for(sku_ids)
+        known = rows >= 0
+        safe = np.where(known, rows, 0)
+        W = self.season_length
+        p = self.params
+        if not len(self):
+            return {"known": known, "elasticity": np.full(len(rows), self.prior_elasticity),
+                    "base": np.full(len(rows), np.nan), "seasonality": np.ones((len(rows), W)),
+                    "n_obs": np.zeros(len(rows))}
+        return {
+            "known": known,
+            "elasticity": np.where(known, p["elasticity"][safe], self.prior_elasticity),
+            "base": np.where(known, p["base"][safe], np.nan),
+            "seasonality": np.where(known[:, None], p["seasonality"][safe], 1.0),
+            "n_obs": np.where(known, p["n_obs"][safe], 0.0),
+        }
+
+    def demand_model(self, sku_ids: Sequence[Optional[str]], start_week: int = 1) -> DemandModel:
+        """
+        SKU listesine hizalı (satır i = SKU i) DemandModel. Mevsimsellik
+        profili start_week'ten başlayacak şekilde döndürülür (ortamın t=0 adımı).
+        """
+        p = self.lookup(sku_ids)
+        season = np.roll(p["seasonality"], -((int(start_week) - 1) % self.season_length), axis=1)
+        return DemandModel(p["elasticity"], season)
+
+    def season_at(self, sku_ids: Sequence[Optional[str]], week) -> Dict[str, np.ndarray]:
+        """SKU başına esneklik ve verilen takvim haftasının mevsimsellik çarpanı."""
+        p = self.lookup(sku_ids)
+        n = len(p["known"])
+        w = np.broadcast_to((np.asarray(week, dtype=np.int64) - 1) % self.season_length, (n,))
+        return {"known": p["known"], "elasticity": p["elasticity"], "base": p["base"],
+                "seasonality": p["seasonality"][np.arange(n), w]}
+
+    def describe(self, sku_id: str) -> Optional[Dict[str, Any]]:
+        i = self._index.get(sku_id)
+        if i is None:
+            return None
+        p = self.params
+        return {
+            "sku_id": sku_id,
+            "elasticity": float(p["elasticity"][i]),
+            "base_sales": float(p["base"][i]),
+            "seasonality": np.round(p["seasonality"][i], 4).tolist(),
+            "n_obs": int(p["n_obs"][i]),
+            "last_week": None if not np.isfinite(self.last_week[i]) else float(self.last_week[i]),
+        }
+
+    # ---- kalıcılık ----
+    def meta(self) -> Dict[str, Any]:
+        return {"format": FORMAT_VERSION, "season_length": self.season_length,
+                "prior_elasticity": self.prior_elasticity, "prior_strength": self.prior_strength,
+                "week_shrink": self.week_shrink}
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp-{os.getpid()}.npz"
+        np.savez(tmp, sku_ids=self.sku_ids, n=self.n, sx=self.sx, sy=self.sy, sxx=self.sxx, sxy=self.sxy,
+                 last_week=self.last_week, elasticity=self.params["elasticity"], base=self.params["base"],
+                 seasonality=self.params["seasonality"],
+                 meta=np.frombuffer(json.dumps(self.meta()).encode("utf-8"), dtype=np.uint8))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ForecastStore":
+        with np.load(path, allow_pickle=False) as z:
+            meta = json.loads(z["meta"].tobytes().decode("utf-8"))
+            st = cls(meta["season_length"], meta["prior_elasticity"], meta["prior_strength"], meta["week_shrink"])
+            st.sku_ids = z["sku_ids"]
+            st.n, st.sx, st.sy = z["n"], z["sx"], z["sy"]
+            st.sxx, st.sxy, st.last_week = z["sxx"], z["sxy"], z["last_week"]
+            st.params = {"elasticity": z["elasticity"], "base": z["base"], "seasonality": z["seasonality"],
+                         "n_obs": st.n.sum(axis=1)}
+        st._index = {s: i for i, s in enumerate(st.sku_ids.tolist())}
+        return st
+
+def forecast_demand(store: ForecastStore, sku_ids: Sequence[str], price, competitor_price,
+                    week=1) -> np.ndarray:
+    """
+    Depodaki SKU modelleriyle talep tahmini (toplu). Depoda olmayan SKU'lar NaN döner.
+    week: takvim haftası (1..53 ya da sürekli indeks), sezon indeksi (week - 1) mod W.
+    """
+    p = store.season_at(sku_ids, week)
+    rel = np.maximum(0.01, np.asarray(price, dtype=np.float64)) / \
+        np.maximum(0.01, np.asarray(competitor_price, dtype=np.float64))
+    # log(1 + adet) = log(1 + taban) + log(mevsim) + e * log(rel)
+    units = np.expm1(np.log1p(p["base"]) + np.log(p["seasonality"]) + p["elasticity"] * np.log(rel))
+    return np.maximum(0.0, units)
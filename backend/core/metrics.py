@@ -0,0 +1,380 @@
+# backend/core/metrics.py
+"""
+Hafif süreç içi metrikler (Prometheus metin biçimi 0.0.4) ve örnekleyici profilleyici.
+
+    Counter    artan sayaç              (ör. pricing_guard_decisions_total)
+    Gauge      anlık değer; set_function ile kazıma (scrape) anında hesaplanır
+    Histogram  sabit kovalı dağılım     (ör. http_request_duration_seconds)
+
+Etiketli metrikler labels(...) ile çocuk döner; çocuklar önbelleklenir, bu
+yüzden sıcak yolda maliyet bir dict araması + kilitli toplama kadardır.
+Harici bağımlılık yoktur.
+
+Aşama süreleri StageTimer ile "tur" (lap) olarak ölçülür: her lap önceki
+lap'ten bu yana geçen süreyi ilgili aşamaya yazar. İstek kapsamındaki
+toplam el (handler) süresi ContextVar ile ara katmana (middleware) taşınır;
+ara katman toplam süreden farkı "framework" (doğrulama + serileştirme) aşaması olarak yazar.
+"""
+import math
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as _Tally
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# saniye; 100 µs .. 10 s
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TRAINING_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+def _fmt(v: float) -> str:
+    v = float(v)
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    if math.isnan(v):
+        return "NaN"
+    if v.is_integer() and abs(v) < 1e15:
+        return str(int(v))
+    return repr(v)
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+# -------------------- Metrik türleri --------------------
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], "_Metric"] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values, **kw) -> "_Metric":
+        if kw:
+            values = tuple(str(kw[n]) for n in self.labelnames)
+        else:
+            values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: etiketler {self.labelnames} bekleniyor")
+            with self._lock:
+                child = self._children.setdefault(values, self._child())
+        return child
+
+    def _child(self) -> "_Metric":
+        raise NotImplementedError
+
+    def _series(self) -> Iterable[Tuple[Tuple[str, ...], "_Metric"]]:
+        if self.labelnames:
+            return sorted(self._children.items())
+        return [((), self)]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, m in self._series():
+            lines.extend(m._samples(self.name, self.labelnames, values))
+        return lines
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.value = 0.0
+
+    def _child(self):
+        return Counter(self.name, self.help)
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def _samples(self, name, names, values):
+        return [f"{name}{_labels(names, values)} {_fmt(self.value)}"]
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.value = 0.0
+        self._fn: Optional[Callable[[], float]] = None
+
+    def _child(self):
+        return Gauge(self.name, self.help)
+
+    def set(self, value: float):
+        self.value = float(value)
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def set_function(self, fn: Callable[[], float]):
+        """Değer kazıma anında fn() ile okunur (sıcak yolda maliyet yok)."""
+        self._fn = fn
+
+    def get(self) -> float:
+        if self._fn is not None:
+            try:
+                return float(self._fn())
+            except Exception:
+                return math.nan
+        return self.value
+
+    def _samples(self, name, names, values):
+        return [f"{name}{_labels(names, values)} {_fmt(self.get())}"]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)   # son kova: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def _child(self):
+        return Histogram(self.name, self.help, buckets=self.buckets)
+
+    def observe(self, value: float):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self) -> "_HistTimer":
+        return _HistTimer(self)
+
+    def _samples(self, name, names, values):
+        out, cum = [], 0
+        for le, c in zip(self.buckets + (math.inf,), self.counts):
+            cum += c
+            le_label = 'le="' + _fmt(le) + '"'
+            out.append(f"{name}_bucket{_labels(names, values, le_label)} {cum}")
+        out.append(f"{name}_sum{_labels(names, values)} {_fmt(self.sum)}")
+        out.append(f"{name}_count{_labels(names, values)} {self.count}")
+        return out
+
+class _HistTimer:
+    __slots__ = ("h", "t0")
+
+    def __init__(self, h: Histogram):
+        self.h = h
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.h.observe(time.perf_counter() - self.t0)
+
+# -------------------- Kayıt --------------------
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metrik farklı tanımla zaten kayıtlı: {metric.name}")
+                return existing   # modül yeniden yüklenirse aynı metrik
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help, labelnames))
+
+def gauge(name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, help, labelnames))
+
+def histogram(name: str, help: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, labelnames, buckets))
+
+# -------------------- Ortak metrikler --------------------
+HTTP_REQUESTS = counter("http_requests_total", "HTTP istekleri", ("method", "path", "status"))
+HTTP_LATENCY = histogram("http_request_duration_seconds", "Uç nokta başına istek süresi", ("method", "path"))
+STAGE_LATENCY = histogram("pricing_stage_duration_seconds", "Uç nokta içi aşama süreleri", ("endpoint", "stage"))
+STATE_LOOKUPS = counter("pricing_state_lookups_total", "Politika aramaları (hit: tabloda var, unseen: görülmemiş state)",
+                        ("result",))
+GUARD_DECISIONS = counter("pricing_guard_decisions_total", "Margin Guard kararları", ("applied",))
+RETRAIN_LATENCY = histogram("retrain_duration_seconds", "Yeniden eğitim süresi", ("mode",), TRAINING_BUCKETS)
+RETRAIN_RUNS = counter("retrain_runs_total", "Yeniden eğitim çalıştırmaları", ("mode", "status"))
+
+_handler_time: ContextVar[Optional[List[float]]] = ContextVar("metrics_handler_time", default=None)
+
+class StageTimer:
+    """
+    Uç nokta içi aşama süreleri:
+        tm = StageTimer("recommend_price")
+        ...; tm.lap("decide")
+        ...; tm.lap("guard")
+    """
+    __slots__ = ("endpoint", "_t", "_acc")
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self._acc = _handler_time.get()
+        self._t = time.perf_counter()
+
+    def lap(self, stage: str) -> float:
+        now = time.perf_counter()
+        d = now - self._t
+        self._t = now
+        STAGE_LATENCY.labels(self.endpoint, stage).observe(d)
+        if self._acc is not None:
+            self._acc[0] += d
+        return d
+
+    def skip(self):
+        """Ölçülmeyecek işi (ör. ayrıca ölçülen alt çağrı) sonraki lap'ten düşer."""
+        self._t = time.perf_counter()
+
+def record_lookups(xai_codes, unseen_code: int):
+    """Politika açıklama kodlarından hit / unseen sayaçları (tekil kod veya dizi)."""
+    codes = np.asarray(xai_codes).reshape(-1)
+    unseen = int((codes == unseen_code).sum())
+    if unseen:
+        STATE_LOOKUPS.labels("unseen").inc(unseen)
+    if len(codes) - unseen:
+        STATE_LOOKUPS.labels("hit").inc(len(codes) - unseen)
+
+def record_guard(applied_count: int, total: int = 1):
+    if applied_count:
+        GUARD_DECISIONS.labels("true").inc(applied_count)
+    if total - applied_count:
+        GUARD_DECISIONS.labels("false").inc(total - applied_count)
+
+# -------------------- ASGI ara katmanı --------------------
+class MetricsMiddleware:
+    """
+    Saf ASGI ara katmanı (BaseHTTPMiddleware'in görev/kuyruk maliyeti yok).
+    Yol etiketi eşleşen route şablonudur (/agent/forecast/{sku_id}); eşleşmeyen
+    istekler "unmatched" olarak toplanır, böylece etiket kümesi sınırlı kalır.
+    """
+    def __init__(self, app, exclude: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.exclude = set(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self.exclude:
+            await self.app(scope, receive, send)
+            return
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        acc = [0.0]
+        token = _handler_time.set(acc)
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            total = time.perf_counter() - t0
+            _handler_time.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "GET")
+            HTTP_LATENCY.labels(method, path).observe(total)
+            HTTP_REQUESTS.labels(method, path, str(status["code"])).inc()
+            if acc[0] > 0:   # aşama ölçülen uç noktalar: kalan süre doğrulama + serileştirme
+                STAGE_LATENCY.labels(getattr(route, "name", path), "framework").observe(max(0.0, total - acc[0]))
+
+# -------------------- Örnekleyici profilleyici --------------------
+def profiler_enabled() -> bool:
+    return os.environ.get("PROFILER_ENABLED", "").lower() in ("1", "true", "yes")
+
+class SamplingProfiler:
+    """
+    sys._current_frames() ile diğer iş parçacıklarının yığınlarını belirli
+    aralıklarla örnekler; sonuç "katlanmış" (folded) yığınlardır
+    (flamegraph.pl / speedscope doğrudan okur). Yalnızca açıkça başlatılınca
+    çalışır; kapalıyken hiçbir maliyeti yoktur.
+    """
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = max(0.0005, float(interval))
+        self.max_depth = max_depth
+        self.stacks: _Tally = _Tally()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self, own: int):
+        for tid, frame in sys._current_frames().items():
+            if tid == own:
+                continue
+            parts = []
+            while frame is not None and len(parts) < self.max_depth:
+                code = frame.f_code
+                parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(parts))] += 1
+        self.samples += 1
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self._sample(own)
+
+    def start(self) -> "SamplingProfiler":
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def run_for(self, seconds: float) -> "SamplingProfiler":
+        self.start()
+        time.sleep(seconds)
+        return self.stop()
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {n}" for stack, n in self.stacks.most_common()) + "\n"
+
+    def top(self, n: int = 20) -> List[Tuple[str, int]]:
+        """En çok örneklenen yaprak fonksiyonlar (self time)."""
+        leaf: _Tally = _Tally()
+        for stack, c in self.stacks.items():
+            leaf[stack.rsplit(";", 1)[-1]] += c
+        return leaf.most_common(n)
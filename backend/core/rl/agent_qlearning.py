@@ -3,24 +3,29 @@ import numpy as np
 import pickle
 from collections import defaultdict
 
+from backend.core.rl.checkpoint import bins_from_keys, read_checkpoint, write_checkpoint
+from backend.core.rl.discretizer import Discretizer
+
+# bu ajanın eski ayrıklaştırması (stok/10, fiyat/1, rakip/1, satış/5); checkpoint meta'sına yazılır
+LEGACY_DISCRETIZER = Discretizer((10, 1, 1, 5))
+DISCRETIZATION = LEGACY_DISCRETIZER.to_meta()
+
 class QLearningAgent:
-    def __init__(self, action_space, learning_rate=0.1, discount_factor=0.95, epsilon=0.1):
+    def __init__(self, action_space, learning_rate=0.1, discount_factor=0.95, epsilon=0.1,
+                 discretizer: Discretizer = None):
         self.action_space = action_space
         self.lr = learning_rate
         self.gamma = discount_factor
         self.epsilon = epsilon
         self.q_table = defaultdict(lambda: np.zeros(action_space.n))
+        self.discretizer = discretizer or LEGACY_DISCRETIZER
 
     def get_state_key(self, state):
         """
-        State'i hashlenebilir bir tuple'a çevir (basit discretization ile)
+        State'i hashlenebilir bir tuple'a çevir (ortak Discretizer ile;
+        varsayılan: stok/10, fiyat/1, rakip/1, satış/5)
         """
-        return (
-            int(state["stock_level"] / 10),       # örn: 100 → 10
-            int(state["last_price"]),
-            int(state["competitor_price"]),
-            int(state["sales_last_week"] / 5)
-        )
+        return self.discretizer.bins(state)
 
     def choose_action(self, state):
         state_key = self.get_state_key(state)
@@ -40,10 +45,24 @@ class QLearningAgent:
         self.q_table[state_key][action] = new_q
 
     def save_q_table(self, filepath="data/q_table.pkl"):
+        if filepath.endswith(".npz"):   # güvenli sütunsal checkpoint
+            keys = list(self.q_table.keys())
+            q = np.array([self.q_table[k] for k in keys], dtype=np.float64).reshape(len(keys), -1)
+            write_checkpoint(filepath, bins_from_keys(keys), q, meta={
+                "alpha": self.lr, "gamma": self.gamma, "epsilon": self.epsilon,
+                "discretization": self.discretizer.to_meta(),
+            })
+            return
         with open(filepath, "wb") as f:
             pickle.dump(dict(self.q_table), f)
 
     def load_q_table(self, filepath="data/q_table.pkl"):
+        if filepath.endswith(".npz"):
+            bins, q, _, meta = read_checkpoint(filepath)
+            self.discretizer = Discretizer.from_meta(meta.get("discretization", DISCRETIZATION))
+            q_dict = {tuple(int(b) for b in row): qrow.copy() for row, qrow in zip(bins, q)}
+            self.q_table = defaultdict(lambda: np.zeros(self.action_space.n), q_dict)
+            return
         with open(filepath, "rb") as f:
             q_dict = pickle.load(f)
             self.q_table = defaultdict(lambda: np.zeros(self.action_space.n), q_dict)
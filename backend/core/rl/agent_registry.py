@@ -0,0 +1,185 @@
+# backend/core/rl/agent_registry.py
+"""
+SKU grubu başına Q tablosu kaydı.
+
+Dizin düzeni:
+    <root>/<group_id>/manifest.json + q_table-vNNNNNN.qtab + policy-vNNNNNN.pol
+    (her grup kendi SnapshotStore'udur; sürümleme/geri alma tek tablo ile aynı)
+
+Tablolar ilk istekte tembel (lazy) yüklenir ve boyut sınırlı bir LRU'da
+tutulur. Yeni tablo put() ile önce diske yazılır, sonra belleğe alınır;
+bu yüzden LRU'dan düşen (evict) bir ajan için diske taşıma (spill) zaten
+yapılmıştır ve tahliye yalnızca bellek referansını bırakır. Diskteki .qtab
+dosyaları mmap ile açıldığından yeniden yükleme tablo boyutundan bağımsızdır.
+
+Modeli olmayan gruplar (ıska) da izleyiciyle önbelleğe alınır: tekrar eden
+istekler manifest'i okumaz, en fazla poll_interval'da bir os.stat yapılır.
+Store ve ıska önbellekleri max_tracked ile sınırlı LRU'dur (istemciden gelen
+rastgele group_id'ler belleği büyütmez).
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.core.rl.discretizer import Discretizer
+from backend.core.rl.model_store import SnapshotStore, SnapshotWatcher
+from backend.core.rl.qlearning_agent import QLearningAgent
+from backend.core.rl.qtable import ArrayQTable
+
+_GROUP_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.:-]{0,63}$")   # dizin adı olarak güvenli
+
+def valid_group_id(group_id: str) -> bool:
+    return bool(_GROUP_RE.match(group_id or ""))
+
+def resident_bytes(agent: QLearningAgent) -> int:
+    """Ajanın süreç belleğindeki yaklaşık payı (mmap edilmiş tablo sayfaları hariç)."""
+    n = agent.policy.nbytes if agent.policy is not None else 0
+    if isinstance(agent.q_table, ArrayQTable):
+        n += agent.q_table.nbytes()
+    return n
+
+class _Entry:
+    __slots__ = ("agent", "watcher", "nbytes")
+
+    def __init__(self, agent: QLearningAgent, watcher: SnapshotWatcher):
+        self.agent = agent
+        self.watcher = watcher
+        self.nbytes = resident_bytes(agent)
+
+class AgentRegistry:
+    def __init__(self, root: str, make_agent: Callable[[], QLearningAgent],
+                 max_resident: int = 64, max_bytes: Optional[int] = None,
+                 poll_interval: float = 2.0, max_tracked: int = 1024):
+        self.root = root
+        self.make_agent = make_agent
+        self.max_resident = max(1, int(max_resident))
+        self.max_bytes = max_bytes
+        self.poll_interval = poll_interval
+        self._resident: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.max_tracked = max(1, int(max_tracked))
+        self._stores: "OrderedDict[str, SnapshotStore]" = OrderedDict()
+        self._misses: "OrderedDict[str, SnapshotWatcher]" = OrderedDict()   # modeli olmayan gruplar
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def store(self, group_id: str) -> SnapshotStore:
+        if not valid_group_id(group_id):
+            raise ValueError(f"Geçersiz group_id: {group_id!r}")
+        with self._lock:
+            st = self._stores.get(group_id)
+            if st is None:
+                st = self._stores[group_id] = SnapshotStore(os.path.join(self.root, group_id))
+                self._trim(self._stores)
+            else:
+                self._stores.move_to_end(group_id)
+            return st
+
+    def _trim(self, cache: OrderedDict):
+        while len(cache) > self.max_tracked:
+            cache.popitem(last=False)
+
+    # ---- okuma ----
+    def get(self, group_id: str) -> Optional[QLearningAgent]:
+        """
+        Grubun ajanı; bellekte yoksa diskten tembel yüklenir. Grubun kendi
+        modeli yoksa None (çağıran paylaşılan varsayılan ajana düşer).
+        Başka bir işçi yeni sürüm yayınladıysa (manifest değişimi) yeniden yüklenir.
+        """
+        with self._lock:
+            entry = self._resident.get(group_id)
+            if entry is not None:
+                self._resident.move_to_end(group_id)
+            miss = self._misses.get(group_id) if entry is None else None
+            if miss is not None:
+                self._misses.move_to_end(group_id)
+        if entry is not None:
+            version = entry.watcher.check()
+            if version is None:
+                self.hits += 1
+                return entry.agent
+            return self._load(group_id, version)
+
+        if miss is None:
+            miss = SnapshotWatcher(self.store(group_id), poll_interval=self.poll_interval)
+            version = miss.check(force=True)
+        else:
+            version = miss.check()   # manifest değişmediyse okunmaz
+        if version is None:
+            with self._lock:
+                self._misses[group_id] = miss
+                self._trim(self._misses)
+            return None
+        return self._load(group_id, version)
+
+    def _load(self, group_id: str, version: str) -> QLearningAgent:
+        store = self.store(group_id)
+        ag = self.make_agent()
+        ag.q_table = store.load_table(version, len(ag.action_space))
+        ag.discretizer = Discretizer.from_meta(store.meta(version).get("discretization"))
+        ag.version = version
+        ag.policy = store.load_policy(version) or ag.compile_policy()
+        self.loads += 1
+        self._admit(group_id, ag, store)
+        return ag
+
+    def _admit(self, group_id: str, ag: QLearningAgent, store: SnapshotStore):
+        watcher = SnapshotWatcher(store, poll_interval=self.poll_interval, current=ag.version)
+        watcher.check(force=True)   # mevcut mtime'ı kaydet
+        with self._lock:
+            self._misses.pop(group_id, None)
+            self._resident[group_id] = _Entry(ag, watcher)
+            self._resident.move_to_end(group_id)
+            self._evict()
+
+    def _evict(self):
+        # en az kullanılanlar düşer; en son eklenen her zaman kalır
+        while len(self._resident) > 1 and (
+                len(self._resident) > self.max_resident
+                or (self.max_bytes is not None and self.resident_bytes() > self.max_bytes)):
+            self._resident.popitem(last=False)
+            self.evictions += 1
+
+    # ---- yazma ----
+    def put(self, group_id: str, agent: QLearningAgent, meta: Optional[Dict[str, Any]] = None) -> str:
+        """Ajanın tablosunu grubun yeni sürümü olarak yayınlar ve belleğe alır; sürümü döner."""
+        store = self.store(group_id)
+        policy = agent.policy or agent.compile_policy()
+        meta = dict(meta or {}, discretization=agent.discretization)
+        agent.version = store.publish(agent.q_table, meta=meta, policy=policy)
+        policy.version = agent.version
+        self._admit(group_id, agent, store)
+        return agent.version
+
+    def activate(self, group_id: str, version: str) -> QLearningAgent:
+        """Grubun aktif sürümünü değiştirir (geri/ileri alma) ve yükler."""
+        self.store(group_id).activate(version)   # bilinmeyen sürüm -> KeyError
+        return self._load(group_id, version)
+
+    # ---- durum ----
+    def groups(self) -> List[str]:
+        """Diskte modeli olan gruplar."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(g for g in os.listdir(self.root)
+                      if valid_group_id(g) and os.path.exists(os.path.join(self.root, g, "manifest.json")))
+
+    def resident_bytes(self) -> int:
+        return sum(e.nbytes for e in self._resident.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            resident = {g: {"version": e.agent.version, "bytes": e.nbytes} for g, e in self._resident.items()}
+        return {
+            "resident": len(resident),
+            "max_resident": self.max_resident,
+            "resident_bytes": sum(r["bytes"] for r in resident.values()),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "groups": resident,
+        }
@@ -0,0 +1,209 @@
+# backend/core/rl/checkpoint.py
+"""
+Güvenli, sütunsal Q tablosu checkpoint formatı (pickle yok).
+
+    <path>                 taban: tam tablo (.npz)
+    <path>.seg000001.npz   artımlı parçalar: yalnızca son kayıttan beri değişen state'ler
+
+Her .npz dosyası şu dizileri içerir (np.load(allow_pickle=False) ile okunur):
+    bins    (n, 4) int64     state bin indeksleri (stok, fiyat, rakip, satış)
+    q       (n, A) float     Q değerleri
+    visits  (n, A) uint32    ziyaret sayıları
+    meta    uint8            JSON: hiperparametreler, ayrıklaştırma ayarı, sürüm
+
+Yükleme tabanı okur, ardından parçaları sırayla üzerine uygular.
+compact() hepsini tek tabana indirger. convert_pickle() eski q_table.pkl'ı çevirir.
+
+Aynı süreçte eşzamanlı yazıcılar olabilir (senkron /retrain + iş thread'i):
+kayıt/parça ekleme/sıkıştırma modül kilidi altında yapılır ve her yazım kendi
+benzersiz geçici dosyasını kullanır.
+"""
+import glob
+import json
+import os
+import pickle
+import sys
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.core.rl.discretizer import Discretizer
+from backend.core.rl.qtable import ArrayQTable, bins_in_range, decode_codes_arr, encode_bins_arr
+
+FORMAT_VERSION = 1
+# QLearningAgent'in varsayılan kaba ayrıklaştırması (eski checkpoint'lerde meta yoksa)
+DEFAULT_DISCRETIZATION = Discretizer.default().to_meta()
+# taban + parça dizisi (numaralandırma, silme) tek bir yazıcı tarafından değiştirilsin
+_LOCK = threading.RLock()
+
+def _segment_paths(path: str) -> List[str]:
+    return sorted(glob.glob(f"{glob.escape(path)}.seg*.npz"))
+
+def write_checkpoint(path: str, bins: np.ndarray, q: np.ndarray,
+                     visits: Optional[np.ndarray] = None, meta: Optional[Dict[str, Any]] = None):
+    """Ham sütunlardan tam (taban) checkpoint yazar; eski parçaları siler."""
+    q = np.asarray(q)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with _LOCK:
+        _write_npz(path, bins, q, np.zeros(q.shape, np.uint32) if visits is None else visits,
+                   dict({"format": FORMAT_VERSION}, **(meta or {})))
+        for seg in _segment_paths(path):
+            os.remove(seg)
+
+def _write_npz(path: str, bins: np.ndarray, q: np.ndarray, visits: np.ndarray, meta: Dict[str, Any]):
+    # gizli, benzersiz geçici ad: parça glob'una (<path>.seg*.npz) takılmaz
+    head, tail = os.path.split(path)
+    tmp = os.path.join(head, f".{tail}.tmp-{os.getpid()}-{uuid.uuid4().hex}.npz")
+    np.savez(tmp, bins=np.asarray(bins, dtype=np.int64), q=q, visits=visits.astype(np.uint32),
+             meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8))
+    os.replace(tmp, path)
+
+def _read_npz(path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+    with np.load(path, allow_pickle=False) as z:
+        meta = json.loads(z["meta"].tobytes().decode("utf-8"))
+        return z["bins"], z["q"], z["visits"], meta
+
+def _bins_from_codes(codes: np.ndarray) -> np.ndarray:
+    return decode_codes_arr(codes).reshape(-1, 4)
+
+def bins_from_keys(keys) -> np.ndarray:
+    """"3|18|19|2" string anahtarları veya int tuple anahtarları -> (n, 4) bin matrisi."""
+    rows = [tuple(int(p) for p in k.split("|")) if isinstance(k, str) else tuple(int(p) for p in k)
+            for k in keys]
+    return np.array(rows, dtype=np.int64).reshape(-1, 4)
+
+def agent_meta(agent) -> Dict[str, Any]:
+    return {
+        "format": FORMAT_VERSION,
+        "alpha": agent.alpha,
+        "gamma": agent.gamma,
+        "epsilon": agent.epsilon,
+        "action_space": list(agent.action_space),
+        "q_dtype": np.dtype(getattr(agent, "q_dtype", np.float64)).str,
+        "discretization": getattr(agent, "discretization", DEFAULT_DISCRETIZATION),
+        "version": getattr(agent, "version", None),
+    }
+
+def _table_columns(table) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    if isinstance(table, dict):   # eski dict backend
+        keys = list(table.keys())
+        q = np.array([table[k] for k in keys], dtype=np.float64)
+        q = q.reshape(len(keys), -1)
+        return bins_from_keys(keys), q, np.zeros(q.shape, dtype=np.uint32)
+    return _bins_from_codes(table.codes), np.asarray(table.values), np.asarray(table.visits)
+
+def save_checkpoint(agent, path: str, incremental: bool = True) -> Dict[str, Any]:
+    """
+    Ajanı checkpoint'e yazar. incremental=True ve taban mevcutsa yalnızca kirli
+    (son kayıttan beri değişen) state'ler yeni bir parça dosyasına yazılır.
+    Dönüş: {"mode": "full"|"incremental", "states": yazılan state sayısı, "path": ...}
+    """
+    table = agent.q_table
+    meta = agent_meta(agent)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with _LOCK:
+        return _save_locked(table, meta, path, incremental)
+
+def _save_locked(table, meta: Dict[str, Any], path: str, incremental: bool) -> Dict[str, Any]:
+    can_increment = isinstance(table, ArrayQTable) and incremental and os.path.exists(path)
+
+    if not can_increment:
+        bins, q, visits = _table_columns(table)
+        _write_npz(path, bins, q, visits, meta)
+        for seg in _segment_paths(path):
+            os.remove(seg)
+        if isinstance(table, ArrayQTable):
+            table.clear_dirty()
+        return {"mode": "full", "states": int(len(bins)), "path": path}
+
+    rows = table.dirty_rows()
+    segs = _segment_paths(path)
+    n = int(segs[-1].rsplit(".seg", 1)[1][:-4]) + 1 if segs else 1
+    seg_path = f"{path}.seg{n:06d}.npz"
+    _write_npz(seg_path, _bins_from_codes(table.codes[rows]), table.values[rows], table.visits[rows], meta)
+    table.clear_dirty()
+    return {"mode": "incremental", "states": int(len(rows)), "path": seg_path}
+
+def read_checkpoint(path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+    """Taban + parçalar -> (bins, q, visits, son meta). Sonraki parçalar öncekileri ezer."""
+    with _LOCK:   # okuma sırasında taban/parça kümesi değişmesin
+        bins, q, visits, meta = _read_npz(path)
+        parts = [(bins, q, visits)]
+        for seg in _segment_paths(path):
+            b, qq, v, meta = _read_npz(seg)
+            parts.append((b, qq, v))
+    if len(parts) == 1:
+        return bins, q, visits, meta
+    all_bins = np.concatenate([p[0].reshape(-1, 4) for p in parts])
+    all_q = np.concatenate([p[1] for p in parts])
+    all_v = np.concatenate([p[2] for p in parts])
+    # her state (bin satırı) için en son yazılan satır
+    _, first_in_rev = np.unique(all_bins[::-1], axis=0, return_index=True)
+    last = np.sort(len(all_bins) - 1 - first_in_rev)
+    return all_bins[last], all_q[last], all_v[last], meta
+
+def checkpoint_meta(path: str) -> Optional[Dict[str, Any]]:
+    """Son yazılan dosyanın (taban ya da son parça) meta bilgisi; checkpoint yoksa None."""
+    with _LOCK:
+        if not os.path.exists(path):
+            return None
+        segs = _segment_paths(path)
+        return _read_npz(segs[-1] if segs else path)[3]
+
+def load_checkpoint(agent, path: str):
+    """Checkpoint'i ajana yükler (hiperparametreler dahil)."""
+    bins, q, visits, meta = read_checkpoint(path)
+    agent.alpha = meta.get("alpha", agent.alpha)
+    agent.gamma = meta.get("gamma", agent.gamma)
+    agent.epsilon = meta.get("epsilon", agent.epsilon)
+    agent.version = meta.get("version")
+    if hasattr(agent, "discretizer"):
+        agent.discretizer = Discretizer.from_meta(meta.get("discretization"))
+    if getattr(agent, "q_backend", "array") == "array":
+        agent.q_table = ArrayQTable.from_arrays(encode_bins_arr(bins), q, visits,
+                                                dtype=getattr(agent, "q_dtype", None))
+    else:
+        agent.q_table = {"|".join(str(int(b)) for b in row): [float(v) for v in qrow]
+                         for row, qrow in zip(bins, q)}
+    return meta
+
+def compact(path: str):
+    """Taban + parçaları tek tabana yazar ve parçaları siler."""
+    with _LOCK:
+        bins, q, visits, meta = read_checkpoint(path)
+        _write_npz(path, bins, q, visits, meta)
+        for seg in _segment_paths(path):
+            os.remove(seg)
+
+def convert_pickle(pkl_path: str, out_path: str, meta: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Eski pickle Q tablosunu (Dict[str, List[float]] veya tuple anahtarlı dict)
+    checkpoint'e çevirir. Yalnızca güvenilir dosyalarda kullanın: pickle.load
+    güvenilmeyen veride kod çalıştırabilir. Aralık dışı binli anahtarlar
+    (kodlamada başka state'le çakışırdı) yazılmaz; sayısı meta'da lossy_keys.
+    Yazılan state sayısı döner.
+    """
+    with open(pkl_path, "rb") as f:
+        q_dict = dict(pickle.load(f))
+    keys = list(q_dict.keys())
+    q = np.array([list(q_dict[k]) for k in keys], dtype=np.float64).reshape(len(keys), -1)
+    bins = bins_from_keys(keys)
+    ok = np.array([bins_in_range(b) for b in bins.tolist()], dtype=bool)
+    base_meta = {"discretization": DEFAULT_DISCRETIZATION, "converted_from": os.path.basename(pkl_path),
+                 "lossy_keys": int((~ok).sum())}
+    base_meta.update(meta or {})
+    write_checkpoint(out_path, bins[ok], q[ok], meta=base_meta)
+    return int(ok.sum())
+
+if __name__ == "__main__":
+    # python -m backend.core.rl.checkpoint convert data/q_table.pkl data/q_table.npz
+    # python -m backend.core.rl.checkpoint compact data/q_table.npz
+    if len(sys.argv) == 4 and sys.argv[1] == "convert":
+        print(f"{convert_pickle(sys.argv[2], sys.argv[3])} state yazıldı -> {sys.argv[3]}")
+    elif len(sys.argv) == 3 and sys.argv[1] == "compact":
+        compact(sys.argv[2])
+    else:
+        print(__doc__)
+        sys.exit(2)
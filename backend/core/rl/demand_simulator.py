@@ -1,6 +1,8 @@
 # backend/core/rl/demand_simulator.py
 import math
 
+import numpy as np
+
 def predict_sales(base_sales: float,
                   price: float,
                   competitor_price: float,
@@ -21,3 +23,108 @@ def predict_sales(base_sales: float,
     rel = price / comp
     demand = base * (rel ** float(elasticity)) * float(seasonality)
     return max(0.0, float(demand))
+
+def predict_sales_arr(base_sales, price, competitor_price,
+                      elasticity=-1.2, seasonality=1.0) -> np.ndarray:
+    """
+    predict_sales'ın dizi karşılığı (NumPy broadcast). Skaler sürümle aynı
+    kırpmalar: fiyatlar en az 0.01, talep en az 0.
+    """
+    base = np.asarray(10.0 if base_sales is None else base_sales, dtype=np.float64)
+    price = np.maximum(0.01, np.asarray(price, dtype=np.float64))
+    comp = np.maximum(0.01, np.asarray(competitor_price, dtype=np.float64))
+    demand = base * ((price / comp) ** np.asarray(elasticity, dtype=np.float64)) \
+        * np.asarray(seasonality, dtype=np.float64)
+    return np.maximum(0.0, demand)
+
+# -------------------- Vektörel talep modeli --------------------
+class DemandModel:
+    """
+    SKU başına esneklik ve haftalık mevsimsellik profili ile dizi tabanlı
+    sabit esneklikli talep modeli (predict_sales ile aynı formül ve kırpmalar).
+
+    elasticity  : skaler veya (n_sku,) dizi
+    seasonality : skaler, (W,) haftalık profil (tüm SKU'lar) veya (n_sku, W)
+                  SKU başına profil; hafta indeksi W'ye göre döner (mod W)
+
+    Ortam (EnhancedPricingEnv), eğri/yüzey simülasyonları ve toplu öneri
+    yolu aynı modeli paylaşır.
+    """
+    def __init__(self, elasticity=-1.2, seasonality=1.0):
+        self.elasticity = np.asarray(elasticity, dtype=np.float64)
+        self.seasonality = np.asarray(seasonality, dtype=np.float64)
+        if self.elasticity.ndim > 1 or self.seasonality.ndim > 2:
+            raise ValueError("elasticity en fazla 1, seasonality en fazla 2 boyutlu olmalı")
+        if self.seasonality.ndim == 2 and self.elasticity.ndim == 1 \
+                and len(self.elasticity) != len(self.seasonality):
+            raise ValueError("SKU sayıları uyuşmuyor (elasticity / seasonality)")
+
+    @property
+    def n_weeks(self) -> int:
+        return self.seasonality.shape[-1] if self.seasonality.ndim else 1
+
+    @property
+    def per_sku(self) -> bool:
+        return self.elasticity.ndim == 1 or self.seasonality.ndim == 2
+
+    def take(self, idx) -> "DemandModel":
+        """SKU alt kümesi (paralel eğitim parçaları için)."""
+        el = self.elasticity[idx] if self.elasticity.ndim == 1 else self.elasticity
+        se = self.seasonality[idx] if self.seasonality.ndim == 2 else self.seasonality
+        return DemandModel(el, se)
+
+    def elasticity_for(self, sku=None) -> np.ndarray:
+        if self.elasticity.ndim == 0 or sku is None:
+            return self.elasticity
+        return self.elasticity[sku]
+
+    def season_for(self, week=0, sku=None) -> np.ndarray:
+        """Hafta (skaler/dizi) için mevsimsellik çarpanı."""
+        se = self.seasonality
+        if se.ndim == 0:
+            return se
+        w = np.asarray(week, dtype=np.int64) % se.shape[-1]
+        if se.ndim == 1:
+            return se[w]
+        return se[sku, w] if sku is not None else se[:, w]
+
+    def predict(self, base_sales, price, competitor_price, week=0, sku=None) -> np.ndarray:
+        """
+        Yayınlanabilir (broadcast) dizilerle talep. sku verilmezse SKU başına
+        diziler girdinin ilk eksenine hizalanır (satır i = SKU i).
+        """
+        nd = max(np.ndim(base_sales), np.ndim(price), np.ndim(competitor_price))
+        el = self.elasticity_for(sku)
+        se = self.season_for(week, sku)
+        if sku is None and nd > 1:
+            if self.elasticity.ndim == 1:
+                el = el.reshape((-1,) + (1,) * (nd - 1))
+            if self.seasonality.ndim == 2 and np.ndim(week) == 0:
+                se = se.reshape((-1,) + (1,) * (nd - 1))
+        return predict_sales_arr(base_sales, price, competitor_price, el, se)
+
+    def predict_horizon(self, base_sales, price, competitor_price, start_week: int = 0,
+                        horizon: int = None) -> np.ndarray:
+        """
+        (n_sku,) ya da (n_sku, H) fiyat/rakip dizileri -> (n_sku, H) talep matrisi.
+        Haftalar start_week'ten başlar; tüm ufuk tek çağrıda hesaplanır.
+        """
+        price = np.asarray(price, dtype=np.float64)
+        comp = np.asarray(competitor_price, dtype=np.float64)
+        if horizon is None:
+            horizon = max(price.shape[-1] if price.ndim == 2 else 1,
+                          comp.shape[-1] if comp.ndim == 2 else 1)
+        weeks = start_week + np.arange(horizon)
+        season = self.season_for(weeks)                     # (H,) ya da (n, H)
+        el = self.elasticity[:, None] if self.elasticity.ndim == 1 else self.elasticity
+        as2d = lambda a: a[:, None] if a.ndim == 1 else a
+        return predict_sales_arr(as2d(np.asarray(base_sales, dtype=np.float64)), as2d(price), as2d(comp),
+                                 el, season)
+
+    def predict_one(self, base_sales: float, price: float, competitor_price: float,
+                    week: int = 0, sku: int = None) -> float:
+        """Skaler yol (env.step): predict_sales ile aynı sonuç. SKU başına modelde sku gerekir."""
+        if self.per_sku and sku is None:
+            raise ValueError("SKU başına talep modelinde sku indeksi gerekli")
+        return predict_sales(base_sales, price, competitor_price,
+                             float(self.elasticity_for(sku)), float(self.season_for(week, sku)))
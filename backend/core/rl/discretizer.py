@@ -0,0 +1,155 @@
+# backend/core/rl/discretizer.py
+"""
+State ayrıklaştırıcı: özellik başına bin tanımı.
+
+Her özellik için iki tür bin vardır:
+    width  sabit genişlik: bin = floor(x / width)   (eski kaba şema; sınırsız)
+    edges  sıralı iç sınırlar: bin = searchsorted(edges, x, side="right")
+           -> 0 .. len(edges); uniform, log ölçekli veya eğitim verisinden
+              quantile ile uydurulmuş sınırlar bu türdendir
+
+Varsayılan (20, 5, 5, 5) genişlik şeması QLearningAgent'in eski
+get_state_bins sonucu ile birebir aynıdır. Ayrıklaştırıcı modelle birlikte
+saklanır (checkpoint / snapshot meta'sı: to_meta / from_meta).
+"""
+from bisect import bisect_right
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+FEATURES = ("stock_level", "last_price", "competitor_price", "sales_last_week")
+DEFAULT_WIDTHS = (20, 5, 5, 5)
+BIN_KINDS = ("width", "uniform", "log", "quantile")
+_MAX_BINS = 65535   # qtable kodu özellik başına 16 bit
+
+BinSpec = Union[Tuple[str, int], Mapping[str, Any]]
+
+class Discretizer:
+    def __init__(self, widths: Sequence[Optional[float]] = DEFAULT_WIDTHS,
+                 edges: Optional[Sequence[Optional[Sequence[float]]]] = None):
+        edges = list(edges) if edges is not None else [None] * len(FEATURES)
+        if len(widths) != len(FEATURES) or len(edges) != len(FEATURES):
+            raise ValueError(f"{len(FEATURES)} özellik için bin tanımı gerekli")
+        self.widths = []
+        self.edges = []
+        for w, e in zip(widths, edges):
+            if e is not None:
+                e = np.unique(np.asarray(e, dtype=np.float64))   # sıralı, tekrarsız
+                if len(e) >= _MAX_BINS:
+                    raise ValueError("Özellik başına en fazla 65534 sınır")
+                self.widths.append(None)
+                self.edges.append(e)
+            else:
+                if w is None or float(w) <= 0:
+                    raise ValueError("Genişlik pozitif olmalı")
+                self.widths.append(float(w))
+                self.edges.append(None)
+        self._edge_lists = [e.tolist() if e is not None else None for e in self.edges]
+
+    # ---- kurucular ----
+    @classmethod
+    def default(cls) -> "Discretizer":
+        return cls(DEFAULT_WIDTHS)
+
+    @classmethod
+    def fit(cls, columns: Mapping[str, Sequence[float]], spec: Mapping[str, BinSpec],
+            base: Optional["Discretizer"] = None) -> "Discretizer":
+        """
+        Özellik başına şema ile ayrıklaştırıcı kurar. spec örneği:
+            {"last_price": ("log", 24), "stock_level": ("quantile", 10),
+             "sales_last_week": {"kind": "uniform", "bins": 8, "min": 0, "max": 40},
+             "competitor_price": {"kind": "width", "width": 5}}
+        uniform/log sınırları verilmezse veriden (min/max) alınır; quantile her
+        zaman veriden uydurulur. spec'te olmayan özellikler base'ten (varsayılan şema) gelir.
+        """
+        base = base or cls.default()
+        widths, edges = list(base.widths), list(base.edges)
+        for name, s in spec.items():
+            i = FEATURES.index(name)
+            if not isinstance(s, Mapping):
+                s = {"kind": s[0], "bins": s[1]}
+            kind = s.get("kind", "width")
+            if kind == "width":
+                widths[i], edges[i] = float(s["width"]), None
+                continue
+            x = np.asarray(columns[name], dtype=np.float64) if name in columns else np.zeros(0)
+            x = x[np.isfinite(x)]
+            n_bins = int(s.get("bins", 10))
+            if n_bins < 2:
+                raise ValueError("bins en az 2 olmalı")
+            lo = float(s["min"]) if s.get("min") is not None else (float(x.min()) if len(x) else 0.0)
+            hi = float(s["max"]) if s.get("max") is not None else (float(x.max()) if len(x) else 1.0)
+            if kind == "uniform":
+                e = np.linspace(lo, hi, n_bins + 1)[1:-1]
+            elif kind == "log":
+                lo = max(lo, 1e-6)
+                e = np.geomspace(lo, max(hi, lo * (1 + 1e-9)), n_bins + 1)[1:-1]
+            elif kind == "quantile":
+                if not len(x):
+                    raise ValueError(f"quantile için veri yok: {name}")
+                e = np.quantile(x, np.linspace(0, 1, n_bins + 1)[1:-1])
+            else:
+                raise ValueError(f"Bilinmeyen bin türü: {kind}")
+            widths[i], edges[i] = None, e
+        return cls(widths, edges)
+
+    # ---- ayrıklaştırma ----
+    def bins(self, s: Mapping[str, Any]) -> Tuple[int, ...]:
+        """Tek state -> bin tuple (skaler yol; bins_arr ile aynı sonuç)."""
+        out = []
+        for name, w, e in zip(FEATURES, self.widths, self._edge_lists):
+            try:
+                x = float(s.get(name, 0))
+                if e is not None:
+                    out.append(bisect_right(e, x) if x == x else 0)
+                else:
+                    out.append(int(x // w))
+            except Exception:   # eksik/bozuk/sonsuz değer
+                out.append(0)
+        return tuple(out)
+
+    def bins_arr(self, *cols) -> np.ndarray:
+        """Sütunlar (FEATURES sırasıyla) -> (n, 4) int64 bin matrisi."""
+        out = []
+        for c, w, e in zip(cols, self.widths, self.edges):
+            c = np.asarray(c, dtype=np.float64)
+            if e is not None:
+                b = np.where(np.isnan(c), 0, np.searchsorted(e, c, side="right"))
+                out.append(b.astype(np.int64))
+            else:
+                b = np.floor_divide(c, w)
+                b = np.clip(np.where(np.isfinite(b), b, 0.0), -2**53, 2**53)   # skalerdeki except -> 0
+                out.append(b.astype(np.int64))
+        return np.stack(out, axis=1)
+
+    def n_bins(self) -> Tuple[Optional[int], ...]:
+        """Özellik başına bin sayısı (genişlik şemasında sınırsız: None)."""
+        return tuple(len(e) + 1 if e is not None else None for e in self.edges)
+
+    # ---- kalıcılık ----
+    def to_meta(self) -> Dict[str, Any]:
+        if all(e is None for e in self.edges):
+            # eski checkpoint'lerle aynı biçim
+            return {"scheme": "floor_width", "features": list(FEATURES),
+                    "widths": [int(w) if float(w).is_integer() else w for w in self.widths]}
+        return {"scheme": "per_feature", "features": list(FEATURES), "bins": [
+            {"edges": e.tolist()} if e is not None else {"width": w}
+            for w, e in zip(self.widths, self.edges)
+        ]}
+
+    @classmethod
+    def from_meta(cls, meta: Optional[Mapping[str, Any]]) -> "Discretizer":
+        if not meta:
+            return cls.default()
+        if list(meta.get("features", FEATURES)) != list(FEATURES):
+            raise ValueError("Desteklenmeyen özellik listesi")
+        if meta.get("scheme") == "floor_width":
+            return cls(meta["widths"])
+        specs = meta["bins"]
+        return cls([s.get("width") for s in specs], [s.get("edges") for s in specs])
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Discretizer) and self.to_meta() == other.to_meta()
+
+    def __repr__(self) -> str:
+        return f"Discretizer({self.to_meta()})"
@@ -0,0 +1,80 @@
+# backend/core/rl/early_stopping.py
+"""
+Eğitimi yakınsama ölçütleriyle erken durdurma.
+
+episodes artık üst sınırdır; her episode sonunda yapılandırılmış ölçütler
+sırayla denetlenir ve ilki sağlandığında eğitim durur:
+    q_delta      episode boyunca uygulanan en büyük |ΔQ| < q_delta
+                 (patience episode üst üste)
+    plateau      son plateau_window episode ödülünün aralığı (max - min)
+                 <= plateau_tol * max(1, |ortalama|)
+    time_budget  fit başlangıcından beri geçen süre >= time_budget saniye
+min_episodes dolmadan q_delta ve plateau denetlenmez (süre bütçesi her zaman).
+Hiçbir ölçüt sağlanmazsa neden "completed". on_episode iptali önceliklidir:
+aynı episode'da bir ölçüt de sağlansa neden "cancelled" olur.
+"""
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+Q_DELTA, PLATEAU, TIME_BUDGET = "q_delta", "plateau", "time_budget"
+COMPLETED, CANCELLED = "completed", "cancelled"
+
+@dataclass
+class StopCriteria:
+    q_delta: Optional[float] = None          # en büyük |ΔQ| eşiği
+    patience: int = 1                        # q_delta kaç episode üst üste sağlanmalı
+    plateau_window: Optional[int] = None     # ödül platosu penceresi (episode)
+    plateau_tol: float = 0.01                # pencere aralığı / |ortalama| üst sınırı
+    time_budget: Optional[float] = None      # saniye
+    min_episodes: int = 1
+
+    @property
+    def active(self) -> bool:
+        return self.q_delta is not None or self.plateau_window is not None or self.time_budget is not None
+
+class EarlyStopper:
+    """fit() içinde episode başına çağrılır; durma nedenini tutar."""
+    def __init__(self, criteria: Optional[StopCriteria] = None):
+        self.criteria = criteria or StopCriteria()
+        self.reason: Optional[str] = None
+        self.cancelled = False
+        self._t0 = time.perf_counter()
+        self._calm = 0   # q_delta eşiğinin altında kalan ardışık episode
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._t0
+
+    def check(self, rewards: List[float], q_delta: Optional[float] = None) -> Optional[str]:
+        """
+        rewards: şimdiye kadarki episode ödülleri (son eleman bu episode).
+        q_delta: bu episode'daki en büyük |ΔQ| (bilinmiyorsa None: ölçüt atlanır).
+        Ölçüt sağlandıysa nedeni döner (ve saklar), aksi halde None.
+        """
+        c = self.criteria
+        if not c.active or self.reason is not None:
+            return self.reason
+        done = len(rewards)
+        if c.q_delta is not None and q_delta is not None:
+            self._calm = self._calm + 1 if q_delta < c.q_delta else 0
+            if done >= c.min_episodes and self._calm >= max(1, c.patience):
+                self.reason = Q_DELTA
+        if self.reason is None and c.plateau_window is not None and done >= max(c.min_episodes, c.plateau_window):
+            window = rewards[-c.plateau_window:]
+            mean = sum(window) / len(window)
+            if max(window) - min(window) <= c.plateau_tol * max(1.0, abs(mean)):
+                self.reason = PLATEAU
+        if self.reason is None and c.time_budget is not None and self.elapsed() >= c.time_budget:
+            self.reason = TIME_BUDGET
+        return self.reason
+
+    def cancel(self):
+        """on_episode eğitimi iptal etti (ölçüt nedenlerinin önüne geçer)."""
+        self.cancelled = True
+
+    def final_reason(self, done: int, requested: int) -> str:
+        if self.cancelled:
+            return CANCELLED
+        if self.reason is not None:
+            return self.reason
+        return CANCELLED if done < requested else COMPLETED
@@ -1,8 +1,12 @@
 # backend/core/rl/env_definition.py
+import copy
 from dataclasses import dataclass
-from typing import Dict, Any, List, Tuple
-from backend.core.rules_guard import CostParams, breakdown, target_price_for_margin
-from backend.core.rl.demand_simulator import predict_sales
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from backend.core.rules_guard import CostParams, CostArrays, breakdown, breakdown_arr, target_price_for_margin
+from backend.core.rl.demand_simulator import DemandModel
 
 @dataclass
 class ProductInfo:
@@ -23,32 +27,45 @@ class EnhancedPricingEnv:
     Genişletilmiş RL ortamı:
     - Aksiyon uzayı: [-10, -5, 0, +5, +10] %
     - Ödül: (tahmini satış * birim net kâr) - stok elde tutma cezası - min marj ihlali cezası
+    - Talep: DemandModel (yörünge/SKU başına esneklik, haftalık mevsimsellik profili);
+      verilmezse skaler elasticity/seasonality ile kurulur
     """
     def __init__(self,
                  holding_cost_per_unit: float = 0.2,
                  min_margin_pct: float = 0.10,
                  elasticity: float = -1.2,
-                 seasonality: float = 1.0):
+                 seasonality: float = 1.0,
+                 demand: Optional[DemandModel] = None):
         self.action_space = [-0.10, -0.05, 0.0, 0.05, 0.10]
         self.holding_cost_per_unit = holding_cost_per_unit
         self.min_margin_pct = min_margin_pct
         self.elasticity = elasticity
         self.seasonality = seasonality
+        self.demand = demand if demand is not None else DemandModel(elasticity, seasonality)
 
-    def step(self, state: Dict[str, float], costs: CostParams, action_idx: int) -> Tuple[Dict[str, float], float]:
+    def take(self, idx) -> "EnhancedPricingEnv":
+        """Yörünge alt kümesi için ortam (SKU başına talep dizileri de bölünür)."""
+        if not self.demand.per_sku:
+            return self
+        env = copy.copy(self)
+        env.demand = self.demand.take(idx)
+        return env
+
+    def step(self, state: Dict[str, float], costs: CostParams, action_idx: int,
+             t: int = 0, sku: Optional[int] = None) -> Tuple[Dict[str, float], float]:
         """
         state: {stock_level, last_price, competitor_price, sales_last_week}
+        t: ufuktaki hafta (mevsimsellik profili), sku: SKU başına talep modelinde satır
         """
         a = self.action_space[action_idx]
         new_price = round(state["last_price"] * (1 + a), 2)
 
         # Talep simülasyonu (rakip fiyatı referans)
-        est_sales = predict_sales(
+        est_sales = self.demand.predict_one(
             base_sales=max(0.0, state.get("sales_last_week", 0.0)),
             price=new_price,
             competitor_price=state["competitor_price"],
-            elasticity=self.elasticity,
-            seasonality=self.seasonality
+            week=t, sku=sku,
         )
 
         # Net kâr / marj (birim)
@@ -74,3 +91,34 @@ class EnhancedPricingEnv:
             "sales_last_week": est_sales
         }
         return next_state, float(reward)
+
+    def step_batch(self, stock: np.ndarray, price: np.ndarray, competitor: np.ndarray,
+                   sales: np.ndarray, costs: CostArrays, action_idx: np.ndarray, t: int = 0
+                   ) -> Tuple[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray], np.ndarray]:
+        """
+        step()'in vektörel hali: tüm yörüngeler tek çağrıda ilerler.
+        Girdi/çıktı durumları sütun dizileridir (stok, fiyat, rakip, satış);
+        SKU başına talep dizileri satır sırasıyla hizalıdır.
+        """
+        a = np.asarray(self.action_space, dtype=np.float64)[action_idx]
+        new_price = np.round(price * (1 + a), 2)
+
+        est_sales = self.demand.predict(
+            base_sales=np.maximum(0.0, sales),
+            price=new_price,
+            competitor_price=competitor,
+            week=t,
+        )
+
+        brk = breakdown_arr(new_price, costs)
+        unit_margin = brk["margin_pct"]
+        total_profit = brk["net_profit"] * est_sales
+
+        holding_pen = self.holding_cost_per_unit * np.maximum(0.0, stock - est_sales)
+        guard_pen = np.where(unit_margin < self.min_margin_pct,
+                             (self.min_margin_pct - unit_margin) * 50.0 * (1.0 + est_sales/10.0),
+                             0.0)
+
+        reward = total_profit - holding_pen - guard_pen
+        next_state = (np.maximum(0.0, stock - est_sales), new_price, competitor, est_sales)
+        return next_state, reward
@@ -0,0 +1,177 @@
+# backend/core/rl/model_store.py
+"""
+Sürümlü Q tablosu anlık görüntüleri (snapshot).
+
+Dizin düzeni:
+    <root>/manifest.json            {"active": "v000003", "versions": [...]}
+    <root>/q_table-v000001.qtab     değişmez snapshot dosyaları (mmap ikili format;
+                                    eski sürümlerde .pkl)
+    <root>/policy-v000001.pol       derlenmiş açgözlü politika (mmap; eski sürümlerde .npz)
+
+Yazımlar geçici dosya + os.replace ile atomiktir; bir snapshot dosyası
+yayınlandıktan sonra asla üzerine yazılmaz. Geri/ileri alma yalnızca
+manifest'teki "active" alanını değiştirir. Her uvicorn işçisi
+SnapshotWatcher ile manifest'i izler ve yeni sürümü eşler (np.memmap);
+tablo sayfaları tüm işçiler arasında paylaşılır ve yükleme tablo
+boyutundan bağımsızdır.
+"""
+import json
+import os
+import pickle
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Union
+
+from backend.core.rl.policy import GreedyPolicy
+from backend.core.rl.qtable import ArrayQTable, MappedQTable, write_qtab
+
+try:
+    import fcntl
+except ImportError:  # Windows: süreçler arası kilit yok
+    fcntl = None
+
+MANIFEST = "manifest.json"
+
+def _atomic_write(path: str, data: bytes):
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class SnapshotStore:
+    def __init__(self, root: str):
+        self.root = root
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root, MANIFEST)
+
+    @contextmanager
+    def _lock(self):
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, ".lock"), "w") as lf:
+            if fcntl is not None:
+                fcntl.flock(lf, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lf, fcntl.LOCK_UN)
+
+    # ---- manifest ----
+    def read_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"active": None, "versions": []}
+
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        _atomic_write(self.manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+
+    def active_version(self) -> Optional[str]:
+        return self.read_manifest().get("active")
+
+    def versions(self) -> List[Dict[str, Any]]:
+        return self.read_manifest().get("versions", [])
+
+    def _entry(self, manifest: Dict[str, Any], version: str) -> Dict[str, Any]:
+        for v in manifest.get("versions", []):
+            if v["version"] == version:
+                return v
+        raise KeyError(version)
+
+    # ---- yayınlama ----
+    def publish(self, table: Union[ArrayQTable, MappedQTable, Dict[str, List[float]]],
+                meta: Optional[Dict[str, Any]] = None, activate: bool = True,
+                policy: Optional[GreedyPolicy] = None) -> str:
+        """
+        Yeni değişmez .qtab snapshot yazar; activate=True ise aktif sürüm yapar.
+        policy verilirse derlenmiş politika da yanına yazılır (policy-vNNNNNN.pol, eşlenir).
+        """
+        if isinstance(table, dict):
+            table = ArrayQTable.from_dict(table)
+        with self._lock():
+            manifest = self.read_manifest()
+            n = max([int(v["version"][1:]) for v in manifest["versions"]] or [0]) + 1
+            version = f"v{n:06d}"
+            fname = f"q_table-{version}.qtab"
+            write_qtab(os.path.join(self.root, fname), table.codes, table.values)
+            policy_file = None
+            if policy is not None:
+                policy_file = f"policy-{version}.pol"
+                policy.save(os.path.join(self.root, policy_file))
+            manifest["versions"].append({
+                "version": version,
+                "file": fname,
+                "policy_file": policy_file,
+                "created_at": time.time(),
+                "q_states": len(table),
+                "meta": meta or {},
+            })
+            if activate:
+                manifest["active"] = version
+            self._write_manifest(manifest)
+        return version
+
+    def activate(self, version: str):
+        """Aktif sürümü değiştirir (geri/ileri alma)."""
+        with self._lock():
+            manifest = self.read_manifest()
+            self._entry(manifest, version)   # yoksa KeyError
+            manifest["active"] = version
+            self._write_manifest(manifest)
+
+    # ---- yükleme ----
+    def load_table(self, version: str, n_actions: int) -> Union[MappedQTable, ArrayQTable]:
+        """.qtab sürümleri salt-okunur eşlenir (O(1)); eski .pkl sürümleri belleğe okunur."""
+        entry = self._entry(self.read_manifest(), version)
+        path = os.path.join(self.root, entry["file"])
+        if path.endswith(".qtab"):
+            return MappedQTable(path)
+        with open(path, "rb") as f:
+            return ArrayQTable.from_dict(pickle.load(f), n_actions)
+
+    def meta(self, version: str) -> Dict[str, Any]:
+        """Sürümün yayın meta'sı (hiperparametreler, ayrıklaştırma, ...)."""
+        return self._entry(self.read_manifest(), version).get("meta", {})
+
+    def load_policy(self, version: str) -> Optional[GreedyPolicy]:
+        """Sürümle birlikte yayınlanmış politika (salt-okunur eşlenir); yoksa None (çağıran derler)."""
+        entry = self._entry(self.read_manifest(), version)
+        if not entry.get("policy_file"):
+            return None
+        return GreedyPolicy.load(os.path.join(self.root, entry["policy_file"]), version=version)
+
+class SnapshotWatcher:
+    """
+    İşçi başına manifest izleyici. check() en fazla poll_interval saniyede bir
+    manifest'in mtime'ına bakar (tek os.stat); aktif sürüm değiştiyse
+    yeni sürüm adını döner, aksi halde None.
+    """
+    def __init__(self, store: SnapshotStore, poll_interval: float = 2.0,
+                 current: Optional[str] = None):
+        self.store = store
+        self.poll_interval = poll_interval
+        self.current = current
+        self._last_check = 0.0
+        self._last_mtime = None
+
+    def check(self, force: bool = False) -> Optional[str]:
+        now = time.monotonic()
+        if not force and now - self._last_check < self.poll_interval:
+            return None
+        self._last_check = now
+        try:
+            mtime = os.stat(self.store.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if not force and mtime == self._last_mtime:
+            return None
+        self._last_mtime = mtime
+        active = self.store.active_version()
+        if active and active != self.current:
+            return active
+        return None
@@ -0,0 +1,155 @@
+# backend/core/rl/policy.py
+"""
+Eğitilmiş Q tablosundan derlenen donmuş (salt-okunur) açgözlü politika.
+
+Her state için önceden hesaplanır:
+    actions     int8     argmax aksiyonu (ilk en büyük, choose_action ile aynı)
+    confidence  float32  en iyi ile ikinci en iyi Q arasındaki fark
+    explain     int8     açıklama kodu (xai.explain_decision.REASONS)
+
+Servis yolu tabloya asla yazmaz: görülmemiş state'ler varsayılan karara düşer.
+Diziler koda göre sıralı tutulur; arama ikili aramadır (np.searchsorted),
+toplu arama tek vektörel çağrıdır. Python hash'i kurulmaz.
+
+Dosya biçimi (.pol, little-endian; .qtab gibi eşlenir):
+    başlık (32 bayt): magic "QPOLICY1", n (u8), default_action (i8), ayrılmış
+    codes int64[n] (sıralı) | confidence float32[n] | actions int8[n] | explain int8[n]
+Yükleme diziler salt-okunur eşlenerek yapılır (np.memmap): süre tablo
+boyutundan bağımsızdır ve sayfalar işçiler arasında paylaşılır. Eski .npz
+politikaları belleğe okunarak yüklenir.
+"""
+import os
+import uuid
+from typing import Optional, Tuple
+
+import numpy as np
+
+from backend.core.rl.qtable import key_to_code
+from backend.core.rl.xai.explain_decision import EXPLAIN_TIE, EXPLAIN_UNSEEN
+
+POLICY_MAGIC = b"QPOLICY1"
+POLICY_HEADER = 32
+
+class GreedyPolicy:
+    def __init__(self, codes: np.ndarray, actions: np.ndarray, confidence: np.ndarray,
+                 explain: np.ndarray, default_action: int = 0, version: Optional[str] = None,
+                 assume_sorted: bool = False):
+        # asanyarray: eşlenmiş (np.memmap) diziler kopyalanmadan tutulur
+        codes = np.asanyarray(codes, dtype=np.int64)
+        actions = np.asanyarray(actions, dtype=np.int8)
+        confidence = np.asanyarray(confidence, dtype=np.float32)
+        explain = np.asanyarray(explain, dtype=np.int8)
+        if not assume_sorted and len(codes) > 1 and not np.all(codes[1:] > codes[:-1]):
+            order = np.argsort(codes, kind="stable")
+            codes, actions, confidence, explain = codes[order], actions[order], confidence[order], explain[order]
+        self.codes, self.actions, self.confidence, self.explain = codes, actions, confidence, explain
+        self.default_action = int(default_action)
+        self.version = version
+        for arr in (self.codes, self.actions, self.confidence, self.explain):
+            if arr.flags.writeable:
+                arr.setflags(write=False)
+    @classmethod
+    def compile(cls, table, default_action: int = 0, version: Optional[str] = None) -> "GreedyPolicy":
+        """ArrayQTable / MappedQTable / eski dict tablodan politika derler."""
+        if isinstance(table, dict):
+            codes = np.array([key_to_code(k) if isinstance(k, str) else int(k) for k in table],
+                             dtype=np.int64)
+            values = np.array(list(table.values()), dtype=np.float64).reshape(len(codes), -1)
+        else:
+            codes = np.asarray(table.codes, dtype=np.int64)
+            values = np.asarray(table.values, dtype=np.float64)
+        n, n_actions = values.shape if values.ndim == 2 else (0, 1)
+        if n == 0:
+            empty = np.zeros(0)
+            return cls(empty, empty, empty, empty, default_action, version)
+
+        actions = np.argmax(values, axis=1)
+        best = values[np.arange(n), actions]
+        if n_actions > 1:
+            second = np.partition(values, n_actions - 2, axis=1)[:, n_actions - 2]
+        else:
+            second = best
+        confidence = best - second
+        explain = np.where(confidence > 0, actions, EXPLAIN_TIE)
+        return cls(codes, actions, confidence, explain, default_action, version)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        """Dizilerin boyutu (eşlenmiş politikada işçiler arasında paylaşılan sayfalar)."""
+        return int(self.codes.nbytes + self.actions.nbytes + self.confidence.nbytes + self.explain.nbytes)
+
+    def _find(self, codes: np.ndarray) -> np.ndarray:
+        """Kod -> sıra indeksi (-1: görülmemiş)."""
+        n = len(self.codes)
+        idx = np.searchsorted(self.codes, codes)
+        if n == 0:
+            return np.full(len(codes), -1, dtype=np.int64)
+        found = (idx < n) & (self.codes[np.minimum(idx, n - 1)] == codes)
+        return np.where(found, idx, -1)
+
+    def lookup(self, code) -> Tuple[int, float, int]:
+        """(aksiyon, güven, açıklama kodu). Görülmemiş state -> varsayılan karar."""
+        if isinstance(code, str):
+            code = key_to_code(code)
+        n = len(self.codes)
+        i = int(np.searchsorted(self.codes, code)) if n else 0
+        if i >= n or self.codes[i] != code:
+            return self.default_action, 0.0, EXPLAIN_UNSEEN
+        return int(self.actions[i]), float(self.confidence[i]), int(self.explain[i])
+
+    def lookup_many(self, codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Toplu arama (batch yolu): tek searchsorted çağrısı."""
+        codes = np.asarray(codes, dtype=np.int64)
+        idx = self._find(codes)
+        seen = idx >= 0
+        if not seen.any():
+            return (np.full(len(codes), self.default_action), np.zeros(len(codes)),
+                    np.full(len(codes), EXPLAIN_UNSEEN))
+        safe = np.where(seen, idx, 0)
+        actions = np.where(seen, self.actions[safe], self.default_action)
+        confidence = np.where(seen, self.confidence[safe], 0.0)
+        explain = np.where(seen, self.explain[safe], EXPLAIN_UNSEEN)
+        return actions, confidence, explain
+
+    # ---- kalıcılık ----
+    def save(self, path: str):
+        """.pol dosyası yazar (geçici dosya + os.replace)."""
+        n = len(self.codes)
+        header = bytearray(POLICY_HEADER)
+        header[0:8] = POLICY_MAGIC
+        header[8:16] = np.array(n, dtype="<u8").tobytes()
+        header[16:24] = np.array(self.default_action, dtype="<i8").tobytes()
+        tmp = f"{path}.tmp-{uuid.uuid4().hex}"
+        with open(tmp, "wb") as f:
+            f.write(header)
+            f.write(self.codes.astype("<i8").tobytes())
+            f.write(self.confidence.astype("<f4").tobytes())
+            f.write(self.actions.astype("i1").tobytes())
+            f.write(self.explain.astype("i1").tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, version: Optional[str] = None) -> "GreedyPolicy":
+        """.pol dosyaları salt-okunur eşlenir (O(1)); eski .npz belleğe okunur."""
+        with open(path, "rb") as f:
+            header = f.read(POLICY_HEADER)
+        if header[0:8] != POLICY_MAGIC:
+            with np.load(path, allow_pickle=False) as z:
+                return cls(z["codes"], z["actions"], z["confidence"], z["explain"],
+                           int(z["default_action"]), version)
+        n = int(np.frombuffer(header[8:16], dtype="<u8")[0])
+        default_action = int(np.frombuffer(header[16:24], dtype="<i8")[0])
+        if n == 0:   # boş dosya eşlenemez
+            empty = np.zeros(0)
+            return cls(empty, empty, empty, empty, default_action, version)
+        off = POLICY_HEADER
+        codes = np.memmap(path, dtype="<i8", mode="r", offset=off, shape=(n,))
+        confidence = np.memmap(path, dtype="<f4", mode="r", offset=off + 8 * n, shape=(n,))
+        actions = np.memmap(path, dtype="i1", mode="r", offset=off + 12 * n, shape=(n,))
+        explain = np.memmap(path, dtype="i1", mode="r", offset=off + 13 * n, shape=(n,))
+        return cls(codes, actions, confidence, explain, default_action, version, assume_sorted=True)
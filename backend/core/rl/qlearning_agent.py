@@ -1,23 +1,109 @@
 # backend/core/rl/qlearning_agent.py
+import copy
 import random
 import math
 import pickle
-from typing import Dict, Any, List, Tuple
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from backend.core.rl import checkpoint
+from backend.core.rl.policy import GreedyPolicy
+from backend.core.rl.discretizer import Discretizer
+from backend.core.rl.qtable import ArrayQTable, MappedQTable, encode_bins, encode_bins_arr
+from backend.core.rl.telemetry import visit_histogram
+from backend.core.rl.early_stopping import EarlyStopper, StopCriteria
+from backend.core.rl.replay import ReplayBuffer, ReplayConfig
+from backend.core.rules_guard import CostArrays
+
+STATE_FIELDS = ("stock_level", "last_price", "competitor_price", "sales_last_week")
+HORIZON = 24   # her episode'da yörünge başına adım (ör. 24 hafta)
+
+def _columns_from(trajectories) -> Dict[str, np.ndarray]:
+    """Başlangıç state'leri -> sütun dizileri (float64)."""
+    if isinstance(trajectories, dict):
+        return {k: np.asarray(trajectories[k], dtype=np.float64) for k in STATE_FIELDS}
+    return {k: np.fromiter((float(s.get(k, 0.0)) for s in trajectories), dtype=np.float64,
+                           count=len(trajectories)) for k in STATE_FIELDS}
+
+def _rows_from_columns(cols: Dict[str, np.ndarray]) -> List[Dict[str, float]]:
+    return [dict(zip(STATE_FIELDS, vals)) for vals in zip(*(np.asarray(cols[k]).tolist() for k in STATE_FIELDS))]
+
+def _cost_arrays(costs, cols: Dict[str, np.ndarray]) -> CostArrays:
+    """CostParams / CostArrays / callable -> yörünge başına CostArrays."""
+    n = len(cols["stock_level"])
+    if isinstance(costs, CostArrays):
+        return costs
+    if callable(costs):
+        return CostArrays.from_params(costs(s) for s in _rows_from_columns(cols))
+    return CostArrays.repeat(costs, n)
+
+def _end_episode(episode_rewards: List[float], reward: float, on_episode,
+                 telemetry=None, stopper: Optional[EarlyStopper] = None,
+                 q_delta: Optional[float] = None, **info) -> bool:
+    """
+    Episode ödülünü kaydeder (ve telemetriye yazar); geri çağrı False dönerse
+    (iptal, stopper'a işlenir) ya da bir durma ölçütü sağlanırsa eğitim durur.
+    """
+    episode_rewards.append(reward)
+    if telemetry is not None:
+        telemetry.record(episode=len(episode_rewards), mean_reward=reward, q_delta_max=q_delta, **info)
+    converged = stopper is not None and stopper.check(episode_rewards, q_delta) is not None
+    if on_episode is not None and on_episode(len(episode_rewards), reward) is False:
+        if stopper is not None:
+            stopper.cancel()
+        return False
+    return not converged
+
+def _n_rows(trajectories) -> int:
+    if isinstance(trajectories, dict):
+        return len(trajectories["stock_level"])
+    return len(trajectories)
 
 class QLearningAgent:
-    def __init__(self, action_space: List[float], alpha=0.2, gamma=0.92, epsilon=0.1):
+    """
+    q_backend="dict"  : Dict[str, List[float]] (eski format, "3|18|19|2" anahtarlar)
+    q_backend="array" : ArrayQTable (int64 kod + bitişik NumPy Q matrisi)
+    """
+    def __init__(self, action_space: List[float], alpha=0.2, gamma=0.92, epsilon=0.1,
+                 q_backend: str = "dict", q_dtype=np.float64,
+                 discretizer: Optional[Discretizer] = None):
         self.action_space = action_space
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
-        self.q_table: Dict[str, List[float]] = {}
+        if q_backend not in ("dict", "array"):
+            raise ValueError(f"Bilinmeyen q_backend: {q_backend}")
+        self.q_backend = q_backend
+        self.q_dtype = q_dtype
+        self.discretizer = discretizer or Discretizer.default()
+        self.rng = random.Random()
+        self.version: Optional[str] = None   # yüklenen snapshot sürümü (varsa)
+        self.policy: Optional[GreedyPolicy] = None   # servis için derlenmiş açgözlü politika
+        self.q_table: Union[Dict[str, List[float]], ArrayQTable] = (
+            ArrayQTable(len(action_space), dtype=q_dtype) if q_backend == "array" else {}
+        )
+
+    @property
+    def discretization(self) -> Dict[str, Any]:
+        """Checkpoint/snapshot meta'sına yazılan ayrıklaştırma tanımı."""
+        return self.discretizer.to_meta()
+
+    def get_state_bins(self, s: Dict[str, float]) -> Tuple[int, int, int, int]:
+        # varsayılan kaba ayrıklaştırma: (stok/20), (fiyat/5), (rakip/5), (satış/5)
+        return self.discretizer.bins(s)
 
-    def get_state_key(self, s: Dict[str, float]) -> str:
-        # kaba ayrıklaştırma: (stok/20), (fiyat/5), (rakip/5), (satış/5)
-        def binv(x, w): 
-            try: return int(float(x) // w)
-            except: return 0
-        return f"{binv(s.get('stock_level',0),20)}|{binv(s.get('last_price',0),5)}|{binv(s.get('competitor_price',0),5)}|{binv(s.get('sales_last_week',0),5)}"
+    def get_state_key(self, s: Dict[str, float]) -> Union[str, int]:
+        b = self.get_state_bins(s)
+        if self.q_backend == "array":
+            return encode_bins(b)
+        return f"{b[0]}|{b[1]}|{b[2]}|{b[3]}"
+
+    def get_state_bins_arr(self, stock, price, competitor, sales) -> np.ndarray:
+        """get_state_bins'in vektörel hali: (n, 4) int64 bin matrisi."""
+        return self.discretizer.bins_arr(stock, price, competitor, sales)
 
     def _ensure_state(self, key: str):
         if key not in self.q_table:
@@ -25,10 +111,16 @@ class QLearningAgent:
 
     def choose_action(self, state: Dict[str, float], explore: bool = True) -> int:
         key = self.get_state_key(state)
-        self._ensure_state(key)
-        if explore and random.random() < self.epsilon:
-            return random.randrange(len(self.action_space))
-        qvals = self.q_table[key]
+        if getattr(self.q_table, "readonly", False):
+            # salt-okunur (mmap) tablo: görülmemiş state'ler yazılmaz, sıfır Q kabul edilir
+            qvals = self.q_table.get(key)
+            if qvals is None:
+                qvals = [0.0 for _ in self.action_space]
+        else:
+            self._ensure_state(key)
+            qvals = self.q_table[key]
+        if explore and self.rng.random() < self.epsilon:
+            return self.rng.randrange(len(self.action_space))
         return int(max(range(len(qvals)), key=lambda i: qvals[i]))
 
     def learn(self, s_key: str, a_idx: int, reward: float, s_next_key: str):
@@ -38,33 +130,346 @@ class QLearningAgent:
         td_target = reward + self.gamma * best_next
         td_error = td_target - self.q_table[s_key][a_idx]
         self.q_table[s_key][a_idx] += self.alpha * td_error
+        if isinstance(self.q_table, ArrayQTable):
+            self.q_table.visit(s_key, a_idx)
+        return td_error
 
-    def fit(self, env, trajectories: List[Tuple[Dict[str,float], Any]], costs, 
-            episodes: int = 50, epsilon_start=0.3, epsilon_end=0.05):
+    def fit(self, env, trajectories, costs,
+            episodes: int = 50, epsilon_start=0.3, epsilon_end=0.05,
+            batched: bool = False, horizon: int = HORIZON, seed: Optional[int] = None,
+            workers: int = 1, sync_every: int = 5,
+            on_episode: Optional[Callable[[int, float], Optional[bool]]] = None,
+            telemetry=None, stop: Optional[StopCriteria] = None,
+            replay: Optional[ReplayConfig] = None) -> Dict[str, Any]:
         """
         trajectories: sadece başlangıç state’leri; env.step ile ilerliyoruz.
-        costs: CostParams veya callable(state)->CostParams
+                      dict listesi veya sütun dizileri ({"stock_level": ndarray, ...}).
+        costs: CostParams, CostArrays veya callable(state)->CostParams
+        batched: True ise tüm yörüngeler NumPy dizileri olarak birlikte ilerler
+                 (env.step_batch); aksiyon seçimi ve TD güncellemeleri toplu yapılır.
+                 Array backend gerektirir; callable costs başlangıç state'inde bir kez çağrılır.
+        workers: >1 ise yörüngeler ProcessPoolExecutor üzerinde parçalara bölünür;
+                 her süreç kendi parçasını batched modda eğitir ve her sync_every
+                 episode'da tablolar ziyaret sayısı ağırlıklı ortalama ile birleştirilir.
+                 Süreçler tüm eğitim boyunca yeniden kullanılır.
+        on_episode: her episode sonunda (tamamlanan episode sayısı, ortalama ödül) ile
+                 çağrılır; False dönerse eğitim o noktada durur (iptal).
+        telemetry: TrainingTelemetry (ya da record(**kayıt) sunan nesne); her episode
+                 sonunda ödül, ortalama |TD hatası|, epsilon, yeni state sayısı ve
+                 ziyaret dağılımı yazılır. Paralel modda yeni state'ler ve ziyaret
+                 dağılımı birleştirme turunun son episode'unda raporlanır.
+        stop:    StopCriteria; verilirse episodes üst sınırdır ve eğitim ilk sağlanan
+                 ölçütte (q_delta / plateau / time_budget) durur. Paralel modda
+                 ölçütler birleştirme turu sonunda uygulanır; q_delta tur başına ölçülür.
+        replay:  ReplayConfig; verilirse her adımın geçişleri halka tampona yazılır ve
+                 çevrimiçi güncellemeye ek olarak tampondan updates_per_step toplu TD
+                 güncellemesi (uniform ya da TD hatası öncelikli) yapılır: aynı ortam
+                 adımı sayısıyla daha çok öğrenme. batched/paralel mod gerektirir;
+                 paralel modda her süreç kendi tamponunu tutar (tur başına).
+        Dönüş: {"episodes", "steps", "seconds", "episodes_per_sec", "episode_rewards",
+                "episode_td_errors", "stop_reason", "mean_episode_reward" (tüm episode'ların
+                ortalaması), "last_episode_reward", ...}
         """
+        if seed is not None:
+            self.rng.seed(seed)
         self.epsilon = epsilon_start
         decay = (epsilon_start - epsilon_end) / max(1, episodes-1)
+        if replay is not None and not batched and workers <= 1:
+            raise ValueError("replay eğitimi batched=True gerektirir")
+        t0 = time.perf_counter()
+        stopper = EarlyStopper(stop)
+        buffer = ReplayBuffer.from_config(replay) if replay is not None and workers <= 1 else None
+        if workers > 1:
+            episode_rewards, episode_td = self._fit_parallel(
+                env, trajectories, costs, episodes, epsilon_start, epsilon_end, decay, horizon,
+                seed, workers, sync_every, on_episode, telemetry, stopper, replay)
+        elif batched:
+            episode_rewards, episode_td = self._fit_batched(
+                env, trajectories, costs, episodes, epsilon_end, decay, horizon, seed,
+                on_episode, telemetry, stopper, replay, buffer)
+        else:
+            episode_rewards, episode_td = self._fit_scalar(
+                env, trajectories, costs, episodes, epsilon_end, decay, horizon,
+                on_episode, telemetry, stopper)
+        seconds = time.perf_counter() - t0
+        n_traj = _n_rows(trajectories)
+        done = len(episode_rewards)
+        return {
+            "episodes": done,
+            "episodes_requested": episodes,
+            "stopped_early": done < episodes,
+            "stop_reason": stopper.final_reason(done, episodes),
+            "trajectories": n_traj,
+            "workers": max(1, workers),
+            "steps": done * n_traj * horizon,
+            "seconds": round(seconds, 4),
+            "episodes_per_sec": round(done / seconds, 3) if seconds > 0 else None,
+            "episode_rewards": episode_rewards,   # yörünge başına ortalama toplam ödül
+            "episode_td_errors": episode_td,      # episode başına ortalama |TD hatası|
+            "replay": None if buffer is None else {"size": len(buffer), "samples": buffer.sampled},
+            "mean_episode_reward": float(np.mean(episode_rewards)) if episode_rewards else 0.0,
+            "last_episode_reward": episode_rewards[-1] if episode_rewards else 0.0,
+        }
+
+    def _episode_info(self, telemetry, total: float, td_abs: float, epsilon: float,
+                      states_before: int) -> Dict[str, Any]:
+        """Telemetri kaydının ödül dışı alanları (telemetri yoksa hesaplanmaz)."""
+        if telemetry is None:
+            return {}
+        table = self.q_table
+        return {
+            "total_reward": float(total),
+            "td_abs_mean": float(td_abs),
+            "epsilon": float(epsilon),
+            "new_states": len(table) - states_before,
+            "states": len(table),
+            "visit_hist": visit_histogram(table.visits if isinstance(table, ArrayQTable) else None),
+        }
+
+    def _fit_scalar(self, env, trajectories, costs, episodes, epsilon_end, decay, horizon,
+                    on_episode=None, telemetry=None, stopper=None) -> Tuple[List[float], List[float]]:
+        if isinstance(trajectories, dict):
+            trajectories = _rows_from_columns(trajectories)
+        episode_rewards, episode_td = [], []
         for ep in range(episodes):
-            for init_state in trajectories:
+            total, td_abs, dq, n_states, eps = 0.0, 0.0, 0.0, len(self.q_table), self.epsilon
+            for i, init_state in enumerate(trajectories):
                 s = dict(init_state)  # kopya
-                for _ in range(24):   # her ep için 24 adım (ör. 24 hafta)
+                for t in range(horizon):   # her ep için 24 adım (ör. 24 hafta)
                     s_key = self.get_state_key(s)
                     a_idx = self.choose_action(s, explore=True)
                     cp = costs(s) if callable(costs) else costs
-                    s_next, r = env.step(s, cp, a_idx)
+                    s_next, r = env.step(s, cp, a_idx, t=t, sku=i)
                     s_next_key = self.get_state_key(s_next)
-                    self.learn(s_key, a_idx, r, s_next_key)
+                    err = abs(self.learn(s_key, a_idx, r, s_next_key))
+                    td_abs += err
+                    dq = max(dq, self.alpha * err)
                     s = s_next
+                    total += r
             # epsilon decay
             self.epsilon = max(epsilon_end, self.epsilon - decay)
+            episode_td.append(td_abs / max(1, len(trajectories) * horizon))
+            info = self._episode_info(telemetry, total, episode_td[-1], eps, n_states)
+            if not _end_episode(episode_rewards, total / max(1, len(trajectories)), on_episode,
+                                telemetry, stopper, dq, **info):
+                break
+        return episode_rewards, episode_td
+
+    def _fit_batched(self, env, trajectories, costs, episodes, epsilon_end, decay, horizon,
+                     seed: Optional[int], on_episode=None, telemetry=None,
+                     stopper=None, replay: Optional[ReplayConfig] = None,
+                     buffer: Optional[ReplayBuffer] = None) -> Tuple[List[float], List[float]]:
+        if not isinstance(self.q_table, ArrayQTable):
+            raise ValueError("batched eğitim q_backend='array' gerektirir")
+        cols = _columns_from(trajectories)
+        n = len(cols["stock_level"])
+        ca = _cost_arrays(costs, cols)
+
+        rng = np.random.default_rng(seed)
+        table = self.q_table
+        n_actions = len(self.action_space)
+        episode_rewards, episode_td = [], []
+        for ep in range(episodes):
+            stock, price, comp, sales = (cols[k].copy() for k in STATE_FIELDS)
+            total = np.zeros(n)
+            td_abs, dq, n_states, eps = 0.0, 0.0, len(table), self.epsilon
+            rows = table.rows_for(encode_bins_arr(self.get_state_bins_arr(stock, price, comp, sales)))
+            for t in range(horizon):
+                # epsilon-greedy (toplu)
+                greedy = np.argmax(table.values[rows], axis=1)
+                explore = rng.random(n) < self.epsilon
+                a_idx = np.where(explore, rng.integers(0, n_actions, n), greedy)
+
+                (stock, price, comp, sales), r = env.step_batch(stock, price, comp, sales, ca, a_idx, t=t)
+                next_rows = table.rows_for(encode_bins_arr(self.get_state_bins_arr(stock, price, comp, sales)))
+
+                # TD güncellemesi (toplu); aynı (state, aksiyon) çiftine düşen
+                # hatalar birleştirilir (bkz. _apply_td)
+                q = table.values
+                td_error = r + self.gamma * q[next_rows].max(axis=1) - q[rows, a_idx]
+                dq = max(dq, self._apply_td(q, rows, a_idx, td_error))
+                table.add_visits(rows, a_idx)
+                td_abs += float(np.abs(td_error).sum())
+                if buffer is not None:
+                    buffer.add(rows, a_idx, r, next_rows)
+                    dq = max(dq, self._replay(buffer, replay, rng))
+
+                rows = next_rows
+                total += r
+            self.epsilon = max(epsilon_end, self.epsilon - decay)
+            episode_td.append(td_abs / max(1, n * horizon))
+            info = self._episode_info(telemetry, total.sum(), episode_td[-1], eps, n_states)
+            if not _end_episode(episode_rewards, float(total.mean()) if n else 0.0, on_episode,
+                                telemetry, stopper, dq, **info):
+                break
+        return episode_rewards, episode_td
+
+    def _fit_parallel(self, env, trajectories, costs, episodes, epsilon_start, epsilon_end, decay,
+                      horizon, seed: Optional[int], workers: int, sync_every: int,
+                      on_episode=None, telemetry=None, stopper=None,
+                      replay: Optional[ReplayConfig] = None) -> Tuple[List[float], List[float]]:
+        if not isinstance(self.q_table, ArrayQTable):
+            raise ValueError("paralel eğitim q_backend='array' gerektirir")
+        cols = _columns_from(trajectories)
+        n = len(cols["stock_level"])
+        ca = _cost_arrays(costs, cols)
+        n_shards = max(1, min(workers, n))
+        shard_idx = np.array_split(np.arange(n), n_shards)
+        shards = [({k: v[idx] for k, v in cols.items()}, ca.take(idx), env.take(idx)) for idx in shard_idx]
+        sizes = np.array([len(idx) for idx in shard_idx], dtype=np.float64)
+        sync_every = max(1, int(sync_every))
+
+        episode_rewards: List[float] = []
+        episode_td: List[float] = []
+        with ProcessPoolExecutor(max_workers=n_shards, initializer=_worker_init,
+                                 initargs=(shards, self.alpha, self.gamma, horizon,
+                                           len(self.action_space), self.q_table.dtype,
+                                           self.discretizer, replay)) as pool:
+            for start in range(0, episodes, sync_every):
+                k = min(sync_every, episodes - start)
+                eps0 = max(epsilon_end, epsilon_start - start * decay)
+                eps1 = max(epsilon_end, epsilon_start - (start + k - 1) * decay)
+                codes, values = self.q_table.snapshot()
+                futures = [
+                    pool.submit(_worker_round, i, codes, values, k, eps0, eps1,
+                                None if seed is None else seed + 7919 * start + i)
+                    for i in range(n_shards)
+                ]
+                results = [f.result() for f in futures]   # parça sırasıyla: deterministik
+                n_states = len(self.q_table)
+                self.q_table.merge_weighted([r[:3] for r in results])
+                # tur boyunca en büyük |ΔQ| (yeni state'ler sıfırdan başlar, tablo sonuna eklenir)
+                merged = self.q_table.values
+                dq = max(float(np.abs(merged[:n_states] - values).max()) if n_states else 0.0,
+                         float(np.abs(merged[n_states:]).max()) if len(merged) > n_states else 0.0)
+                rewards = np.array([r[3] for r in results])   # (parça, episode)
+                td = np.array([r[4] for r in results])
+                self.epsilon = max(epsilon_end, eps1 - decay)
+                keep_going = True
+                for j, (rew, err) in enumerate(zip((sizes @ rewards / sizes.sum()).tolist(),
+                                                   (sizes @ td / sizes.sum()).tolist())):
+                    episode_td.append(err)
+                    info = self._episode_info(telemetry, rew * n, err,
+                                              max(epsilon_end, epsilon_start - (start + j) * decay),
+                                              n_states)
+                    if info and j < k - 1:
+                        # yeni state'ler ve ziyaret dağılımı yalnızca birleştirmeden sonra bilinir
+                        info.update(new_states=0, states=n_states, visit_hist=None)
+                    keep_going = _end_episode(episode_rewards, rew, on_episode, telemetry, stopper,
+                                              dq if j == k - 1 else None, **info) and keep_going
+                if not keep_going:
+                    break
+        return episode_rewards, episode_td
+
+    def compile_policy(self) -> GreedyPolicy:
+        """Mevcut Q tablosundan salt-okunur açgözlü politika derler."""
+        self.policy = GreedyPolicy.compile(self.q_table, version=self.version)
+        return self.policy
+
+    def clone(self) -> "QLearningAgent":
+        """Eğitim için bağımsız, yazılabilir kopya (mmap tablo belleğe alınır)."""
+        table = self.q_table
+        if isinstance(table, MappedQTable):
+            table = table.to_array_table()
+        else:
+            table = copy.deepcopy(table)
+        c = copy.copy(self)
+        c.q_table = table
+        c.rng = random.Random()
+        c.policy = None   # eğitimden sonra yeniden derlenir
+        return c
+
+    def _replay(self, buffer: ReplayBuffer, cfg: ReplayConfig, rng: np.random.Generator) -> float:
+        """
+        Tampondan updates_per_step toplu TD güncellemesi (öncelikli örneklemede
+        önem ağırlıklı); en büyük |ΔQ| döner. Tampon batch_size'a ulaşmadan başlamaz.
+        """
+        if len(buffer) < cfg.batch_size:
+            return 0.0
+        q = self.q_table.values
+        dq = 0.0
+        for _ in range(cfg.updates_per_step):
+            b = buffer.sample(cfg.batch_size, rng)
+            td_error = b["rewards"] + self.gamma * q[b["next_rows"]].max(axis=1) - q[b["rows"], b["actions"]]
+            dq = max(dq, self._apply_td(q, b["rows"], b["actions"], td_error * b["weights"]))
+            buffer.update_priorities(b["idx"], td_error)
+        return dq
+
+    def _apply_td(self, q: np.ndarray, rows: np.ndarray, a_idx: np.ndarray, td_error: np.ndarray):
+        """
+        Toplu TD güncellemesi; en büyük |ΔQ| döner. Aynı (state, aksiyon)
+        çiftine düşen k hata ortalanır ve 1 - (1 - alpha) ** k adımıyla
+        uygulanır: aynı hedefe k ardışık skaler güncellemenin kapalı biçimi
+        (skaler fit ile eşdeğer öğrenme hızı, adım 1'i aşmaz).
+        """
+        flat = rows * q.shape[1] + a_idx
+        uniq, inv = np.unique(flat, return_inverse=True)
+        sums = np.bincount(inv, weights=td_error, minlength=len(uniq))
+        counts = np.bincount(inv, minlength=len(uniq))
+        update = (1.0 - (1.0 - self.alpha) ** counts) * (sums / counts)
+        q.reshape(-1)[uniq] += update
+        return float(np.abs(update).max()) if len(update) else 0.0
+
+    def export_q_dict(self) -> Dict[str, List[float]]:
+        """Q tablosunu eski dict formatında döndürür (backend'den bağımsız)."""
+        if isinstance(self.q_table, (ArrayQTable, MappedQTable)):
+            return self.q_table.to_dict()
+        return self.q_table
+
+    def import_q_dict(self, q_dict: Dict[str, List[float]]) -> int:
+        """
+        Eski dict formatındaki tabloyu aktif backend'e yükler. Array backend'de
+        kayıpsız kodlanamayan (aralık dışı binli) anahtarlar alınmaz; sayısı döner.
+        """
+        if self.q_backend == "array":
+            self.q_table = ArrayQTable.from_dict(q_dict, len(self.action_space), dtype=self.q_dtype)
+            return self.q_table.lossy_keys
+        self.q_table = dict(q_dict)
+        return 0
+
+    def save_checkpoint(self, path: str, incremental: bool = True) -> Dict[str, Any]:
+        """Sütunsal .npz checkpoint; artımlı modda yalnızca değişen state'ler yazılır."""
+        return checkpoint.save_checkpoint(self, path, incremental=incremental)
+
+    def load_checkpoint(self, path: str) -> Dict[str, Any]:
+        return checkpoint.load_checkpoint(self, path)
 
     def save_q_table(self, path: str):
+        # .npz -> checkpoint formatı; diğer uzantılar eski pickle dict formatı
+        if path.endswith(".npz"):
+            self.save_checkpoint(path, incremental=False)
+            return
         with open(path, "wb") as f:
-            pickle.dump(self.q_table, f)
+            pickle.dump(self.export_q_dict(), f)
 
     def load_q_table(self, path: str):
+        if path.endswith(".npz"):
+            self.load_checkpoint(path)
+            return
         with open(path, "rb") as f:
-            self.q_table = pickle.load(f)
+            lossy = self.import_q_dict(pickle.load(f))
+        if lossy:
+            print(f"[!] {path}: aralık dışı binli {lossy} state alınmadı (kodlamada çakışırdı)")
+
+
+# -------------------- Paralel eğitim işçileri --------------------
+# Havuz başlatılırken her sürece bir kez gönderilir; turlar arasında yalnızca
+# Q tablosu anlık görüntüsü taşınır.
+_WORKER: Dict[str, Any] = {}
+
+def _worker_init(shards, alpha, gamma, horizon, n_actions, dtype, discretizer=None, replay=None):
+    _WORKER.update(shards=shards, alpha=alpha, gamma=gamma, horizon=horizon,
+                   n_actions=n_actions, dtype=dtype, discretizer=discretizer, replay=replay)
+
+def _worker_round(shard: int, codes: np.ndarray, values: np.ndarray, episodes: int,
+                  eps0: float, eps1: float, seed: Optional[int]):
+    """Bir parçayı global tablonun kopyası üzerinde `episodes` kadar eğitir."""
+    w = _WORKER
+    agent = QLearningAgent([0.0] * w["n_actions"], alpha=w["alpha"], gamma=w["gamma"],
+                           q_backend="array", q_dtype=w["dtype"], discretizer=w["discretizer"])
+    agent.q_table = ArrayQTable.from_arrays(codes, values, dtype=w["dtype"])
+    cols, ca, env = w["shards"][shard]
+    stats = agent.fit(env, cols, ca, episodes=episodes, epsilon_start=eps0, epsilon_end=eps1,
+                      batched=True, horizon=w["horizon"], seed=seed, replay=w["replay"])
+    t = agent.q_table
+    return t.codes, t.values, t.visits, stats["episode_rewards"], stats["episode_td_errors"]
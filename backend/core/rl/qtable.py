@@ -0,0 +1,378 @@
+# backend/core/rl/qtable.py
+"""
+Dizi tabanlı Q tablosu.
+
+Dört bin indeksi (stok, fiyat, rakip, satış) tek bir int64 koda paketlenir
+(her biri 16 bit); Q değerleri bitişik bir NumPy matrisinde tutulur ve
+kod -> satır eşlemesi bir hash (dict) ile yapılır. Dict tabanlı tablo ile
+aynı arayüzü (get / in / [] / len) sunduğu için QLearningAgent değişmeden çalışır.
+Aralık dışı binler uçlarda doyar (0 / 65535): örn. satış/5 >= 65535 olan
+durumlar tek bir "çok yüksek satış" kovasında toplanır. İlk (en üst) alan
+15 bitte doyar (0 / 32767): işaret biti boş kalır, kod her zaman pozitif
+int64'tür ve skaler / vektörel kodlama aynı sonucu verir.
+"""
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+BIN_BITS = 16
+BIN_MAX = (1 << BIN_BITS) - 1
+TOP_BIN_MAX = BIN_MAX >> 1   # ilk alan: işaret biti kullanılmaz
+N_FEATURES = 4
+
+def encode_bins(bins: Sequence[int]) -> int:
+    """(b0, b1, b2, b3) -> int64 kod. b0 [0, 32767], diğerleri [0, 65535] aralığına kırpılır."""
+    code = 0
+    for j, b in enumerate(bins):
+        code = (code << BIN_BITS) | min(TOP_BIN_MAX if j == 0 else BIN_MAX, max(0, int(b)))
+    return code
+
+def encode_bins_arr(bins: np.ndarray) -> np.ndarray:
+    """(n, 4) bin matrisi -> (n,) int64 kod dizisi (encode_bins ile aynı kırpma)."""
+    b = np.clip(np.asarray(bins, dtype=np.int64), 0, BIN_MAX)
+    b[:, 0] = np.minimum(b[:, 0], TOP_BIN_MAX)
+    code = np.zeros(b.shape[0], dtype=np.int64)
+    for j in range(b.shape[1]):
+        code = (code << BIN_BITS) | b[:, j]
+    return code
+
+def decode_code(code: int) -> Tuple[int, ...]:
+    return tuple((int(code) >> (BIN_BITS * (N_FEATURES - 1 - j))) & BIN_MAX for j in range(N_FEATURES))
+
+def decode_codes_arr(codes: np.ndarray) -> np.ndarray:
+    """(n,) int64 kod dizisi -> (n, 4) bin matrisi."""
+    codes = np.asarray(codes, dtype=np.int64)
+    shifts = BIN_BITS * np.arange(N_FEATURES - 1, -1, -1, dtype=np.int64)
+    return (codes[:, None] >> shifts) & BIN_MAX
+
+def bins_in_range(bins: Sequence[int]) -> bool:
+    """Binler kırpılmadan (kayıpsız) kodlanabiliyor mu."""
+    return all(0 <= int(b) <= (TOP_BIN_MAX if j == 0 else BIN_MAX) for j, b in enumerate(bins))
+
+def key_to_code(key: str) -> int:
+    """Eski string anahtar ("3|18|19|2") -> int64 kod."""
+    return encode_bins(int(p) for p in key.split("|"))
+
+def code_to_key(code: int) -> str:
+    return "|".join(str(b) for b in decode_code(code))
+
+class ArrayQTable:
+    """
+    Kodu int64, değerleri float32/float64 olan kompakt Q tablosu.
+    Kapasite dolunca matris iki katına büyür (amortize O(1) ekleme).
+    Not: __getitem__ satırın bir görünümünü (view) döner; büyüme sonrası eski
+    görünümler geçersizdir, bu yüzden satırı ekleme işlemlerinden sonra alın.
+    """
+    readonly = False
+    lossy_keys = 0   # from_dict: aralık dışı bin içerdiği için alınmayan anahtar sayısı
+
+    def __init__(self, n_actions: int, dtype=np.float64, capacity: int = 1024):
+        self.n_actions = int(n_actions)
+        self.dtype = np.dtype(dtype)
+        capacity = max(1, int(capacity))
+        self._index: Dict[int, int] = {}
+        self._codes = np.zeros(capacity, dtype=np.int64)
+        self._values = np.zeros((capacity, self.n_actions), dtype=self.dtype)
+        self._visits = np.zeros((capacity, self.n_actions), dtype=np.uint32)   # (state, aksiyon) güncelleme sayısı
+        self._dirty = np.zeros(capacity, dtype=bool)   # son checkpoint'ten beri değişen satırlar
+        self._n = 0
+
+    # ---- kapasite ----
+    def _grow(self, need: int):
+        cap = len(self._codes)
+        if need <= cap:
+            return
+        while cap < need:
+            cap *= 2
+        codes = np.zeros(cap, dtype=np.int64)
+        codes[:self._n] = self._codes[:self._n]
+        values = np.zeros((cap, self.n_actions), dtype=self.dtype)
+        values[:self._n] = self._values[:self._n]
+        visits = np.zeros((cap, self.n_actions), dtype=np.uint32)
+        visits[:self._n] = self._visits[:self._n]
+        dirty = np.zeros(cap, dtype=bool)
+        dirty[:self._n] = self._dirty[:self._n]
+        self._codes, self._values, self._visits, self._dirty = codes, values, visits, dirty
+
+    # ---- satır erişimi ----
+    def row_index(self, code: int, create: bool = True) -> int:
+        """Kodun satır indeksi; yoksa (create=True ise) sıfır satır eklenir, değilse -1."""
+        i = self._index.get(code)
+        if i is None:
+            if not create:
+                return -1
+            self._grow(self._n + 1)
+            i = self._n
+            self._codes[i] = code
+            self._values[i] = 0.0
+            self._visits[i] = 0
+            self._dirty[i] = True
+            self._index[code] = i
+            self._n += 1
+        return i
+
+    def rows_for(self, codes: np.ndarray, create: bool = True) -> np.ndarray:
+        """Toplu kod -> satır indeksi. Yalnızca tekil kodlar hash'ten geçer."""
+        codes = np.asarray(codes, dtype=np.int64)
+        uniq, inv = np.unique(codes, return_inverse=True)
+        rows = np.fromiter((self.row_index(int(c), create) for c in uniq), dtype=np.int64, count=len(uniq))
+        return rows[inv]
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._codes[:self._n]
+
+    @property
+    def values(self) -> np.ndarray:
+        """(n_states, n_actions) Q matrisi (görünüm)."""
+        return self._values[:self._n]
+
+    @property
+    def visits(self) -> np.ndarray:
+        """(n_states, n_actions) ziyaret sayıları (görünüm)."""
+        return self._visits[:self._n]
+
+    def add_visits(self, rows: np.ndarray, a_idx: np.ndarray):
+        np.add.at(self._visits, (rows, a_idx), 1)
+        self._dirty[rows] = True
+
+    def visit(self, code, a_idx: int):
+        i = self._index[code]
+        self._visits[i, a_idx] += 1
+        self._dirty[i] = True
+
+    # ---- değişiklik takibi (artımlı checkpoint) ----
+    # Not: görünüm üzerinden yapılan yazımlar (row[a] += x) yalnızca visit()/add_visits()
+    # ile birlikte kirli sayılır; QLearningAgent güncellemeleri bunu zaten yapar.
+    def dirty_rows(self) -> np.ndarray:
+        return np.flatnonzero(self._dirty[:self._n])
+
+    def clear_dirty(self):
+        self._dirty[:self._n] = False
+
+    # ---- anlık görüntü / birleştirme ----
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(codes, values) kopyaları; süreçler arası taşınabilir."""
+        return self.codes.copy(), self.values.copy()
+
+    def write_qtab(self, path: str):
+        write_qtab(path, self.codes, self.values)
+
+    @classmethod
+    def from_arrays(cls, codes: np.ndarray, values: np.ndarray, visits: Optional[np.ndarray] = None,
+                    dtype=None) -> "ArrayQTable":
+        codes = np.asarray(codes, dtype=np.int64)
+        values = np.asarray(values)
+        table = cls(values.shape[1] if values.ndim == 2 else 3,
+                    dtype=dtype or values.dtype, capacity=max(1024, len(codes)))
+        n = len(codes)
+        table._codes[:n] = codes
+        table._values[:n] = values
+        if visits is not None:
+            table._visits[:n] = visits
+        table._index = {int(c): i for i, c in enumerate(codes.tolist())}
+        table._n = n
+        return table
+
+    def merge_weighted(self, parts: Sequence[Tuple[np.ndarray, np.ndarray, np.ndarray]]):
+        """
+        Paralel eğitim parçalarını (codes, values, visits) ziyaret sayısı ağırlıklı
+        ortalama ile tabloya birleştirir. Hiç ziyaret edilmeyen (state, aksiyon)
+        hücreleri mevcut değerini korur. Parça sırası sonucu değiştirmez.
+        """
+        parts = [p for p in parts if len(p[0])]
+        if not parts:
+            return
+        codes = np.concatenate([p[0] for p in parts])
+        values = np.concatenate([p[1] for p in parts]).astype(np.float64)
+        visits = np.concatenate([p[2] for p in parts]).astype(np.float64)
+        uniq, inv = np.unique(codes, return_inverse=True)
+        wsum = np.zeros((len(uniq), self.n_actions))
+        wcnt = np.zeros((len(uniq), self.n_actions))
+        np.add.at(wsum, inv, values * visits)
+        np.add.at(wcnt, inv, visits)
+
+        rows = self.rows_for(uniq)
+        q = self._values[rows]
+        seen = wcnt > 0
+        q[seen] = wsum[seen] / wcnt[seen]
+        self._values[rows] = q
+        self._visits[rows] += wcnt.astype(np.uint32)
+        self._dirty[rows] = True
+
+    # ---- dict uyumlu arayüz ----
+    def __len__(self) -> int:
+        return self._n
+
+    def __contains__(self, code) -> bool:
+        return code in self._index
+
+    def __getitem__(self, code) -> np.ndarray:
+        return self._values[self._index[code]]
+
+    def __setitem__(self, code, qvals: Iterable[float]):
+        i = self.row_index(code)   # önce ekle: büyüme self._values'ı değiştirebilir
+        self._values[i] = np.asarray(list(qvals), dtype=self.dtype)
+        self._dirty[i] = True
+
+    def get(self, code, default=None):
+        i = self._index.get(code)
+        return default if i is None else self._values[i]
+
+    def keys(self):
+        return self._index.keys()
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def nbytes(self) -> int:
+        return int(self._codes.nbytes + self._values.nbytes + self._visits.nbytes)
+
+    # ---- eski dict formatı ile dönüşüm ----
+    def to_dict(self) -> Dict[str, List[float]]:
+        return {code_to_key(c): [float(v) for v in self._values[i]]
+                for c, i in self._index.items()}
+
+    @classmethod
+    def from_dict(cls, q_dict: Dict[str, Sequence[float]], n_actions: Optional[int] = None,
+                  dtype=np.float64) -> "ArrayQTable":
+        """
+        Eski dict tablosu ("3|18|19|2" / tuple / int kod anahtarlı). Aralık dışı
+        bin içeren anahtarlar (ör. negatif bin) kırpılınca başka bir state'in
+        koduna düşeceğinden alınmaz; sayıları lossy_keys'te tutulur.
+        """
+        if n_actions is None:
+            n_actions = len(next(iter(q_dict.values()))) if q_dict else 3
+        table = cls(n_actions, dtype=dtype, capacity=max(1024, len(q_dict)))
+        lossy = 0
+        for key, qvals in q_dict.items():
+            if isinstance(key, (int, np.integer)):
+                table[int(key)] = qvals
+                continue
+            bins = [int(p) for p in (key.split("|") if isinstance(key, str) else key)]
+            if not bins_in_range(bins):
+                lossy += 1
+                continue
+            table[encode_bins(bins)] = qvals
+        table.lossy_keys = lossy
+        return table
+
+
+# -------------------- Bellek eşlemli (mmap) ikili format --------------------
+# .qtab düzeni (little-endian):
+#   [0:64)    başlık: magic(8) | n_states u64 | n_actions u32 | dtype (8 bayt, örn. "<f8") | boş
+#   [64:...)  codes: n_states x int64, artan sıralı (sabit genişlikli indeks)
+#   [...]     values: n_states x n_actions (float32/float64)
+# Dosya salt-okunur np.memmap ile açılır: açılış O(1), sayfalar işletim sisteminin
+# sayfa önbelleğinden tüm işçiler arasında paylaşılır.
+
+QTAB_MAGIC = b"QTAB0001"
+QTAB_HEADER = 64
+
+def write_qtab(path: str, codes: np.ndarray, values: np.ndarray):
+    """Kodları sıralayıp .qtab dosyası yazar (geçici dosya + os.replace)."""
+    codes = np.asarray(codes, dtype=np.int64)
+    values = np.asarray(values)
+    dtype = np.dtype(values.dtype).newbyteorder("<")
+    order = np.argsort(codes, kind="stable")
+    header = bytearray(QTAB_HEADER)
+    header[0:8] = QTAB_MAGIC
+    header[8:16] = np.array(len(codes), dtype="<u8").tobytes()
+    header[16:20] = np.array(values.shape[1] if values.ndim == 2 else 0, dtype="<u4").tobytes()
+    header[20:28] = dtype.str.encode("ascii").ljust(8, b"\0")
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(codes[order].astype("<i8").tobytes())
+        f.write(values[order].astype(dtype).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class MappedQTable:
+    """
+    .qtab dosyası üzerinde salt-okunur Q tablosu. Arama, eşlenmiş sıralı kod
+    dizisinde ikili aramadır (np.searchsorted); satırlar doğrudan eşlenmiş
+    tampondan okunur, kopya yapılmaz. Yazma denemeleri TypeError verir.
+    """
+    readonly = True
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            header = f.read(QTAB_HEADER)
+        if header[0:8] != QTAB_MAGIC:
+            raise ValueError(f"Geçersiz .qtab dosyası: {path}")
+        n = int(np.frombuffer(header[8:16], dtype="<u8")[0])
+        self.n_actions = int(np.frombuffer(header[16:20], dtype="<u4")[0])
+        self.dtype = np.dtype(header[20:28].rstrip(b"\0").decode("ascii"))
+        self.path = path
+        self._n = n
+        if n:
+            self._codes = np.memmap(path, dtype="<i8", mode="r", offset=QTAB_HEADER, shape=(n,))
+            self._values = np.memmap(path, dtype=self.dtype, mode="r",
+                                     offset=QTAB_HEADER + 8 * n, shape=(n, self.n_actions))
+        else:   # boş dosya eşlenemez
+            self._codes = np.zeros(0, dtype=np.int64)
+            self._values = np.zeros((0, self.n_actions), dtype=self.dtype)
+
+    def _find(self, code) -> int:
+        if not isinstance(code, (int, np.integer)):
+            return -1
+        i = int(np.searchsorted(self._codes, code))
+        return i if i < self._n and self._codes[i] == code else -1
+
+    def row_index(self, code: int, create: bool = False) -> int:
+        if create:
+            raise TypeError("MappedQTable salt-okunurdur")
+        return self._find(code)
+
+    def rows_for(self, codes: np.ndarray, create: bool = False) -> np.ndarray:
+        """Toplu arama; bulunamayan kodlar için -1."""
+        if create:
+            raise TypeError("MappedQTable salt-okunurdur")
+        codes = np.asarray(codes, dtype=np.int64)
+        idx = np.searchsorted(self._codes, codes)
+        idx_c = np.minimum(idx, max(0, self._n - 1))
+        found = (idx < self._n) & (self._codes[idx_c] == codes) if self._n else np.zeros(len(codes), bool)
+        return np.where(found, idx, -1)
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._codes
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __contains__(self, code) -> bool:
+        return self._find(code) >= 0
+
+    def __getitem__(self, code) -> np.ndarray:
+        i = self._find(code)
+        if i < 0:
+            raise KeyError(code)
+        return self._values[i]
+
+    def __setitem__(self, code, qvals):
+        raise TypeError("MappedQTable salt-okunurdur")
+
+    def get(self, code, default=None):
+        i = self._find(code)
+        return default if i < 0 else self._values[i]
+
+    def keys(self):
+        return (int(c) for c in self._codes)
+
+    def __iter__(self):
+        return self.keys()
+
+    def to_dict(self) -> Dict[str, List[float]]:
+        return {code_to_key(int(c)): [float(v) for v in row] for c, row in zip(self._codes, self._values)}
+
+    def to_array_table(self, dtype=None) -> ArrayQTable:
+        """Eğitim için yazılabilir bellek içi kopya."""
+        return ArrayQTable.from_arrays(np.array(self._codes), np.array(self._values), dtype=dtype or self.dtype)
@@ -0,0 +1,107 @@
+# backend/core/rl/replay.py
+"""
+Deneyim tekrarı (experience replay) tamponu.
+
+Geçişler sabit kapasiteli halka dizilerde tutulur; state'ler ArrayQTable
+satır indeksi olarak saklanır (tablo yalnızca sona eklenir, satırlar eğitim
+boyunca kararlıdır):
+    rows[i], actions[i], rewards[i], next_rows[i], priority[i]
+Toplu ekleme tek dilim yazımıdır; dolunca en eski geçişlerin üzerine yazılır.
+
+Örnekleme:
+    uniform      : her geçiş eşit olasılıkla
+    prioritized  : P(i) ∝ priority[i] ** alpha, priority = |TD hatası| + eps;
+                   yeni geçişler görülen en büyük öncelikle eklenir (en az bir
+                   kez örneklensin). Yanlılık önem ağırlıklarıyla düzeltilir:
+                   w = (N * P(i)) ** -beta / max(w).
+Öncelikli örnekleme kümülatif toplam + ikili aramayla yapılır (örnek başına
+O(log N), örnekleme çağrısı başına bir O(N) cumsum).
+"""
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+
+@dataclass
+class ReplayConfig:
+    capacity: int = 100_000
+    batch_size: int = 256
+    updates_per_step: int = 1        # ortam adımı başına tampondan yapılan toplu güncelleme
+    prioritized: bool = False
+    alpha: float = 0.6               # öncelik üssü (0: uniform)
+    beta: float = 0.4                # önem ağırlığı üssü (1: tam düzeltme)
+    eps: float = 1e-3                # sıfır TD hatalı geçişler de örneklenebilsin
+
+class ReplayBuffer:
+    def __init__(self, capacity: int, prioritized: bool = False, alpha: float = 0.6,
+                 beta: float = 0.4, eps: float = 1e-3):
+        if capacity < 1:
+            raise ValueError("capacity en az 1 olmalı")
+        self.capacity = int(capacity)
+        self.prioritized = prioritized
+        self.alpha, self.beta, self.eps = alpha, beta, eps
+        self.rows = np.zeros(self.capacity, dtype=np.int64)
+        self.actions = np.zeros(self.capacity, dtype=np.int64)
+        self.rewards = np.zeros(self.capacity)
+        self.next_rows = np.zeros(self.capacity, dtype=np.int64)
+        self.priority = np.zeros(self.capacity)
+        self._head = 0     # toplam yazım sayısı
+        self.sampled = 0   # toplam örneklenen geçiş
+        self._max_priority = 1.0
+
+    @classmethod
+    def from_config(cls, cfg: ReplayConfig) -> "ReplayBuffer":
+        return cls(cfg.capacity, prioritized=cfg.prioritized, alpha=cfg.alpha, beta=cfg.beta, eps=cfg.eps)
+
+    def __len__(self) -> int:
+        return min(self._head, self.capacity)
+
+    def add(self, rows, actions, rewards, next_rows):
+        """Toplu geçiş ekleme (n,) diziler; n > capacity ise son capacity kadarı tutulur."""
+        rows = np.asarray(rows, dtype=np.int64)
+        n = len(rows)
+        if n == 0:
+            return
+        keep = slice(max(0, n - self.capacity), n)
+        slots = (self._head + np.arange(n)[keep]) % self.capacity
+        self.rows[slots] = rows[keep]
+        self.actions[slots] = np.asarray(actions, dtype=np.int64)[keep]
+        self.rewards[slots] = np.asarray(rewards, dtype=np.float64)[keep]
+        self.next_rows[slots] = np.asarray(next_rows, dtype=np.int64)[keep]
+        self.priority[slots] = self._max_priority
+        self._head += n
+
+    def sample(self, batch_size: int, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+        """
+        batch_size geçiş (iadeli). Dönüş: idx, rows, actions, rewards, next_rows,
+        weights (uniform örneklemede hepsi 1).
+        """
+        size = len(self)
+        if size == 0:
+            raise ValueError("Tampon boş")
+        self.sampled += batch_size
+        if self.prioritized:
+            p = self.priority[:size] ** self.alpha
+            cum = np.cumsum(p)
+            idx = np.minimum(np.searchsorted(cum, rng.random(batch_size) * cum[-1], side="right"), size - 1)
+            w = (size * p[idx] / cum[-1]) ** -self.beta
+            weights = w / w.max()
+        else:
+            idx = rng.integers(0, size, batch_size)
+            weights = np.ones(batch_size)
+        return {
+            "idx": idx,
+            "rows": self.rows[idx],
+            "actions": self.actions[idx],
+            "rewards": self.rewards[idx],
+            "next_rows": self.next_rows[idx],
+            "weights": weights,
+        }
+
+    def update_priorities(self, idx: np.ndarray, td_error: np.ndarray):
+        """Örneklenen geçişlerin önceliği yeni |TD hatası| ile güncellenir."""
+        if not self.prioritized:
+            return
+        pr = np.abs(np.asarray(td_error, dtype=np.float64)) + self.eps
+        self.priority[idx] = pr
+        self._max_priority = max(self._max_priority, float(pr.max()))
@@ -0,0 +1,92 @@
+# backend/core/rl/telemetry.py
+"""
+Eğitim telemetrisi: episode başına yapılandırılmış kayıtlar.
+
+fit(telemetry=...) her episode sonunda bir kayıt yazar:
+    episode, mean_reward, total_reward, td_abs_mean, epsilon,
+    new_states, states, visit_hist, seconds
+Kayıtlar bellekte sınırlı bir halka tamponda (deque) tutulur ve artan sıra
+numarası (seq) alır; okuyucular (SSE akışı) kaldıkları seq'ten devam eder ve
+yeni kayıt gelene kadar koşul değişkeninde bekler. Yazıcı tek (eğitim
+thread'i), okuyucu birden fazla olabilir.
+
+visit_hist: state başına toplam ziyaret sayısının log2 kovalarına dağılımı;
+kova i, ziyaret sayısı [VISIT_EDGES[i-1], VISIT_EDGES[i]) aralığındaki state
+sayısıdır (ilk kova 0 ziyaret, son kova >= son sınır).
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_MAX_EVENTS = 10_000
+VISIT_EDGES = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+def visit_histogram(visits: Optional[np.ndarray]) -> Optional[List[int]]:
+    """(state, aksiyon) ziyaret matrisi -> state başına toplamın log2 kova sayıları."""
+    if visits is None:
+        return None
+    per_state = np.asarray(visits).sum(axis=1, dtype=np.int64)
+    bucket = np.searchsorted(VISIT_EDGES, per_state, side="right")
+    return np.bincount(bucket, minlength=len(VISIT_EDGES) + 1).tolist()
+
+def visit_labels() -> List[str]:
+    """visit_hist kovalarının okunur etiketleri ("0", "1", "2-3", ..., "1024+")."""
+    out = ["0"]
+    for lo, hi in zip(VISIT_EDGES, VISIT_EDGES[1:]):
+        out.append(str(lo) if hi - lo == 1 else f"{lo}-{hi - 1}")
+    return out + [f"{VISIT_EDGES[-1]}+"]
+
+class TrainingTelemetry:
+    def __init__(self, max_events: int = DEFAULT_MAX_EVENTS):
+        self._events: deque = deque(maxlen=max_events)
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._closed = False
+        self._t0 = time.perf_counter()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def record(self, **event: Any) -> Dict[str, Any]:
+        """Episode kaydı ekler; bekleyen okuyucular uyandırılır."""
+        with self._cond:
+            self._seq += 1
+            event = dict(event, seq=self._seq, seconds=round(time.perf_counter() - self._t0, 4))
+            self._events.append(event)
+            self._cond.notify_all()
+        return event
+
+    def close(self):
+        """Eğitim bitti: akışlar tampondakileri verip sonlanır."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def since(self, seq: int = 0) -> List[Dict[str, Any]]:
+        """seq'ten sonraki kayıtlar (tamponda kalanlar)."""
+        with self._cond:
+            return self._since(seq)
+
+    def _since(self, seq: int) -> List[Dict[str, Any]]:
+        if not self._events or self._events[-1]["seq"] <= seq:
+            return []
+        skip = max(0, seq - self._events[0]["seq"] + 1)
+        return [self._events[i] for i in range(skip, len(self._events))]
+
+    def wait(self, seq: int = 0, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """seq'ten sonra kayıt gelene, akış kapanana ya da timeout dolana kadar bekler."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > seq or self._closed, timeout=timeout)
+            return self._since(seq)
+
+    def last(self) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            return self._events[-1] if self._events else None
@@ -1,55 +1,64 @@
-import matplotlib.pyplot as plt
-from .env_definition import PricingEnv
+from typing import Any, Dict, List, Optional
+
+from .env_definition import EnhancedPricingEnv
 from .qlearning_agent import QLearningAgent
+from .telemetry import TrainingTelemetry
+from backend.core.rules_guard import CostParams
 
-def train_agent(product_info, episodes=200):
+def train_agent(product_info, episodes=200, q_table_path="data/q_table.pkl",
+                plot_path: Optional[str] = None, telemetry: Optional[TrainingTelemetry] = None,
+                seed: Optional[int] = None):
     """
     Q-learning ajanını belirtilen ürün bilgisi ile eğitir ve Q-tablosunu kaydeder.
+    Episode kayıtları telemetriye yazılır (verilmezse yeni bir tampon); ödül
+    grafiği istenirse plot_path'e dosya olarak çizilir (ekran/pencere açılmaz,
+    başsız sunucularda bloklamaz).
     """
     # Ortam ve ajanı başlat
-    env = PricingEnv(product_info)
-    agent = QLearningAgent(env.action_space)
-
-    rewards = []
-
-    for ep in range(episodes):
-        state_vec = env.reset()
-        state = {
-            "stock_level": state_vec[0],
-            "last_price": state_vec[1],
-            "competitor_price": state_vec[2],
-            "sales_last_week": state_vec[3]
-        }
-        total_reward = 0
-        done = False
-
-        while not done:
-            action = agent.choose_action(state)
-            next_vec, reward, done, _ = env.step(action)
-            next_state = {
-                "stock_level": next_vec[0],
-                "last_price": next_vec[1],
-                "competitor_price": next_vec[2],
-                "sales_last_week": next_vec[3]
-            }
-            agent.learn(state, action, reward, next_state)
-            state = next_state
-            total_reward += reward
-
-        rewards.append(total_reward)
+    env = EnhancedPricingEnv()
+    agent = QLearningAgent(env.action_space, q_backend="array")
+    base_price = float(product_info.get("base_price", 100.0))
+    state = {
+        "stock_level": float(product_info.get("stock_level", 100.0)),
+        "last_price": base_price,
+        "competitor_price": float(product_info.get("competitor_price", base_price)),
+        "sales_last_week": float(product_info.get("sales_last_week", 10.0)),
+    }
+    costs = CostParams(unit_cost=float(product_info.get("unit_cost", 60.0)))
+
+    telemetry = telemetry if telemetry is not None else TrainingTelemetry()
+    agent.fit(env, [state], costs, episodes=episodes, batched=True, seed=seed, telemetry=telemetry)
 
     # Q-table kaydet
-    agent.save_q_table("data/q_table.pkl")
+    if q_table_path:
+        agent.save_q_table(q_table_path)
 
     # Eğitim sonrası ödül grafiği
-    plt.figure(figsize=(10, 5))
-    plt.plot(rewards, label="Toplam Ödül")
-    plt.title("Eğitim Süreci")
-    plt.xlabel("Episode")
-    plt.ylabel("Ödül")
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
-    plt.show()
+    if plot_path:
+        plot_training(telemetry.since(0), plot_path)
 
     return agent
+
+def plot_training(events: List[Dict[str, Any]], path: str):
+    """
+    Ödül ve ortalama |TD hatası| eğrilerini dosyaya çizer. pyplot yerine
+    doğrudan Figure kullanılır: global backend/pencere durumu yok, thread'lerden
+    güvenle çağrılabilir.
+    """
+    from matplotlib.figure import Figure
+
+    episodes = [e["episode"] for e in events]
+    fig = Figure(figsize=(10, 5))
+    ax_reward, ax_td = fig.subplots(1, 2)
+    ax_reward.plot(episodes, [e["mean_reward"] for e in events], label="Ortalama Ödül")
+    ax_reward.set_title("Eğitim Süreci")
+    ax_reward.set_xlabel("Episode")
+    ax_reward.set_ylabel("Ödül")
+    ax_reward.legend()
+    ax_reward.grid(True)
+    ax_td.plot(episodes, [e.get("td_abs_mean") for e in events], color="tab:orange", label="|TD hatası|")
+    ax_td.set_xlabel("Episode")
+    ax_td.legend()
+    ax_td.grid(True)
+    fig.tight_layout()
+    fig.savefig(path)
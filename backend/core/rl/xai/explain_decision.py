@@ -1,8 +1,20 @@
+# Açıklama kodları: 0-2 aksiyon gerekçeleri, 3-4 karar dayanağı zayıf durumlar
+EXPLAIN_TIE = 3      # Q değerleri eşit (state görülmüş ama ayrışmamış)
+EXPLAIN_UNSEEN = 4   # state eğitimde hiç görülmemiş
+
+REASONS = {
+    0: "Stok fazlası veya talep düşük → fiyat düşürmek mantıklı.",
+    1: "Durum stabil → fiyatı koru.",
+    2: "Talep yüksek veya rekabet zayıf → fiyat artırmak kârlı.",
+    EXPLAIN_TIE: "Öğrenilen değerler aksiyonları ayırt etmiyor → varsayılan karar uygulandı.",
+    EXPLAIN_UNSEEN: "Bu durum eğitimde görülmedi → varsayılan karar uygulandı.",
+}
+
 def explain_action(state: dict, q_values: list):
-    action = int(q_values.index(max(q_values)))
-    reasons = {
-        0: "Stok fazlası veya talep düşük → fiyat düşürmek mantıklı.",
-        1: "Durum stabil → fiyatı koru.",
-        2: "Talep yüksek veya rekabet zayıf → fiyat artırmak kârlı."
-    }
-    return reasons.get(action, "Karar açıklanamıyor.")
+    # list veya NumPy satırı olabilir; ilk en büyük değerin indeksi
+    action = max(range(len(q_values)), key=lambda i: q_values[i])
+    return REASONS.get(action, "Karar açıklanamıyor.")
+
+def explain_code(code: int) -> str:
+    """Derlenmiş politikadaki açıklama kodunun metni."""
+    return REASONS.get(int(code), "Karar açıklanamıyor.")
@@ -1,6 +1,11 @@
 # backend/core/rules_guard.py
-from dataclasses import dataclass
-from typing import Dict
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Iterable, Mapping, Sequence, Tuple, Union
+
+import numpy as np
 
 @dataclass
 class CostParams:
@@ -72,3 +77,216 @@ def breakdown(price: float, cp: CostParams) -> Dict:
             "other_fixed_cost": cp.other_fixed_cost,
         }
     }
+
+
+# -------------------- Vektörel (NumPy) motor --------------------
+# Yukarıdaki skaler fonksiyonların dizi karşılıkları. Aynı işlem sırası
+# korunduğu için sonuçlar skaler fonksiyonlarla birebir (bit düzeyinde) aynıdır.
+
+_COST_FIELDS = tuple(f.name for f in fields(CostParams))
+
+@dataclass
+class CostArrays:
+    """CostParams'ın sütunsal (struct-of-arrays) hali; her alan float64 dizi."""
+    unit_cost: np.ndarray
+    commission_pct: np.ndarray
+    payment_fee_pct: np.ndarray
+    tax_pct: np.ndarray
+    shipping_cost: np.ndarray
+    packaging_cost: np.ndarray
+    other_fixed_cost: np.ndarray
+    min_margin_pct: np.ndarray
+
+    @classmethod
+    def from_params(cls, cps: Iterable[CostParams]) -> "CostArrays":
+        cps = list(cps)
+        return cls(**{
+            name: np.fromiter((getattr(cp, name) for cp in cps), dtype=np.float64, count=len(cps))
+            for name in _COST_FIELDS
+        })
+
+    @classmethod
+    def from_columns(cls, **cols: Sequence[float]) -> "CostArrays":
+        """Eksik sütunlar CostParams varsayılanı ile doldurulur; skalerler yayınlanır (broadcast)."""
+        default = CostParams()
+        arrs = {name: np.asarray(cols.get(name, getattr(default, name)), dtype=np.float64)
+                for name in _COST_FIELDS}
+        shape = np.broadcast_shapes(*(a.shape for a in arrs.values()))
+        return cls(**{name: np.broadcast_to(a, shape) for name, a in arrs.items()})
+
+    @classmethod
+    def repeat(cls, cp: CostParams, n: int) -> "CostArrays":
+        return cls(**{name: np.full(n, getattr(cp, name), dtype=np.float64) for name in _COST_FIELDS})
+
+    def __len__(self) -> int:
+        return len(self.unit_cost)
+
+    def take(self, idx) -> "CostArrays":
+        return CostArrays(**{name: getattr(self, name)[idx] for name in _COST_FIELDS})
+
+    def row(self, i: int) -> CostParams:
+        return CostParams(**{name: float(getattr(self, name)[i]) for name in _COST_FIELDS})
+
+def pct_total_arr(ca: CostArrays) -> np.ndarray:
+    return np.maximum(0.0, np.minimum(0.95, ca.commission_pct + ca.payment_fee_pct + ca.tax_pct))
+
+def fixed_total_arr(ca: CostArrays) -> np.ndarray:
+    return np.maximum(0.0, ca.shipping_cost + ca.packaging_cost + ca.other_fixed_cost)
+
+def profit_arr(price, ca: CostArrays) -> np.ndarray:
+    """Net kâr (TL), dizi."""
+    price = np.asarray(price, dtype=np.float64)
+    return price * (1 - pct_total_arr(ca)) - ca.unit_cost - fixed_total_arr(ca)
+
+def margin_pct_arr(price, ca: CostArrays) -> np.ndarray:
+    """Kâr marjı (kâr/fiyat), dizi; price <= 0 için -1."""
+    price = np.asarray(price, dtype=np.float64)
+    net = profit_arr(price, ca)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(price <= 0, -1.0, net / np.where(price <= 0, 1.0, price))
+
+def _price_for_denom(ca: CostArrays, denom: np.ndarray) -> np.ndarray:
+    num = ca.unit_cost + fixed_total_arr(ca)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denom <= 0.000001, np.inf, num / np.where(denom <= 0.000001, 1.0, denom))
+
+def break_even_price_arr(ca: CostArrays) -> np.ndarray:
+    """Kâra sıfır geçiş fiyatı, dizi."""
+    return _price_for_denom(ca, 1 - pct_total_arr(ca))
+
+def target_price_for_margin_arr(ca: CostArrays, target_margin_pct=None) -> np.ndarray:
+    """Hedef marj için gereken fiyat, dizi. target verilmezse ca.min_margin_pct kullanılır."""
+    target = ca.min_margin_pct if target_margin_pct is None else np.asarray(target_margin_pct, dtype=np.float64)
+    return _price_for_denom(ca, (1 - pct_total_arr(ca)) - target)
+
+def breakdown_arr(price, ca: CostArrays) -> Dict[str, np.ndarray]:
+    """Fiyat vektörü için sütunsal döküm: kâr, marj, başabaş ve min marj fiyatları."""
+    price = np.asarray(price, dtype=np.float64)
+    pct = pct_total_arr(ca)
+    fixed = fixed_total_arr(ca)
+    net = price * (1 - pct) - ca.unit_cost - fixed
+    with np.errstate(divide="ignore", invalid="ignore"):
+        margin = np.where(price <= 0, -1.0, net / np.where(price <= 0, 1.0, price))
+    return {
+        "price": price,
+        "percentage_fees_total_pct": pct,
+        "fixed_fees_total": fixed,
+        "unit_cost": ca.unit_cost,
+        "net_profit": net,
+        "margin_pct": margin,
+        "break_even": break_even_price_arr(ca),
+        "min_margin_price": target_price_for_margin_arr(ca),
+    }
+
+
+# -------------------- Guard önbelleği --------------------
+# Katalogdaki ürünlerin çoğu birkaç düzine maliyet profilini paylaşır
+# (komisyon kademesi x kargo sınıfı). Profilden türetilen guard değerleri
+# kanonik profil anahtarıyla sınırlı bir LRU önbellekte tutulur.
+
+@dataclass(frozen=True)
+class GuardValues:
+    """Bir maliyet profilinden türetilen, fiyattan bağımsız değerler."""
+    cp: CostParams
+    pct_total: float
+    fixed_total: float
+    break_even: float
+    min_margin_price: float
+
+    @classmethod
+    def compute(cls, cp: CostParams) -> "GuardValues":
+        return cls(cp=cp, pct_total=_pct_total(cp), fixed_total=_fixed_total(cp),
+                   break_even=break_even_price(cp),
+                   min_margin_price=target_price_for_margin(cp, cp.min_margin_pct))
+
+    def breakdown(self, price: float) -> Dict:
+        """breakdown(price, cp) ile aynı sonuç; yüzdesel/sabit toplamlar önbellekten."""
+        cp = self.cp
+        net = price * (1 - self.pct_total) - cp.unit_cost - self.fixed_total
+        return {
+            "price": price,
+            "percentage_fees_total_pct": self.pct_total,
+            "fixed_fees_total": self.fixed_total,
+            "unit_cost": cp.unit_cost,
+            "net_profit": net,
+            "margin_pct": -1.0 if price <= 0 else net / price,
+            "components": {
+                "commission_pct": cp.commission_pct,
+                "payment_fee_pct": cp.payment_fee_pct,
+                "tax_pct": cp.tax_pct,
+                "shipping_cost": cp.shipping_cost,
+                "packaging_cost": cp.packaging_cost,
+                "other_fixed_cost": cp.other_fixed_cost,
+            }
+        }
+
+CostProfile = Union[CostParams, Mapping[str, Any], Tuple[float, ...]]
+
+def profile_key(profile: CostProfile) -> Tuple[float, ...]:
+    """
+    Kanonik profil anahtarı: CostParams alan sırasıyla float tuple.
+    Eksik alanlar varsayılanla doldurulur; 60 ile 60.0 ve -0.0 ile 0.0 aynı anahtardır.
+    """
+    if isinstance(profile, tuple):   # zaten kanonik
+        return profile
+    if isinstance(profile, CostParams):
+        return tuple(float(getattr(profile, f)) + 0.0 for f in _COST_FIELDS)
+    return tuple(float(profile.get(f, _DEFAULT_COSTS[i])) + 0.0 for i, f in enumerate(_COST_FIELDS))
+
+_DEFAULT_COSTS = profile_key(CostParams())
+
+class GuardCache:
+    """İş parçacığı güvenli, sınırlı LRU önbellek: profil anahtarı -> GuardValues."""
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = max(0, int(maxsize))
+        self._data: "OrderedDict[Tuple[float, ...], GuardValues]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, profile: CostProfile) -> GuardValues:
+        key = profile_key(profile)
+        with self._lock:
+            gv = self._data.get(key)
+            if gv is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return gv
+            self.misses += 1
+        gv = GuardValues.compute(CostParams(*key))
+        if self.maxsize:
+            with self._lock:
+                self._data[key] = gv
+                self._evict()
+        return gv
+
+    def _evict(self):
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def resize(self, maxsize: int):
+        with self._lock:
+            self.maxsize = max(0, int(maxsize))
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0}
+
+# GUARD_CACHE_SIZE=0 önbelleği kapatır (her çağrı yeniden hesaplar)
+GUARD_CACHE = GuardCache(int(os.getenv("GUARD_CACHE_SIZE", "256")))
+
+def guard_values(profile: CostProfile) -> GuardValues:
+    return GUARD_CACHE.get(profile)
@@ -1,8 +1,14 @@
+import time
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from backend.api.agent_api import router as agent_router
+from backend.api.retrain_api import router as retrain_router
+from backend.api.cost_profile_api import router as cost_profile_router
+from backend.api.forecast_api import router as forecast_router
+from backend.api.competitor_api import router as competitor_router
+from backend.api import agent_api, metrics_api
 
 app = FastAPI(
     title="🧠 Cognitive Commerce API",
@@ -16,7 +22,12 @@ app.add_middleware(
     allow_methods=["*"], allow_headers=["*"],
 )
 
+metrics_api.install(app)          # /metrics + istek süreleri
 app.include_router(agent_router)  # prefix YOK
+app.include_router(retrain_router)
+app.include_router(cost_profile_router)
+app.include_router(forecast_router)
+app.include_router(competitor_router)
 
 app.mount("/static", StaticFiles(directory="frontend"), name="frontend")
 
@@ -24,6 +35,15 @@ app.mount("/static", StaticFiles(directory="frontend"), name="frontend")
 async def root():
     return FileResponse("frontend/index.html")
 
+STARTED_AT = time.time()
+
 @app.get("/health")
-async def health():
-    return {"message": "✅ Cognitive Commerce Platform is up and running."}
+def health():
+    ag = agent_api.current_agent()
+    return {
+        "message": "✅ Cognitive Commerce Platform is up and running.",
+        "status": "ok",
+        "uptime_seconds": round(time.time() - STARTED_AT, 1),
+        "model_version": ag.version,
+        "q_states": len(ag.q_table),
+    }
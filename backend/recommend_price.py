@@ -1,9 +1,246 @@
-from backend.demand_forecast import forecast_demand
-from backend.cps_score import analyze_competitors
-from backend.rules_guard import apply_pricing_rules
+# backend/recommend_price.py
+"""
+Toplu fiyatlama hattı: katalog (DataFrame) -> önerilen fiyatlar.
+
+Aşamalar tüm SKU partisi üzerinde dizi olarak çalışır:
+    1) rakip analizi  rakip deposu > katalogdaki competitor_price > uzun biçimli
+                      rakip gözlemleri (cps_score.analyze_competitors_arr)
+    2) RL kararı      ajanın derlenmiş politikası (lookup_many), aksiyon -> fiyat
+    3) kurallar       rules_guard dizi motoru: min marj fiyatı, başabaş, kâr/marj
+    4) talep          önerilen fiyatta talep tahmini (SKU modeli varsa
+                      ForecastStore, yoksa DemandModel / predict_sales)
+
+Katalog sütunları: sku_id, last_price, stock_level, sales_last_week
+(+ opsiyonel competitor_price, elasticity, maliyet alanları: unit_cost,
+commission_pct, ...; eksik maliyet alanları CostParams varsayılanıdır).
+
+Komut satırı (katalog dosyasını parça parça yeniden fiyatlar):
+    python -m backend.recommend_price catalog.csv -o priced.csv
+"""
+import argparse
+import os
+import sys
+from dataclasses import fields
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from backend.core.competitor_store import CompetitorPriceStore
+from backend.core.cps_score import analyze_competitors, analyze_competitors_arr, cps_score_arr
+from backend.core.forecasting import ForecastStore
+from backend.core.rl.demand_simulator import DemandModel
+from backend.core.rl.discretizer import Discretizer
+from backend.core.rl.env_definition import PricingEnv
+from backend.core.rl.model_store import SnapshotStore
+from backend.core.rl.qlearning_agent import QLearningAgent
+from backend.core.rl.qtable import encode_bins_arr
+from backend.core.rules_guard import (
+    CostArrays, CostParams, break_even_price_arr, breakdown_arr, target_price_for_margin_arr,
+)
+
+CATALOG_COLUMNS = ("sku_id", "last_price", "stock_level", "sales_last_week")
+COST_COLUMNS = tuple(f.name for f in fields(CostParams))
+DEFAULT_ELASTICITY = -1.2
+
+def load_agent(snapshot_dir: Optional[str] = "backend/data/snapshots",
+               checkpoint: Optional[str] = "backend/data/q_table.npz") -> QLearningAgent:
+    """Servis edilen ajan: aktif snapshot, yoksa checkpoint, o da yoksa boş tablo."""
+    action_space = PricingEnv({"base_price": 100.0, "unit_cost": 60.0}).action_space
+    ag = QLearningAgent(action_space=action_space, q_backend="array")
+    store = SnapshotStore(snapshot_dir) if snapshot_dir else None
+    version = store.active_version() if store is not None and os.path.isdir(snapshot_dir) else None
+    if version:
+        ag.q_table = store.load_table(version, len(action_space))
+        ag.discretizer = Discretizer.from_meta(store.meta(version).get("discretization"))
+        ag.version = version
+        ag.policy = store.load_policy(version)
+    elif checkpoint and os.path.exists(checkpoint):
+        ag.load_q_table(checkpoint)
+    if ag.policy is None:
+        ag.compile_policy()
+    return ag
+
+class PricingPipeline:
+    def __init__(self, agent: QLearningAgent, forecasts: Optional[ForecastStore] = None,
+                 competitors: Optional[CompetitorPriceStore] = None, competitor_stat: str = "median",
+                 competitor_window: float = 7 * 24 * 3600.0, default_costs: Optional[CostParams] = None):
+        if agent.policy is None:
+            agent.compile_policy()
+        self.agent = agent
+        self.forecasts = forecasts
+        self.competitors = competitors
+        self.competitor_stat = competitor_stat
+        self.competitor_window = competitor_window
+        self.default_costs = default_costs or CostParams()
+
+    # ---- aşamalar ----
+    def competitor_prices(self, catalog: pd.DataFrame,
+                          observations: Optional[pd.DataFrame] = None) -> np.ndarray:
+        """SKU başına rakip fiyatı (n,); hiçbir kaynakta yoksa NaN."""
+        n = len(catalog)
+        out = np.full(n, np.nan)
+        if observations is not None and len(observations):
+            pos = pd.Index(catalog["sku_id"].astype(str)).get_indexer(observations["sku_id"].astype(str))
+            out = analyze_competitors_arr(pos, observations["price"].to_numpy(np.float64), n)
+        if "competitor_price" in catalog.columns:
+            given = pd.to_numeric(catalog["competitor_price"], errors="coerce").to_numpy(np.float64)
+            out = np.where(np.isfinite(given) & (given > 0), given, out)
+        if self.competitors is not None and len(self.competitors):
+            stored = self.competitors.competitor_price(catalog["sku_id"].astype(str).tolist(),
+                                                       stat=self.competitor_stat, window=self.competitor_window)
+            out = np.where(np.isfinite(stored), stored, out)
+        return out
+
+    def decide(self, cols: Dict[str, np.ndarray]):
+        """RL aksiyonları -> (aksiyon, RL fiyatı, güven, açıklama kodu)."""
+        ag = self.agent
+        codes = encode_bins_arr(ag.get_state_bins_arr(
+            cols["stock_level"], cols["last_price"], cols["competitor_price"], cols["sales_last_week"]))
+        actions, confidence, xai = ag.policy.lookup_many(codes)
+        pct = np.asarray(ag.action_space, dtype=np.float64)[actions]
+        return actions, np.round(cols["last_price"] * (1 + pct), 2), confidence, xai
+
+    def costs(self, catalog: pd.DataFrame) -> CostArrays:
+        d = self.default_costs
+        cols = {}
+        for name in COST_COLUMNS:
+            if name in catalog.columns:
+                v = pd.to_numeric(catalog[name], errors="coerce").to_numpy(np.float64)
+                cols[name] = np.where(np.isfinite(v), v, getattr(d, name))
+            else:
+                cols[name] = np.full(len(catalog), getattr(d, name))
+        return CostArrays.from_columns(**cols)
+
+    def demand(self, catalog: pd.DataFrame, price: np.ndarray, comp: np.ndarray,
+               week: Optional[int] = None) -> np.ndarray:
+        """
+        Önerilen fiyatta beklenen satış; SKU modeli varsa esneklik/mevsimsellik
+        depodan. week verilmezse mevsimsellik nötrdür (API ile aynı).
+        """
+        n = len(catalog)
+        el = np.full(n, DEFAULT_ELASTICITY)
+        season = np.ones(n)
+        if self.forecasts is not None and len(self.forecasts):
+            p = self.forecasts.season_at(catalog["sku_id"].astype(str).tolist(), 1 if week is None else week)
+            el = np.where(p["known"], p["elasticity"], el)
+            if week is not None:
+                season = np.where(p["known"], p["seasonality"], season)
+        if "elasticity" in catalog.columns:
+            given = pd.to_numeric(catalog["elasticity"], errors="coerce").to_numpy(np.float64)
+            el = np.where(np.isfinite(given), given, el)
+        return DemandModel(el, season.reshape(-1, 1)).predict(
+            catalog["sales_last_week"].to_numpy(np.float64), price, comp)
+
+    # ---- uçtan uca ----
+    def run(self, catalog: pd.DataFrame, observations: Optional[pd.DataFrame] = None,
+            week: Optional[int] = None) -> pd.DataFrame:
+        """
+        Katalog partisi -> öneri tablosu (girdi sırasıyla). Rakip fiyatı
+        bulunamayan SKU'larda kendi fiyatı kullanılır (skor 0).
+        observations: opsiyonel uzun biçimli rakip gözlemleri (sku_id, price).
+        """
+        missing = [c for c in CATALOG_COLUMNS if c not in catalog.columns]
+        if missing:
+            raise ValueError(f"Eksik sütunlar: {', '.join(missing)}")
+        catalog = catalog.reset_index(drop=True)
+        last_price = pd.to_numeric(catalog["last_price"], errors="coerce").to_numpy(np.float64)
+        comp = self.competitor_prices(catalog, observations)
+        has_comp = np.isfinite(comp)
+        comp = np.where(has_comp, comp, last_price)
+        cols = {
+            "stock_level": pd.to_numeric(catalog["stock_level"], errors="coerce").to_numpy(np.float64),
+            "last_price": last_price,
+            "competitor_price": comp,
+            "sales_last_week": pd.to_numeric(catalog["sales_last_week"], errors="coerce").to_numpy(np.float64),
+        }
+        actions, rl_price, confidence, xai = self.decide(cols)
+
+        ca = self.costs(catalog)
+        guard = target_price_for_margin_arr(ca)
+        applied = rl_price < guard
+        final = np.where(applied, np.round(guard, 2), rl_price)
+        brk = breakdown_arr(final, ca)
+        sales = self.demand(catalog, final, comp, week)
+        return pd.DataFrame({
+            "sku_id": catalog["sku_id"].to_numpy(),
+            "last_price": last_price,
+            "competitor_price": np.where(has_comp, comp, np.nan),
+            "cps_score": np.where(has_comp, cps_score_arr(final, comp), 0.0),
+            "recommended_action": actions,
+            "rl_price": rl_price,
+            "recommended_price": final,
+            "guard_applied": applied,
+            "break_even": np.round(break_even_price_arr(ca), 2),
+            "min_margin_price": np.round(guard, 2),
+            "net_profit": np.round(brk["net_profit"], 2),
+            "margin_pct": brk["margin_pct"],
+            "expected_sales": np.round(sales, 2),
+            "confidence": np.round(confidence, 4),
+            "xai_code": xai,
+            "model_version": self.agent.version,
+        })
+
+    def run_file(self, source, out_path: str, chunk_rows: int = 100_000,
+                 week: Optional[int] = None) -> Dict[str, Any]:
+        """Katalog CSV'sini parça parça fiyatlayıp out_path'e yazar."""
+        rows, guarded = 0, 0
+        header = True
+        tmp = f"{out_path}.tmp-{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            for chunk in pd.read_csv(source, chunksize=chunk_rows, dtype={"sku_id": str}):
+                res = self.run(chunk, week=week)
+                res.to_csv(f, index=False, header=header)
+                header = False
+                rows += len(res)
+                guarded += int(res["guard_applied"].sum())
+        os.replace(tmp, out_path)
+        return {"rows": rows, "guard_applied": guarded, "output": out_path, "model_version": self.agent.version}
+
+# -------------------- Tekil (geri uyum) --------------------
+_default_pipeline: Optional[PricingPipeline] = None
 
 def recommend_price_for_sku(sku_id, current_price, cost, sales_history, competitor_data, stock):
-    avg_sales = forecast_demand(sales_history)
-    avg_competitor_price = analyze_competitors(competitor_data)
-    recommended_price = apply_pricing_rules(current_price, cost, avg_sales, avg_competitor_price, stock)
-    return recommended_price
+    """Tek SKU için önerilen fiyat (toplu hattın tek satırlık çağrısı)."""
+    global _default_pipeline
+    if _default_pipeline is None:
+        _default_pipeline = PricingPipeline(load_agent())
+    comp = analyze_competitors(competitor_data or [])
+    sales = list(sales_history or [])
+    row = pd.DataFrame({
+        "sku_id": [str(sku_id)],
+        "last_price": [float(current_price)],
+        "stock_level": [float(stock)],
+        "sales_last_week": [float(np.mean(sales)) if sales else 0.0],
+        "competitor_price": [comp if comp > 0 else np.nan],
+        "unit_cost": [float(cost)],
+    })
+    return float(_default_pipeline.run(row)["recommended_price"].iloc[0])
+
+# -------------------- Komut satırı --------------------
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Katalog dosyasını toplu yeniden fiyatlar")
+    ap.add_argument("catalog", help="CSV: sku_id, last_price, stock_level, sales_last_week [, competitor_price, maliyetler]")
+    ap.add_argument("-o", "--output", required=True)
+    ap.add_argument("--snapshots", default=os.environ.get("QTABLE_SNAPSHOT_DIR", "backend/data/snapshots"))
+    ap.add_argument("--checkpoint", default="backend/data/q_table.npz")
+    ap.add_argument("--forecast", default=os.environ.get("FORECAST_STORE_PATH", "backend/data/forecast.npz"))
+    ap.add_argument("--competitors", default=os.environ.get("COMPETITOR_STORE_PATH", "backend/data/competitors.npz"))
+    ap.add_argument("--competitor-stat", default="median")
+    ap.add_argument("--week", type=int, default=None, help="Takvim haftası (varsayılan: bugünün ISO haftası)")
+    ap.add_argument("--chunk-rows", type=int, default=100_000)
+    args = ap.parse_args(argv)
+
+    pipeline = PricingPipeline(
+        load_agent(args.snapshots, args.checkpoint),
+        forecasts=ForecastStore.load(args.forecast) if os.path.exists(args.forecast) else None,
+        competitors=CompetitorPriceStore.load(args.competitors) if os.path.exists(args.competitors) else None,
+        competitor_stat=args.competitor_stat,
+    )
+    week = pd.Timestamp.today().isocalendar()[1] if args.week is None else args.week   # toplu iş: bugün açıkça
+    info = pipeline.run_file(args.catalog, args.output, chunk_rows=args.chunk_rows, week=week)
+    print(f"{info['rows']} SKU fiyatlandı ({info['guard_applied']} margin guard) -> {info['output']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
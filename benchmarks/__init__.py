@@ -0,0 +1,3 @@
+# benchmarks/__init__.py
+# Fiyatlama sıcak yolları için tekrarlanabilir ölçüm takımı:
+#     python -m benchmarks --out bench.json [--compare baseline.json] [--quick]
@@ -0,0 +1,40 @@
+# benchmarks/__main__.py
+"""
+Kullanım:
+    python -m benchmarks --out bench.json                      # ölç ve yaz
+    python -m benchmarks --out bench.json --compare base.json  # regresyon kontrolü (çıkış kodu 1)
+    python -m benchmarks --quick --filter agent.               # küçük boyutlar, yalnızca eşleşen vakalar
+"""
+import argparse
+import sys
+
+from benchmarks.cases import all_cases
+from benchmarks.harness import compare, exit_code, format_comparison, load_report, run_cases, write_report
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m benchmarks", description="Fiyatlama sıcak yolu ölçümleri")
+    ap.add_argument("--out", default="bench.json", help="Sonuç JSON dosyası")
+    ap.add_argument("--compare", metavar="BASELINE", help="Taban çizgisi JSON; regresyonda çıkış kodu 1")
+    ap.add_argument("--threshold", type=float, default=0.20, help="Regresyon eşiği (oran, varsayılan 0.20)")
+    ap.add_argument("--quick", action="store_true", help="Küçük boyutlar ve kısa ölçümler (CI duman testi)")
+    ap.add_argument("--filter", action="append", default=[], help="Vaka anahtarı alt dizgisi (tekrarlanabilir)")
+    ap.add_argument("--group", action="append", default=[], help="core | training | e2e")
+    args = ap.parse_args(argv)
+
+    cases = all_cases(quick=args.quick)
+    if args.filter:
+        cases = [c for c in cases if any(f in c.key for f in args.filter)]
+    if args.group:
+        cases = [c for c in cases if c.group in args.group]
+    results = run_cases(cases, quick=args.quick)
+    cmp = None
+    if args.compare:
+        cmp = compare(results, load_report(args.compare)["results"], args.threshold)
+        print(format_comparison(cmp))
+    write_report(args.out, results, meta={"quick": args.quick, "filter": args.filter, "group": args.group,
+                                          "comparison": cmp})
+    print(f"-> {args.out}")
+    return exit_code(cmp)
+
+if __name__ == "__main__":
+    sys.exit(main())
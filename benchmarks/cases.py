@@ -0,0 +1,163 @@
+# benchmarks/cases.py
+"""
+Ölçülen sıcak yollar. Her setup fonksiyonu girdileri hazırlar ve yalnızca
+ölçülecek çağrıyı döner (hazırlık süresi sonuca girmez).
+"""
+import asyncio
+import os
+import tempfile
+from typing import List
+
+import numpy as np
+
+from backend.core.rl.demand_simulator import predict_sales, predict_sales_arr
+from backend.core.rl.env_definition import EnhancedPricingEnv
+from backend.core.rl.qlearning_agent import QLearningAgent
+from backend.core.rl.qtable import encode_bins_arr
+from backend.core.rl.replay import ReplayConfig
+from backend.core.rules_guard import breakdown, breakdown_arr, CostParams
+
+from benchmarks import data
+from benchmarks.harness import Case
+
+# -------------------- rules_guard --------------------
+def _breakdown_scalar(n):
+    def setup():
+        ps, cps = data.prices(n).tolist(), data.cost_params(n)
+        return lambda: [breakdown(p, cp) for p, cp in zip(ps, cps)]
+    return setup
+
+def _breakdown_vector(n):
+    def setup():
+        ps, ca = data.prices(n), data.cost_arrays(n)
+        return lambda: breakdown_arr(ps, ca)
+    return setup
+
+# -------------------- talep modeli --------------------
+def _predict_scalar(n):
+    def setup():
+        s = data.states(n)
+        rows = list(zip(s["sales_last_week"].tolist(), s["last_price"].tolist(), s["competitor_price"].tolist()))
+        return lambda: [predict_sales(b, p, c) for b, p, c in rows]
+    return setup
+
+def _predict_vector(n):
+    def setup():
+        s = data.states(n)
+        return lambda: predict_sales_arr(s["sales_last_week"], s["last_price"], s["competitor_price"])
+    return setup
+
+# -------------------- ortam --------------------
+def _env_step(n):
+    def setup():
+        env, sts, cps = EnhancedPricingEnv(), data.state_dicts(n), data.cost_params(n)
+        acts = np.random.default_rng(data.SEED).integers(0, len(env.action_space), n).tolist()
+        return lambda: [env.step(s, cp, a) for s, cp, a in zip(sts, cps, acts)]
+    return setup
+
+def _env_step_batch(n):
+    def setup():
+        env, s, ca = EnhancedPricingEnv(), data.states(n), data.cost_arrays(n)
+        acts = np.random.default_rng(data.SEED).integers(0, len(env.action_space), n)
+        cols = (s["stock_level"], s["last_price"], s["competitor_price"], s["sales_last_week"])
+        return lambda: env.step_batch(*cols, ca, acts)
+    return setup
+
+# -------------------- eğitim --------------------
+def _fit(n_traj, episodes, batched, replay=None):
+    def setup():
+        # skaler ve batched yol aynı girdiyi alsın diye tek maliyet profili
+        env, s, cp = EnhancedPricingEnv(), data.states(n_traj), CostParams()
+
+        def run():
+            ag = QLearningAgent(action_space=env.action_space, q_backend="array")
+            ag.fit(env, s, cp, episodes=episodes, batched=batched, seed=data.SEED, replay=replay)
+        return run
+    return setup
+
+# -------------------- aksiyon seçimi --------------------
+def _choose_action(table_size, n_lookups=2_000):
+    def setup():
+        env = EnhancedPricingEnv()
+        ag = QLearningAgent(action_space=env.action_space, q_backend="array", epsilon=0.0)
+        sts = data.state_dicts(n_lookups, seed=data.SEED + 7)
+        # tablo: sorgu state'lerinin yarısı + rastgele kodlar -> table_size satır
+        cols = data.states(n_lookups, seed=data.SEED + 7)
+        hit = encode_bins_arr(ag.get_state_bins_arr(*(cols[k] for k in cols)))[: n_lookups // 2]
+        rng = np.random.default_rng(data.SEED)
+        extra = rng.integers(1 << 40, 1 << 50, max(0, table_size - len(hit)))
+        rows = ag.q_table.rows_for(np.concatenate([hit, extra])[:table_size])
+        ag.q_table.values[rows] = rng.normal(size=(len(rows), len(env.action_space)))
+        return lambda: [ag.choose_action(s, explore=False) for s in sts]
+    return setup
+
+# -------------------- uçtan uca (ASGI, süreç içi) --------------------
+def _isolated_app():
+    """Servis uygulaması; model/depolar geçici dizinde (gerçek veri dizinine dokunmaz)."""
+    tmp = tempfile.mkdtemp(prefix="bench-")
+    for var, name in (("QTABLE_SNAPSHOT_DIR", "snapshots"), ("GROUP_MODEL_DIR", "groups"),
+                      ("FORECAST_STORE_PATH", "forecast.npz"), ("COMPETITOR_STORE_PATH", "competitors.npz")):
+        os.environ.setdefault(var, os.path.join(tmp, name))
+    from backend.api.agent_api import app
+    return app
+
+def _endpoint(path, payload):
+    def setup():
+        import httpx
+        app = _isolated_app()
+        loop = asyncio.new_event_loop()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+        def call():
+            resp = loop.run_until_complete(client.post(path, json=payload))
+            if resp.status_code != 200:
+                raise RuntimeError(f"{path}: HTTP {resp.status_code} {resp.text[:200]}")
+        call.latency = True
+        return call
+    return setup
+
+RECOMMEND_PAYLOAD = {
+    "state": {"stock_level": 120, "last_price": 149.9, "competitor_price": 155.0, "sales_last_week": 9},
+    "costs": {"unit_cost": 80.0},
+}
+CURVE_PAYLOAD = {
+    "base_price": 149.9, "competitor_price": 155.0, "base_sales": 9,
+    "costs": {"unit_cost": 80.0}, "pct_min": -30, "pct_max": 30, "step": 1, "elasticity": -1.4,
+}
+
+# -------------------- kayıt --------------------
+def all_cases(quick: bool = False) -> List[Case]:
+    sizes = (1_000,) if quick else (1_000, 100_000)
+    cases: List[Case] = []
+    for n in sizes:
+        cases += [
+            Case("rules_guard.breakdown", _breakdown_scalar(min(n, 10_000)), {"n": min(n, 10_000)}, min(n, 10_000)),
+            Case("rules_guard.breakdown_arr", _breakdown_vector(n), {"n": n}, n),
+            Case("predict_sales", _predict_scalar(min(n, 10_000)), {"n": min(n, 10_000)}, min(n, 10_000)),
+            Case("predict_sales_arr", _predict_vector(n), {"n": n}, n),
+            Case("env.step", _env_step(min(n, 10_000)), {"n": min(n, 10_000)}, min(n, 10_000)),
+            Case("env.step_batch", _env_step_batch(n), {"n": n}, n),
+        ]
+    fit_grid = [(100, 5), (1_000, 5)] if quick else [(100, 10), (1_000, 10), (10_000, 10), (1_000, 40)]
+    for n_traj, episodes in fit_grid:
+        # ops = yörünge x episode (her biri HORIZON adım)
+        for batched in (False, True):
+            if not batched and n_traj * episodes > (500 if quick else 10_000):
+                continue   # skaler yol bu boyutta dakikalar sürer
+            cases.append(Case("agent.fit", _fit(n_traj, episodes, batched),
+                              {"trajectories": n_traj, "episodes": episodes, "batched": batched},
+                              n_traj * episodes, group="training", repeat=3))
+    # deneyim tekrarı: ortam adımı başına ek toplu güncellemenin maliyeti
+    n_traj, episodes = fit_grid[-1]
+    for prioritized in (False, True):
+        cases.append(Case("agent.fit_replay",
+                          _fit(n_traj, episodes, True, ReplayConfig(batch_size=256, prioritized=prioritized)),
+                          {"trajectories": n_traj, "episodes": episodes, "prioritized": prioritized},
+                          n_traj * episodes, group="training", repeat=3))
+    for size in ((1_000, 100_000) if quick else (1_000, 100_000, 1_000_000)):
+        cases.append(Case("agent.choose_action", _choose_action(size), {"table_size": size}, 2_000))
+    cases += [
+        Case("api.recommend_price", _endpoint("/agent/recommend-price", RECOMMEND_PAYLOAD), group="e2e"),
+        Case("api.simulate_curve", _endpoint("/agent/simulate-curve", CURVE_PAYLOAD), group="e2e"),
+    ]
+    return cases
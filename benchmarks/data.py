@@ -0,0 +1,37 @@
+# benchmarks/data.py
+"""Sabit tohumlu sentetik veri üreticileri (aynı tohum -> aynı girdi)."""
+from typing import Dict, List
+
+import numpy as np
+
+from backend.core.rl.qlearning_agent import STATE_FIELDS
+from backend.core.rules_guard import CostArrays, CostParams
+
+SEED = 1234
+
+def states(n: int, seed: int = SEED) -> Dict[str, np.ndarray]:
+    """Başlangıç state sütunları (STATE_FIELDS)."""
+    rng = np.random.default_rng(seed)
+    price = rng.uniform(20, 400, n).round(2)
+    return {
+        "stock_level": rng.integers(0, 500, n).astype(np.float64),
+        "last_price": price,
+        "competitor_price": (price * rng.uniform(0.8, 1.2, n)).round(2),
+        "sales_last_week": rng.poisson(8, n).astype(np.float64),
+    }
+
+def state_dicts(n: int, seed: int = SEED) -> List[Dict[str, float]]:
+    cols = states(n, seed)
+    return [{k: float(cols[k][i]) for k in STATE_FIELDS} for i in range(n)]
+
+def cost_params(n: int, seed: int = SEED) -> List[CostParams]:
+    rng = np.random.default_rng(seed + 1)
+    return [CostParams(unit_cost=float(u), commission_pct=float(c), shipping_cost=float(s))
+            for u, c, s in zip(rng.uniform(10, 200, n).round(2), rng.uniform(0.05, 0.2, n).round(3),
+                               rng.uniform(0, 40, n).round(2))]
+
+def cost_arrays(n: int, seed: int = SEED) -> CostArrays:
+    return CostArrays.from_params(cost_params(n, seed))
+
+def prices(n: int, seed: int = SEED) -> np.ndarray:
+    return np.random.default_rng(seed + 2).uniform(20, 400, n).round(2)
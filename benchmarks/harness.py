@@ -0,0 +1,169 @@
+# benchmarks/harness.py
+"""
+Ölçüm altyapısı: zamanlayıcı, vaka kaydı, JSON çıktı ve taban çizgisi karşılaştırması.
+
+Her vaka (name, params) ile tanımlanır; sonuç saniyede işlem (ops_per_sec)
+ve çağrı süresi dağılımıdır (median/p95). Karşılaştırmada ops_per_sec,
+taban çizgisine göre eşikten (varsayılan %20) fazla düşerse regresyon sayılır.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+SCHEMA_VERSION = 1
+
+@dataclass
+class Case:
+    name: str
+    setup: Callable[[], Callable[[], Any]]   # hazırlık -> ölçülecek çağrı
+    params: Dict[str, Any] = field(default_factory=dict)
+    ops_per_call: int = 1                   # bir çağrıdaki işlem sayısı (satır, adım, lookup...)
+    group: str = "core"
+    repeat: Optional[int] = None            # ağır vakalarda daha az tekrar
+
+    @property
+    def key(self) -> str:
+        if not self.params:
+            return self.name
+        return self.name + "[" + ",".join(f"{k}={v}" for k, v in sorted(self.params.items())) + "]"
+
+def measure(fn: Callable[[], Any], ops_per_call: int = 1, repeat: int = 7,
+            min_time: float = 0.05, warmup: int = 1) -> Dict[str, float]:
+    """
+    fn'i önce ısıtır, sonra her tekrarda en az min_time sürecek kadar çağırır
+    (çağrı sayısı ilk ölçümden kalibre edilir). Çağrı başına süreler tekrar
+    medyanından hesaplanır; tek tek yavaş tekrarlar sonucu oynatmaz.
+    """
+    for _ in range(warmup):
+        fn()
+    t0 = time.perf_counter()
+    fn()
+    one = max(time.perf_counter() - t0, 1e-9)
+    loops = max(1, int(min_time / one))
+    per_call = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        per_call.append((time.perf_counter() - t0) / loops)
+    med = statistics.median(per_call)
+    return {
+        "median_s": med,
+        "min_s": min(per_call),
+        "p95_s": float(np.percentile(per_call, 95)),
+        "loops": loops,
+        "repeat": repeat,
+        "ops_per_sec": ops_per_call / med,
+    }
+
+def measure_latency(fn: Callable[[], Any], n: int = 200, warmup: int = 10) -> Dict[str, float]:
+    """Uçtan uca istekler: her çağrı ayrı zamanlanır (kuyruk gecikmesi p95/p99 için)."""
+    for _ in range(warmup):
+        fn()
+    lat = np.empty(n)
+    for i in range(n):
+        t0 = time.perf_counter()
+        fn()
+        lat[i] = time.perf_counter() - t0
+    med = float(np.median(lat))
+    return {
+        "median_s": med,
+        "min_s": float(lat.min()),
+        "p95_s": float(np.percentile(lat, 95)),
+        "p99_s": float(np.percentile(lat, 99)),
+        "loops": n,
+        "repeat": 1,
+        "ops_per_sec": 1.0 / med,
+    }
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+def run_cases(cases: List[Case], quick: bool = False, log=print) -> List[Dict[str, Any]]:
+    results = []
+    for case in cases:
+        fn = case.setup()
+        latency = getattr(fn, "latency", False)
+        if latency:
+            stats = measure_latency(fn, n=50 if quick else 300)
+        else:
+            stats = measure(fn, case.ops_per_call, repeat=case.repeat or (3 if quick else 7),
+                            min_time=0.02 if quick else 0.1)
+        res = {"key": case.key, "name": case.name, "group": case.group, "params": case.params,
+               "ops_per_call": case.ops_per_call, **stats}
+        results.append(res)
+        if log:
+            log(f"{case.key:<58} {res['ops_per_sec']:>14,.1f} ops/s   median {res['median_s'] * 1e3:9.3f} ms")
+    return results
+
+def write_report(path: str, results: List[Dict[str, Any]], meta: Optional[Dict[str, Any]] = None):
+    report = {"schema": SCHEMA_VERSION, "environment": environment(), "meta": meta or {}, "results": results}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+def load_report(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    if report.get("schema") != SCHEMA_VERSION:
+        raise ValueError(f"Desteklenmeyen rapor şeması: {report.get('schema')}")
+    return report
+
+def compare(current: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+            threshold: float = 0.20) -> Dict[str, Any]:
+    """
+    Vaka anahtarına göre eşleştirir; ratio = güncel / taban ops_per_sec.
+    ratio < 1 - threshold -> "regression", ratio > 1 + threshold -> "improvement".
+    Tabanda olmayan vakalar "new", güncelde olmayanlar "missing" listelenir.
+    """
+    base = {r["key"]: r for r in baseline}
+    rows, regressions = [], []
+    for r in current:
+        b = base.get(r["key"])
+        if b is None:
+            rows.append({"key": r["key"], "status": "new", "ops_per_sec": r["ops_per_sec"]})
+            continue
+        ratio = r["ops_per_sec"] / b["ops_per_sec"] if b["ops_per_sec"] > 0 else float("inf")
+        status = "regression" if ratio < 1 - threshold else "improvement" if ratio > 1 + threshold else "ok"
+        row = {"key": r["key"], "status": status, "ratio": ratio,
+               "ops_per_sec": r["ops_per_sec"], "baseline_ops_per_sec": b["ops_per_sec"]}
+        rows.append(row)
+        if status == "regression":
+            regressions.append(row)
+    seen = {r["key"] for r in current}
+    missing = [k for k in base if k not in seen]
+    return {"threshold": threshold, "rows": rows, "regressions": regressions, "missing": missing}
+
+def format_comparison(cmp: Dict[str, Any]) -> str:
+    lines = [f"{'vaka':<58} {'oran':>8}  durum"]
+    for r in cmp["rows"]:
+        ratio = f"{r['ratio']:.2f}x" if "ratio" in r else "-"
+        lines.append(f"{r['key']:<58} {ratio:>8}  {r['status']}")
+    for k in cmp["missing"]:
+        lines.append(f"{k:<58} {'-':>8}  missing")
+    lines.append(f"{len(cmp['regressions'])} regresyon (eşik %{cmp['threshold'] * 100:.0f})")
+    return "\n".join(lines)
+
+def exit_code(cmp: Optional[Dict[str, Any]]) -> int:
+    return 1 if cmp and cmp["regressions"] else 0
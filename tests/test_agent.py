@@ -8,3 +8,156 @@ def test_agent_learning():
     next_state, reward, done, _ = env.step(1)
     agent.learn(state, 1, reward, next_state)
     assert len(agent.q_table) > 0
+
+def test_step_batch_matches_step():
+    import numpy as np
+    from backend.core.rl.env_definition import EnhancedPricingEnv
+    from backend.core.rules_guard import CostParams, CostArrays
+    env = EnhancedPricingEnv()
+    states = [{"stock_level": 30.0 + i, "last_price": 100.0 + 3 * i, "competitor_price": 110.0,
+               "sales_last_week": 5.0 + i} for i in range(10)]
+    actions = np.arange(10) % len(env.action_space)
+    cols = [np.array([s[k] for s in states]) for k in ("stock_level", "last_price", "competitor_price", "sales_last_week")]
+    (stock, price, _, sales), rewards = env.step_batch(*cols, CostArrays.repeat(CostParams(), 10), actions)
+    for i, s in enumerate(states):
+        nxt, r = env.step(s, CostParams(), int(actions[i]))
+        assert np.isclose(rewards[i], r)
+        assert np.isclose(sales[i], nxt["sales_last_week"]) and price[i] == nxt["last_price"]
+
+def test_per_sku_demand_model_matches_scalar():
+    import numpy as np
+    from backend.core.rl.demand_simulator import DemandModel, predict_sales
+    from backend.core.rl.env_definition import EnhancedPricingEnv
+    from backend.core.rules_guard import CostParams, CostArrays
+    el = np.array([-0.6, -1.2, -2.4])
+    profile = np.array([[1.0, 1.2, 0.8], [0.9, 1.0, 1.1], [1.3, 0.7, 1.0]])   # SKU x hafta
+    dm = DemandModel(el, profile)
+    price = np.array([[95.0, 100.0, 105.0, 110.0]] * 3)
+    grid = dm.predict_horizon([10.0, 6.0, 3.0], price, 100.0, start_week=1)
+    assert grid.shape == (3, 4)
+    assert np.isclose(grid[2, 3], predict_sales(3.0, 110.0, 100.0, -2.4, profile[2, (1 + 3) % 3]))
+
+    env = EnhancedPricingEnv(demand=dm)
+    cols = [np.array([40.0, 20.0, 5.0]), np.array([100.0, 80.0, 60.0]),
+            np.array([105.0, 75.0, 66.0]), np.array([8.0, 4.0, 2.0])]
+    actions = np.array([0, 2, 4])
+    _, rewards = env.step_batch(*cols, CostArrays.repeat(CostParams(unit_cost=20.0), 3), actions, t=2)
+    for i in range(3):
+        s = dict(zip(("stock_level", "last_price", "competitor_price", "sales_last_week"), (c[i] for c in cols)))
+        _, r = env.step(s, CostParams(unit_cost=20.0), int(actions[i]), t=2, sku=i)
+        assert np.isclose(rewards[i], r)
+
+def test_batched_fit_reports_throughput():
+    import numpy as np
+    from backend.core.rl.env_definition import EnhancedPricingEnv
+    from backend.core.rules_guard import CostParams
+    env = EnhancedPricingEnv()
+    agent = QLearningAgent(env.action_space, q_backend="array")
+    state = {"stock_level": 50, "last_price": 120, "competitor_price": 125, "sales_last_week": 8}
+    stats = agent.fit(env, [state] * 16, CostParams(), episodes=3, batched=True, seed=0)
+    assert stats["episodes"] == 3 and stats["steps"] == 3 * 16 * 24
+    assert len(stats["episode_rewards"]) == 3
+    assert np.isclose(stats["mean_episode_reward"], np.mean(stats["episode_rewards"]))
+    assert stats["last_episode_reward"] == stats["episode_rewards"][-1]
+    assert len(agent.q_table) > 0
+
+def test_batched_fit_matches_scalar_greedy_reward():
+    import numpy as np
+    from backend.core.rl.env_definition import EnhancedPricingEnv
+    from backend.core.rl.qlearning_agent import STATE_FIELDS
+    from backend.core.rl.qtable import encode_bins_arr
+    from backend.core.rules_guard import CostParams, CostArrays
+    env, cp, n, horizon = EnhancedPricingEnv(), CostParams(unit_cost=60.0), 32, 8
+    rng = np.random.default_rng(0)
+    states = {"stock_level": rng.integers(20, 80, n).astype(float), "last_price": rng.uniform(95, 130, n).round(2),
+              "competitor_price": np.full(n, 110.0), "sales_last_week": rng.integers(4, 12, n).astype(float)}
+
+    def greedy_reward(choose):
+        cols, total = [states[k].copy() for k in STATE_FIELDS], np.zeros(n)
+        for t in range(horizon):
+            cols, r = env.step_batch(*cols, CostArrays.repeat(cp, n), choose(cols), t=t)
+            total += r
+        return total.mean()
+
+    rewards = []
+    for batched in (False, True):
+        agent = QLearningAgent(env.action_space, q_backend="array")
+        agent.fit(env, states, cp, episodes=100, batched=batched, seed=0, horizon=horizon)
+        policy = agent.compile_policy()
+        rewards.append(greedy_reward(lambda c: policy.lookup_many(encode_bins_arr(agent.get_state_bins_arr(*c)))[0]))
+    hold = greedy_reward(lambda c: np.full(n, env.action_space.index(0.0)))
+    assert min(rewards) > hold
+    assert abs(rewards[1] - rewards[0]) <= 0.25 * abs(rewards[0])
+
+def test_parallel_fit_is_deterministic():
+    from backend.core.rl.env_definition import EnhancedPricingEnv
+    from backend.core.rules_guard import CostParams
+    env = EnhancedPricingEnv()
+    states = [{"stock_level": 20 + i, "last_price": 100 + i, "competitor_price": 110,
+               "sales_last_week": 5 + i % 4} for i in range(12)]
+    tables = []
+    for _ in range(2):
+        agent = QLearningAgent(env.action_space, q_backend="array")
+        stats = agent.fit(env, states, CostParams(), episodes=4, seed=5, workers=2, sync_every=2)
+        assert stats["workers"] == 2 and len(stats["episode_rewards"]) == 4
+        tables.append(agent.export_q_dict())
+    assert tables[0] == tables[1]
+
+def test_fit_records_episode_telemetry():
+    from backend.core.rl.env_definition import EnhancedPricingEnv
+    from backend.core.rl.telemetry import TrainingTelemetry, VISIT_EDGES
+    from backend.core.rules_guard import CostParams
+    env = EnhancedPricingEnv()
+    state = {"stock_level": 50, "last_price": 120, "competitor_price": 125, "sales_last_week": 8}
+    for batched in (True, False):
+        tel = TrainingTelemetry()
+        agent = QLearningAgent(env.action_space, q_backend="array")
+        stats = agent.fit(env, [state] * 8, CostParams(), episodes=4, batched=batched, seed=1, telemetry=tel)
+        events = tel.since(0)
+        assert [e["episode"] for e in events] == [1, 2, 3, 4]
+        assert [e["mean_reward"] for e in events] == stats["episode_rewards"]
+        assert events[0]["epsilon"] > events[-1]["epsilon"]
+        assert sum(e["new_states"] for e in events) == events[-1]["states"] == len(agent.q_table)
+        hist = events[-1]["visit_hist"]
+        assert len(hist) == len(VISIT_EDGES) + 1 and sum(hist) == len(agent.q_table)
+        assert all(e["td_abs_mean"] >= 0 for e in events)
+        assert tel.since(2) == events[2:]
+
+def test_train_agent_writes_plot_without_blocking(tmp_path):
+    from backend.core.rl.training_loop import train_agent
+    agent = train_agent({"base_price": 50, "unit_cost": 20}, episodes=3, seed=0,
+                        q_table_path=str(tmp_path / "q.npz"), plot_path=str(tmp_path / "rewards.png"))
+    assert (tmp_path / "rewards.png").stat().st_size > 0
+    assert len(agent.q_table) > 0
+
+def test_fit_stops_on_first_met_criterion():
+    from backend.core.rl.early_stopping import StopCriteria
+    from backend.core.rl.env_definition import EnhancedPricingEnv
+    from backend.core.rl.telemetry import TrainingTelemetry
+    from backend.core.rules_guard import CostParams
+    env = EnhancedPricingEnv()
+    state = {"stock_level": 50, "last_price": 120, "competitor_price": 125, "sales_last_week": 8}
+    run = lambda stop, **kw: QLearningAgent(env.action_space, q_backend="array").fit(
+        env, [state] * 8, CostParams(), episodes=30, seed=2, stop=stop, **kw)
+
+    stats = run(None)
+    assert stats["episodes"] == 30 and stats["stop_reason"] == "completed"
+    stats = run(StopCriteria(q_delta=1e12, min_episodes=3))
+    assert stats["episodes"] == 3 and stats["stop_reason"] == "q_delta" and stats["stopped_early"]
+    stats = run(StopCriteria(plateau_window=4, plateau_tol=1e12))
+    assert stats["episodes"] == 4 and stats["stop_reason"] == "plateau"
+    stats = run(StopCriteria(time_budget=1e-9))
+    assert stats["episodes"] == 1 and stats["stop_reason"] == "time_budget"
+    stats = run(StopCriteria(time_budget=1e-9), on_episode=lambda done, r: False)
+    assert stats["episodes"] == 1 and stats["stop_reason"] == "cancelled"   # iptal önceliklidir
+    stats = run(StopCriteria(q_delta=1e12, min_episodes=3), on_episode=lambda done, r: done < 3)
+    assert stats["episodes"] == 3 and stats["stop_reason"] == "cancelled"
+    assert run(None, on_episode=lambda done, r: done < 2)["stop_reason"] == "cancelled"
+
+    tel = TrainingTelemetry()
+    agent = QLearningAgent(env.action_space, q_backend="array")
+    stats = agent.fit(env, [state] * 8, CostParams(), episodes=6, seed=3, workers=2, sync_every=2,
+                      stop=StopCriteria(q_delta=1e30, min_episodes=3), telemetry=tel)
+    # paralel: q_delta tur sonunda ölçülür -> ilk uygun tur sınırında durur
+    assert stats["episodes"] == 4 and stats["stop_reason"] == "q_delta"
+    assert [e["q_delta_max"] is not None for e in tel.since(0)] == [False, True, False, True]
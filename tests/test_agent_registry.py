@@ -0,0 +1,54 @@
+from backend.core.rl.agent_registry import AgentRegistry
+from backend.core.rl.qlearning_agent import QLearningAgent
+from backend.core.rl.qtable import ArrayQTable, key_to_code
+
+def _make():
+    return QLearningAgent(action_space=[-0.05, 0.0, 0.05], q_backend="array")
+
+def _trained(best_action: int) -> QLearningAgent:
+    ag = _make()
+    q = [0.0, 0.0, 0.0]
+    q[best_action] = 1.0
+    ag.q_table = ArrayQTable.from_dict({"2|18|20|1": q}, 3)
+    return ag
+
+def test_registry_lazy_loads_and_evicts(tmp_path):
+    reg = AgentRegistry(str(tmp_path), make_agent=_make, max_resident=1)
+    assert reg.get("shoes") is None                       # modeli olmayan grup
+    reg.put("shoes", _trained(2))
+    reg.put("bags", _trained(0))                          # shoes bellekten düşer
+    assert reg.stats()["resident"] == 1 and reg.evictions == 1
+    assert reg.groups() == ["bags", "shoes"]
+
+    shoes = reg.get("shoes")                              # diskten tembel yükleme
+    assert shoes.version == "v000001"
+    assert shoes.policy.lookup(key_to_code("2|18|20|1"))[0] == 2
+    assert reg.loads == 1
+
+    # başka bir işçinin kaydı (aynı dizin) yeni sürümü görür
+    other = AgentRegistry(str(tmp_path), make_agent=_make, max_resident=4, poll_interval=0)
+    assert other.get("shoes").version == "v000001"
+    reg.put("shoes", _trained(1))
+    assert other.get("shoes").version == "v000002"
+
+def test_registry_caches_misses_and_bounds_tracked_groups(tmp_path, monkeypatch):
+    from backend.core.rl.model_store import SnapshotStore
+    reg = AgentRegistry(str(tmp_path), make_agent=_make, poll_interval=3600, max_tracked=2)
+    assert reg.get("shoes") is None
+    reads = []
+    orig = SnapshotStore.read_manifest
+    monkeypatch.setattr(SnapshotStore, "read_manifest", lambda self: reads.append(self.root) or orig(self))
+    for _ in range(5):
+        assert reg.get("shoes") is None                   # ıska önbellekte: manifest okunmaz
+    assert reads == []
+
+    for g in ("a", "b", "c", "d"):
+        assert reg.get(g) is None
+    assert len(reg._stores) <= 2 and len(reg._misses) <= 2
+
+    # ıska sonrası başka işçinin yayını izleyiciyle görülür
+    live = AgentRegistry(str(tmp_path), make_agent=_make, poll_interval=0)
+    assert live.get("bags") is None
+    AgentRegistry(str(tmp_path), make_agent=_make).put("bags", _trained(0))
+    assert live.get("bags").version == "v000001"
+    assert not live._misses
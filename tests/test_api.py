@@ -14,3 +14,343 @@ def test_recommend_price():
     data = resp.json()
     assert "new_price_estimate" in data
     assert "explanation" in data
+
+def test_recommend_prices_batch():
+    state = {"stock_level": 50, "last_price": 90.0, "competitor_price": 100.0, "sales_last_week": 5}
+    resp = client.post("/agent/recommend-prices", json={
+        "items": [
+            {"state": state},
+            {"state": state, "costs": {"unit_cost": 80.0}},
+        ]
+    })
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["count"] == 2
+    assert data["cost_profiles"] == 2
+    single = client.post("/agent/recommend-price", json={"state": state}).json()
+    assert data["items"][0].keys() == single.keys()
+    assert data["items"][1]["guard"]["break_even"] > data["items"][0]["guard"]["break_even"]
+
+def _isolate_retrain(tmp_path, monkeypatch):
+    """Checkpoint ve snapshot'ları tmp_path'e yönlendirir; servis edilen ajanı döner (geri yüklemek için)."""
+    from backend.api import agent_api, retrain_api
+    from backend.core.rl.model_store import SnapshotStore
+    monkeypatch.setattr(retrain_api, "CHECKPOINT_PATH", str(tmp_path / "q_table.npz"))
+    monkeypatch.setattr(agent_api, "snapshots", SnapshotStore(str(tmp_path / "snapshots")))
+    monkeypatch.setattr(agent_api.watcher, "store", agent_api.snapshots)
+    return agent_api.current_agent()
+
+def _wait_job(job_id):
+    import time
+    for _ in range(200):
+        job = client.get(f"/agent/retrain/jobs/{job_id}").json()
+        if job["status"] not in ("queued", "running"):
+            break
+        time.sleep(0.05)
+    return job
+
+def test_retrain_job_swaps_agent(tmp_path, monkeypatch):
+    from backend.api import agent_api
+    before = _isolate_retrain(tmp_path, monkeypatch)
+    rows = [{"stock_level": 50, "last_price": 120, "competitor_price": 125, "sales_last_week": 8}] * 8
+    try:
+        resp = client.post("/agent/retrain/jobs", json={"data": rows, "config": {"episodes": 3, "seed": 1}})
+        assert resp.status_code == 202
+        job = _wait_job(resp.json()["job_id"])
+        assert job["status"] == "succeeded"
+        assert job["progress"]["episodes_done"] == 3
+        assert agent_api.current_agent() is not before
+        assert job["result"]["model_version"] == "v000001"
+        state = {"stock_level": 50, "last_price": 90.0, "competitor_price": 100.0, "sales_last_week": 5}
+        assert client.post("/agent/recommend-price", json={"state": state}).json()["model_version"] == "v000001"
+        assert client.get("/agent/retrain/jobs/nope").status_code == 404
+    finally:
+        agent_api.swap_agent(before)
+
+def test_retrain_upload_csv(tmp_path, monkeypatch):
+    from backend.api import agent_api
+    before = _isolate_retrain(tmp_path, monkeypatch)
+    body = "stock_level,last_price,competitor_price,sales_last_week\n" + "50,120,125,8\n" * 40
+    try:
+        resp = client.post("/agent/retrain/upload",
+                           files={"file": ("rows.csv", body, "text/csv")},
+                           data={"config": '{"episodes": 2, "seed": 1}', "max_rows": "16"})
+        assert resp.status_code == 202
+        assert resp.json()["ingest"] == {"rows_read": 40, "rows_used": 16, "sampled": True}
+        job = _wait_job(resp.json()["job_id"])
+        assert job["status"] == "succeeded"
+        assert job["result"]["ingest"]["rows_used"] == 16
+        bad = client.post("/agent/retrain/upload", files={"file": ("x.csv", "a,b\n1,2\n", "text/csv")})
+        assert bad.status_code == 422
+    finally:
+        agent_api.swap_agent(before)
+
+def test_simulate_surface_matches_scalar_model():
+    from backend.core.rl.demand_simulator import predict_sales
+    from backend.core.rules_guard import CostParams, profit
+
+    resp = client.post("/agent/simulate-surface", json={
+        "skus": [
+            {"sku_id": "A", "base_price": 120.0, "competitor_price": 110.0, "base_sales": 10},
+            {"sku_id": "B", "base_price": 80.0, "competitor_price": 90.0, "costs": {"unit_cost": 40.0}},
+        ],
+        "pct_min": -10, "pct_max": 10, "step": 5,
+        "comp_pct_min": -5, "comp_pct_max": 5, "comp_step": 5,
+        "elasticities": [-0.8, -1.6],
+        "decimals": 6,
+    })
+    assert resp.status_code == 200
+    data = resp.json()
+    n, e, p, c = data["shape"]["surface"]
+    assert (n, e, p, c) == (2, 2, 5, 3)
+
+    # SKU B, esneklik -1.6, kendi fiyat +5%, rakip -5%
+    i = ((1 * e + 1) * p + 3) * c + 0
+    price, comp = 80.0 * 1.05, 90.0 * 0.95
+    units = predict_sales(12, price, comp, elasticity=-1.6)
+    assert abs(data["units"][i] - units) < 1e-5
+    assert abs(data["net_profit"][i] - units * profit(price, CostParams(unit_cost=40.0))) < 1e-4
+
+    sku = {"base_price": 100.0, "competitor_price": 100.0}
+    too_big = {"skus": [sku] * 50, "elasticities": [-1.0] * 10,
+               "pct_min": -100, "pct_max": 1_000, "comp_pct_min": -100, "comp_pct_max": 100}
+    resp = client.post("/agent/simulate-surface", json=too_big)
+    assert resp.status_code == 422 and "nokta" in resp.json()["detail"]
+    assert client.post("/agent/simulate-surface", json={"skus": [sku], "pct_max": 10**9}).status_code == 422
+
+def test_cost_profile_registry_crud_and_reference():
+    costs = {"unit_cost": 80.0, "commission_pct": 0.15, "min_margin_pct": 0.12}
+    resp = client.put("/agent/cost-profiles/tier-b", json=costs)
+    assert resp.status_code == 201
+    assert resp.json()["derived"]["min_margin_price"] > 0
+    try:
+        state = {"stock_level": 50, "last_price": 90.0, "competitor_price": 100.0, "sales_last_week": 5}
+        inline = client.post("/agent/recommend-price", json={"state": state, "costs": costs}).json()
+        by_id = client.post("/agent/recommend-price", json={"state": state, "cost_profile_id": "tier-b"}).json()
+        assert by_id["recommended_price"] == inline["recommended_price"]
+        assert by_id["guard"] == inline["guard"]
+
+        sim = client.post("/agent/simulate", json={"price": 90.0, "cost_profile_id": "tier-b"}).json()
+        assert sim["guard"]["min_margin_pct"] == 0.12
+
+        missing = client.post("/agent/simulate", json={"price": 90.0, "cost_profile_id": "nope"})
+        assert missing.status_code == 404
+    finally:
+        assert client.delete("/agent/cost-profiles/tier-b").status_code == 200
+    assert client.get("/agent/cost-profiles/tier-b").status_code == 404
+
+def test_group_retrain_routes_by_group_id(tmp_path, monkeypatch):
+    from backend.api import agent_api
+    from backend.core.rl.agent_registry import AgentRegistry
+    monkeypatch.setattr(agent_api, "groups", AgentRegistry(str(tmp_path / "groups"),
+                                                           make_agent=agent_api.groups.make_agent))
+    shared = agent_api.current_agent()
+    rows = [{"stock_level": 50, "last_price": 120, "competitor_price": 125, "sales_last_week": 8}] * 4
+    resp = client.post("/agent/retrain", json={
+        "data": rows, "config": {"episodes": 2, "seed": 1, "group_id": "electronics"}})
+    assert resp.status_code == 200
+    assert resp.json()["group_id"] == "electronics" and resp.json()["checkpoint"] is None
+    assert agent_api.current_agent() is shared             # paylaşılan ajan değişmedi
+
+    state = {"stock_level": 50, "last_price": 90.0, "competitor_price": 100.0, "sales_last_week": 5}
+    grouped = client.post("/agent/recommend-price", json={"state": state, "group_id": "electronics"}).json()
+    assert grouped["model_version"] == "v000001" and grouped["group_id"] == "electronics"
+    batch = client.post("/agent/recommend-prices", json={"items": [
+        {"state": state, "group_id": "electronics"}, {"state": state}]}).json()
+    assert batch["groups"] == 2
+    assert batch["items"][0]["model_version"] == "v000001"
+    assert batch["items"][1]["model_version"] == shared.version
+    bad = client.post("/agent/recommend-price", json={"state": state, "group_id": "../x"})
+    assert bad.status_code == 422
+
+def test_forecast_fit_feeds_recommendations(tmp_path, monkeypatch):
+    from backend.api import forecast_api
+    from backend.core.forecasting import ForecastStore
+    monkeypatch.setattr(forecast_api, "FORECAST_STORE_PATH", str(tmp_path / "forecast.npz"))
+    monkeypatch.setattr(forecast_api, "forecasts", ForecastStore())
+    rows = ["sku_id,week,price,competitor_price,units"]
+    for w in range(1, 53):
+        for sku, e in (("A", -2.0), ("B", -0.5)):
+            p = 100.0 * (0.85 + 0.3 * ((w * 7) % 11) / 10)
+            rows.append(f"{sku},{w},{p:.2f},100,{40 * (p / 100) ** e:.0f}")
+    resp = client.post("/agent/forecast/fit", data={"mode": "replace"},
+                       files={"file": ("sales.csv", "\n".join(rows), "text/csv")})
+    assert resp.status_code == 200
+    assert resp.json()["skus"] == 2
+    a = client.get("/agent/forecast/A").json()
+    assert a["elasticity"] < client.get("/agent/forecast/B").json()["elasticity"]
+    assert client.get("/agent/forecast/Z").status_code == 404
+
+    state = {"stock_level": 50, "last_price": 120.0, "competitor_price": 100.0, "sales_last_week": 40}
+    out = client.post("/agent/recommend-prices", json={"items": [
+        {"state": state, "sku_id": "A", "week": 10},
+        {"state": state, "sku_id": "B", "week": 10},
+        {"state": state, "sku_id": "A", "week": 10, "elasticity": -0.5},
+    ]}).json()["items"]
+    assert out[0]["demand"]["fitted"] and out[1]["demand"]["fitted"]
+    assert out[0]["demand"]["expected_sales"] < out[1]["demand"]["expected_sales"]   # daha esnek SKU
+    single = client.post("/agent/recommend-price", json={"state": state, "sku_id": "A", "week": 10}).json()
+    assert single["demand"] == out[0]["demand"]
+    assert single["demand"]["seasonal"] and single["demand"]["week"] == 10
+
+    # hafta verilmezse sunucu tarihine değil nötr mevsime düşülür
+    no_week = client.post("/agent/recommend-price", json={"state": state, "sku_id": "A"}).json()["demand"]
+    assert no_week["week"] is None and not no_week["seasonal"]
+    neutral = client.post("/agent/recommend-price", json={"state": state, "sku_id": "A", "week": 10,
+                                                          "seasonality": 1.0}).json()["demand"]
+    assert no_week["fitted"] and no_week["expected_sales"] == neutral["expected_sales"]
+
+def test_competitor_store_feeds_recommendations(tmp_path, monkeypatch):
+    import time
+    from backend.api import competitor_api
+    from backend.core.competitor_store import CompetitorPriceStore
+    monkeypatch.setattr(competitor_api, "COMPETITOR_STORE_PATH", str(tmp_path / "competitors.npz"))
+    monkeypatch.setattr(competitor_api, "competitors", CompetitorPriceStore())
+    monkeypatch.setattr(competitor_api, "COMPETITOR_PERSIST_SECONDS", 3600.0)
+    now = time.time()
+    resp = client.post("/agent/competitors/ingest", json={"observations": [
+        {"sku_id": "A", "price": p, "competitor": c, "ts": now - 60}
+        for p, c in ((110.0, "x"), (120.0, "y"), (130.0, "z"))
+    ]})
+    assert resp.json()["accepted"] == 3
+    csv = "sku_id,price,competitor\nB,95,x\nB,105,y\n"
+    resp = client.post("/agent/competitors/upload", files={"file": ("feed.csv", csv, "text/csv")})
+    assert resp.json() == {"accepted": 2, "rejected": 0, "skus": 2}
+    # kayıt ertelenir: eklemeler diske tek yazımda gider
+    assert not (tmp_path / "competitors.npz").exists() and competitor_api.competitors.dirty
+    competitor_api.flush()
+    assert len(CompetitorPriceStore.load(str(tmp_path / "competitors.npz"))) == 2
+    assert not competitor_api.competitors.dirty
+    a = client.get("/agent/competitors/A").json()
+    assert (a["min"], a["median"], a["n_sources"]) == (110.0, 120.0, 3)
+
+    state = {"stock_level": 50, "last_price": 100.0, "sales_last_week": 5}
+    out = client.post("/agent/recommend-prices", json={"items": [
+        {"state": state, "sku_id": "A"},
+        {"state": dict(state, competitor_price=80.0), "sku_id": "B"},
+        {"state": dict(state, competitor_price=80.0), "sku_id": "unknown"},
+    ]}).json()["items"]
+    assert [i["competitor"]["price"] for i in out] == [120.0, 100.0, 80.0]
+    assert [i["competitor"]["source"] for i in out] == ["store", "store", "request"]
+    single = client.post("/agent/recommend-price", json={"state": state, "sku_id": "A"}).json()
+    assert single["competitor"] == out[0]["competitor"]
+    assert client.post("/agent/recommend-price", json={"state": state}).status_code == 422
+
+def test_retrain_job_streams_episode_telemetry(tmp_path, monkeypatch):
+    import json
+    from backend.api import agent_api
+    before = _isolate_retrain(tmp_path, monkeypatch)
+    rows = [{"stock_level": 40 + i, "last_price": 100.0, "competitor_price": 105.0,
+             "sales_last_week": 6} for i in range(4)]
+    try:
+        job = client.post("/agent/retrain/jobs", json={"data": rows, "config": {"episodes": 3, "seed": 0}}).json()
+        with client.stream("GET", f"/agent/retrain/jobs/{job['job_id']}/events") as resp:
+            assert resp.headers["content-type"].startswith("text/event-stream")
+            body = "".join(resp.iter_text())
+        blocks = [b for b in body.split("\n\n") if b.startswith(("id:", "event:"))]
+        kinds = [next(l for l in b.splitlines() if l.startswith("event:"))[7:] for b in blocks]
+        assert kinds == ["meta", "episode", "episode", "episode", "end"]
+        episodes = [json.loads(b.splitlines()[-1][6:]) for b in blocks[1:4]]
+        assert [e["episode"] for e in episodes] == [1, 2, 3]
+        assert {"mean_reward", "td_abs_mean", "epsilon", "new_states", "visit_hist"} <= set(episodes[0])
+
+        resumed = client.get(f"/agent/retrain/jobs/{job['job_id']}/telemetry", params={"after": 2}).json()
+        assert [e["episode"] for e in resumed["events"]] == [3]
+        assert (tmp_path / "q_table.npz").exists()
+    finally:
+        agent_api.swap_agent(before)
+
+def test_retrain_reports_stop_reason(tmp_path, monkeypatch):
+    from backend.api import agent_api
+    before = _isolate_retrain(tmp_path, monkeypatch)
+    rows = [{"stock_level": 40 + i, "last_price": 100.0, "competitor_price": 105.0,
+             "sales_last_week": 6} for i in range(4)]
+    cfg = {"episodes": 50, "seed": 0, "stop_plateau_window": 3, "stop_plateau_tol": 1e9}
+    try:
+        training = client.post("/agent/retrain", json={"data": rows, "config": cfg}).json()["training"]
+        assert training["stop_reason"] == "plateau"
+        assert training["episodes"] == 3 and training["episodes_requested"] == 50
+    finally:
+        agent_api.swap_agent(before)
+
+def test_retrain_with_replay_buffer(tmp_path, monkeypatch):
+    from backend.api import agent_api
+    before = _isolate_retrain(tmp_path, monkeypatch)
+    rows = [{"stock_level": 40 + i, "last_price": 100.0, "competitor_price": 105.0,
+             "sales_last_week": 6} for i in range(4)]
+    cfg = {"episodes": 2, "seed": 0, "replay_capacity": 1000, "replay_batch": 16, "replay_prioritized": True}
+    try:
+        training = client.post("/agent/retrain", json={"data": rows, "config": cfg}).json()["training"]
+        assert training["replay"]["size"] == 2 * 4 * 24 and training["replay"]["samples"] > 0
+        resp = client.post("/agent/retrain", json={"data": rows, "config": dict(cfg, batched=False)})
+        assert resp.status_code == 422
+    finally:
+        agent_api.swap_agent(before)
+
+def test_sync_retrain_and_job_do_not_overlap(tmp_path, monkeypatch):
+    import threading, time
+    from backend.api import agent_api
+    from backend.core.rl.qlearning_agent import QLearningAgent
+    before = _isolate_retrain(tmp_path, monkeypatch)
+    active, peak, lock = [0], [0], threading.Lock()
+    fit = QLearningAgent.fit
+
+    def tracked_fit(self, *args, **kwargs):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        try:
+            time.sleep(0.1)
+            return fit(self, *args, **kwargs)
+        finally:
+            with lock:
+                active[0] -= 1
+
+    monkeypatch.setattr(QLearningAgent, "fit", tracked_fit)
+    rows = [{"stock_level": 40 + i, "last_price": 100.0, "competitor_price": 105.0,
+             "sales_last_week": 6} for i in range(4)]
+    body = {"data": rows, "config": {"episodes": 2, "seed": 0}}
+    try:
+        job_id = client.post("/agent/retrain/jobs", json=body).json()["job_id"]
+        sync = client.post("/agent/retrain", json=body).json()
+        job = _wait_job(job_id)
+        assert job["status"] == "succeeded" and sync["status"] == "ok"
+        assert peak[0] == 1
+        assert {sync["model_version"], job["result"]["model_version"]} == {"v000001", "v000002"}
+        assert agent_api.current_agent().version == "v000002"
+    finally:
+        agent_api.swap_agent(before)
+
+def test_job_status_is_decided_at_swap():
+    import threading
+    from backend.api.jobs import JobManager
+    jobs = JobManager()
+    swapped, go = threading.Event(), threading.Event()
+
+    def late_cancel(job):
+        ok = job.commit()          # model devreye alındı
+        swapped.set()
+        go.wait(5)
+        return {"swapped": ok}
+
+    job = jobs.submit(1, late_cancel)
+    assert swapped.wait(5)
+    jobs.cancel(job.job_id)        # devreye almadan sonra gelen iptal yok sayılır
+    go.set()
+    jobs._pool.shutdown(wait=True)
+    assert job.status == "succeeded" and job.result == {"swapped": True}
+
+    jobs = JobManager()
+    started, go = threading.Event(), threading.Event()
+
+    def early_cancel(job):
+        started.set()
+        go.wait(5)
+        return {"swapped": job.commit()}
+
+    job = jobs.submit(1, early_cancel)
+    assert started.wait(5)
+    jobs.cancel(job.job_id)
+    go.set()
+    jobs._pool.shutdown(wait=True)
+    assert job.status == "cancelled" and job.result == {"swapped": False}
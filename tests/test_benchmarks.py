@@ -0,0 +1,18 @@
+from benchmarks.harness import Case, compare, exit_code, load_report, run_cases, write_report
+
+def test_report_roundtrip_and_regression_flagging(tmp_path):
+    cases = [Case("noop", lambda: (lambda: None), {"n": 1}),
+             Case("sum", lambda: (lambda: sum(range(100))), ops_per_call=100)]
+    results = run_cases(cases, quick=True, log=None)
+    assert [r["key"] for r in results] == ["noop[n=1]", "sum"]
+    path = str(tmp_path / "base.json")
+    write_report(path, results)
+    baseline = load_report(path)["results"]
+
+    slower = [dict(r, ops_per_sec=r["ops_per_sec"] * 0.5) for r in results[:1]] + \
+        [dict(results[1], key="new-case")]
+    cmp = compare(slower, baseline, threshold=0.2)
+    assert [r["status"] for r in cmp["rows"]] == ["regression", "new"]
+    assert cmp["missing"] == ["sum"]
+    assert exit_code(cmp) == 1
+    assert exit_code(compare(results, baseline, threshold=0.2)) == 0
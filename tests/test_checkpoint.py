@@ -0,0 +1,64 @@
+import glob
+import pickle
+
+from backend.core.rl.checkpoint import compact, convert_pickle, read_checkpoint
+from backend.core.rl.qlearning_agent import QLearningAgent
+
+def _state(i):
+    return {"stock_level": 20 * i, "last_price": 100, "competitor_price": 100, "sales_last_week": 5}
+
+def test_incremental_checkpoint_roundtrip(tmp_path):
+    path = str(tmp_path / "q.npz")
+    agent = QLearningAgent([-0.05, 0.0, 0.05], q_backend="array", alpha=0.3)
+    for i in range(10):
+        agent.learn(agent.get_state_key(_state(i)), 1, 1.0, agent.get_state_key(_state(i + 1)))
+    assert agent.save_checkpoint(path)["mode"] == "full"
+
+    agent.learn(agent.get_state_key(_state(3)), 2, 5.0, agent.get_state_key(_state(4)))
+    info = agent.save_checkpoint(path)
+    assert info["mode"] == "incremental" and info["states"] == 1
+    assert len(glob.glob(path + ".seg*.npz")) == 1
+
+    restored = QLearningAgent([-0.05, 0.0, 0.05], q_backend="array")
+    restored.load_checkpoint(path)
+    assert restored.export_q_dict() == agent.export_q_dict()
+    assert restored.alpha == 0.3
+
+    compact(path)
+    assert not glob.glob(path + ".seg*.npz")
+    assert len(read_checkpoint(path)[0]) == len(agent.q_table)
+
+def test_convert_pickle(tmp_path):
+    q_dict = {"3|18|19|2": [1.0, 2.0, 3.0], "0|0|0|0": [0.0, -1.0, 0.5]}
+    with open(tmp_path / "q.pkl", "wb") as f:
+        pickle.dump(q_dict, f)
+    assert convert_pickle(str(tmp_path / "q.pkl"), str(tmp_path / "q.npz")) == 2
+    agent = QLearningAgent([-0.05, 0.0, 0.05])
+    agent.load_q_table(str(tmp_path / "q.npz"))
+    assert agent.export_q_dict() == q_dict
+
+def test_concurrent_saves_keep_segments_consistent(tmp_path):
+    import threading
+    path = str(tmp_path / "q.npz")
+    agents = []
+    for i in range(8):
+        a = QLearningAgent([-0.05, 0.0, 0.05], q_backend="array")
+        a.learn(a.get_state_key(_state(i)), 1, float(i), a.get_state_key(_state(i + 1)))
+        agents.append(a)
+    agents[0].save_checkpoint(path, incremental=False)
+    barrier = threading.Barrier(len(agents) - 1)
+
+    def save(a):
+        barrier.wait()
+        a.save_checkpoint(path, incremental=True)
+
+    threads = [threading.Thread(target=save, args=(a,)) for a in agents[1:]]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    segs = sorted(glob.glob(path + ".seg*.npz"))
+    assert [s.rsplit(".seg", 1)[1] for s in segs] == [f"{i:06d}.npz" for i in range(1, 8)]
+    assert not glob.glob(str(tmp_path / ".*tmp*"))
+    bins, q, _, _ = read_checkpoint(path)
+    assert len(bins) == 9 and q.shape == (9, 3)
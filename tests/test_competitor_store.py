@@ -0,0 +1,58 @@
+import numpy as np
+
+from backend.core.competitor_store import CompetitorPriceStore
+
+def test_rolling_aggregates_match_naive_window(tmp_path):
+    rng = np.random.default_rng(0)
+    st = CompetitorPriceStore(capacity=8)
+    sku = [f"S{i}" for i in rng.integers(0, 5, 400)]
+    price = rng.uniform(50, 150, 400)
+    ts = np.arange(400, dtype=float)   # artan zaman: halka her SKU'nun son 8 gözlemini tutar
+    src = [f"c{i}" for i in rng.integers(0, 3, 400)]
+    for a in range(0, 400, 64):
+        st.ingest(sku[a:a + 64], price[a:a + 64], ts[a:a + 64], src[a:a + 64])
+
+    agg = st.aggregate(["S1", "S4", "missing"], window=120, now=399)
+    for j, s in enumerate(["S1", "S4"]):
+        idx = [i for i in range(400) if sku[i] == s][-8:]
+        idx = [i for i in idx if ts[i] >= 399 - 120]
+        v = np.sort(price[idx])
+        g = int(len(v) * 0.1)
+        assert agg["count"][j] == len(v)
+        assert np.isclose(agg["min"][j], v.min())
+        assert np.isclose(agg["median"][j], np.median(v))
+        assert np.isclose(agg["trimmed_mean"][j], v[g:len(v) - g].mean())
+        assert agg["n_sources"][j] == len({src[i] for i in idx})
+        assert agg["last"][j] == price[[i for i in range(400) if sku[i] == s][-1]]
+    assert not agg["known"][2] and np.isnan(agg["median"][2])
+
+    # eski zamanlı gözlem son görüleni değiştirmez; geçersiz fiyat atlanır
+    out = st.ingest(["S1", "S1"], [10.0, -1.0], [0.0, 500.0])
+    assert out == {"accepted": 1, "rejected": 1, "skus": 5}
+    assert st.aggregate(["S1"], now=399)["last"][0] == agg["last"][0]
+
+    path = str(tmp_path / "competitors.npz")
+    st.save(path)
+    assert CompetitorPriceStore.load(path).describe("S4", now=399) == st.describe("S4", now=399)
+
+def test_concurrent_saves_do_not_collide(tmp_path):
+    import os
+    from concurrent.futures import ThreadPoolExecutor
+    st = CompetitorPriceStore(capacity=4)
+    st.ingest([f"S{i}" for i in range(200)], np.linspace(10, 20, 200), 1.0)
+    path = str(tmp_path / "competitors.npz")
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda _: st.save(path), range(32)))
+    assert os.listdir(tmp_path) == ["competitors.npz"]
+    assert len(CompetitorPriceStore.load(path)) == 200
+
+def test_window_reports_last_n_truncation():
+    st = CompetitorPriceStore(capacity=4)
+    st.ingest(["A"] * 10, np.arange(1.0, 11.0), np.arange(10.0))
+    st.ingest(["B"] * 3, [1.0, 2.0, 3.0], [0.0, 1.0, 2.0])
+    agg = st.aggregate(["A", "B"], window=100, now=10)
+    assert agg["count"].tolist() == [4, 3] and agg["truncated"].tolist() == [True, False]
+    assert agg["min"][0] == 7.0                                   # yalnızca son 4 gözlem
+    assert not st.aggregate(["A"], window=2, now=10)["truncated"][0]   # pencere halkanın içinde
+    d = st.describe("A", window=100, now=10)
+    assert d["max_observations"] == 4 and d["truncated"]
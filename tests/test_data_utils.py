@@ -0,0 +1,26 @@
+import io
+
+import numpy as np
+
+from backend.core.data_utils import read_training_columns
+
+def _csv(n: int) -> io.StringIO:
+    lines = ["sku,stock_level,last_price,competitor_price,sales_last_week"]
+    lines += [f"s{i},{i},{100 + i % 7},{105},{i % 11}" for i in range(n)]
+    lines.append("bad,,100,105,3")   # eksik değer: atlanır
+    return io.StringIO("\n".join(lines))
+
+def test_read_training_columns_in_chunks():
+    data = read_training_columns(_csv(2500), fmt="csv", chunk_rows=1000)
+    cols = data["columns"]
+    assert data["rows_read"] == data["rows_used"] == 2500 and not data["sampled"]
+    assert cols["stock_level"].dtype == np.float64
+    np.testing.assert_array_equal(cols["stock_level"], np.arange(2500))
+    assert set(cols) == {"stock_level", "last_price", "competitor_price", "sales_last_week"}
+
+def test_read_training_columns_reservoir_is_bounded():
+    data = read_training_columns(_csv(5000), fmt="csv", chunk_rows=1000, max_rows=300, seed=3)
+    stock = data["columns"]["stock_level"]
+    assert data["rows_read"] == 5000 and data["rows_used"] == 300 and data["sampled"]
+    assert len(np.unique(stock)) == 300
+    assert stock.max() > 1000          # ilk parçanın dışından da örnek var
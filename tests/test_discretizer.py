@@ -0,0 +1,52 @@
+import numpy as np
+
+from backend.core.rl.discretizer import Discretizer, FEATURES
+from backend.core.rl.qlearning_agent import QLearningAgent
+
+def _cols(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "stock_level": rng.integers(0, 500, n).astype(float),
+        "last_price": np.exp(rng.uniform(np.log(5), np.log(5000), n)),
+        "competitor_price": np.exp(rng.uniform(np.log(5), np.log(5000), n)),
+        "sales_last_week": rng.poisson(6, n).astype(float),
+    }
+
+def test_default_matches_legacy_widths():
+    d = Discretizer.default()
+    for s in [{"stock_level": 57, "last_price": 99.9, "competitor_price": 105, "sales_last_week": 4},
+              {"stock_level": -3, "last_price": float("inf"), "competitor_price": "x"}]:
+        legacy = []
+        for name, w in zip(FEATURES, (20, 5, 5, 5)):
+            try:
+                legacy.append(int(float(s.get(name, 0)) // w))
+            except Exception:
+                legacy.append(0)
+        assert d.bins(s) == tuple(legacy)
+    assert d.to_meta()["widths"] == [20, 5, 5, 5]
+
+def test_fitted_edges_scalar_vector_and_meta_roundtrip():
+    cols = _cols()
+    d = Discretizer.fit(cols, {"last_price": ("log", 16), "competitor_price": ("log", 16),
+                               "stock_level": ("quantile", 8),
+                               "sales_last_week": {"kind": "uniform", "bins": 6, "min": 0, "max": 18}})
+    mat = d.bins_arr(*(cols[k] for k in FEATURES))
+    for i in range(0, 2000, 97):
+        assert tuple(mat[i]) == d.bins({k: cols[k][i] for k in FEATURES})
+    assert mat[:, 1].max() == 15 and mat[:, 1].min() == 0          # log: 16 bin, tamamı kapsanır
+    counts = np.bincount(mat[:, 0])
+    assert counts.min() > 0.5 * counts.mean()                      # quantile: dengeli
+    assert Discretizer.from_meta(d.to_meta()) == d
+
+def test_checkpoint_preserves_discretizer(tmp_path):
+    cols = _cols(200)
+    agent = QLearningAgent([-0.05, 0.0, 0.05], q_backend="array",
+                           discretizer=Discretizer.fit(cols, {"last_price": ("quantile", 12)}))
+    s = {k: float(cols[k][0]) for k in FEATURES}
+    agent.learn(agent.get_state_key(s), 1, 1.0, agent.get_state_key(s))
+    path = str(tmp_path / "q.npz")
+    agent.save_checkpoint(path, incremental=False)
+    loaded = QLearningAgent([-0.05, 0.0, 0.05], q_backend="array")
+    loaded.load_checkpoint(path)
+    assert loaded.discretizer == agent.discretizer
+    assert loaded.q_table.get(loaded.get_state_key(s))[1] > 0
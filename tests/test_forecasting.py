@@ -0,0 +1,90 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from backend.core.forecasting import ForecastStore, forecast_demand
+
+def _history(n_sku=40, weeks=104, seed=0):
+    rng = np.random.default_rng(seed)
+    sku = np.repeat([f"SKU-{i}" for i in range(n_sku)], weeks)
+    week = np.tile(np.arange(1, weeks + 1), n_sku)
+    e = rng.uniform(-2.5, -0.5, n_sku)
+    base = rng.uniform(30, 80, n_sku)
+    season = 1 + 0.3 * np.sin(2 * np.pi * ((week - 1) % 52) / 52)
+    comp = rng.uniform(90, 110, len(sku))
+    price = comp * rng.uniform(0.8, 1.2, len(sku))
+    units = rng.poisson(np.repeat(base, weeks) * season * (price / comp) ** np.repeat(e, weeks))
+    df = pd.DataFrame({"sku_id": sku, "week": week, "price": price,
+                       "competitor_price": comp, "units": units})
+    return df, dict(zip([f"SKU-{i}" for i in range(n_sku)], e))
+
+def test_fit_recovers_elasticity_and_incremental_matches_full(tmp_path):
+    df, true_e = _history()
+    full = ForecastStore()
+    full.fit_frame(df)
+    est = np.array([full.describe(s)["elasticity"] for s in true_e])
+    assert np.abs(est - np.array(list(true_e.values()))).mean() < 0.3
+
+    # ilk yıl + ikinci yıl (artımlı, CSV'de eski haftalar da var) == tüm geçmiş
+    inc = ForecastStore()
+    inc.fit_frame(df[df.week <= 52])
+    buf = io.StringIO()
+    df.to_csv(buf, index=False)
+    buf.seek(0)
+    info = inc.fit_csv(buf, chunk_rows=1_000, only_new=True)
+    assert info["rows_used"] == (df.week > 52).sum()
+    order = inc.rows_for(full.sku_ids.tolist())
+    assert np.allclose(inc.params["elasticity"][order], full.params["elasticity"])
+    assert np.allclose(inc.params["seasonality"][order], full.params["seasonality"])
+
+    path = str(tmp_path / "forecast.npz")
+    full.save(path)
+    loaded = ForecastStore.load(path)
+    assert loaded.describe("SKU-3") == full.describe("SKU-3")
+    units = forecast_demand(loaded, ["SKU-3", "unknown"], [100.0, 100.0], [100.0, 100.0], week=10)
+    assert units[0] > 0 and np.isnan(units[1])
+    dm = loaded.demand_model(["SKU-3", "unknown"], start_week=10)
+    assert dm.elasticity[1] == loaded.prior_elasticity
+    assert np.isclose(dm.seasonality[0, 0], loaded.params["seasonality"][loaded.rows_for(["SKU-3"])[0], 9])
+
+def test_incremental_refresh_with_date_column():
+    df, _ = _history(n_sku=5, weeks=60)
+    df["date"] = pd.Timestamp("2023-01-02") + pd.to_timedelta((df.pop("week") - 1) * 7, unit="D")
+    first = df[df.date < "2024-01-01"]
+    full, inc = ForecastStore(), ForecastStore()
+    full.fit_frame(df)
+    inc.fit_frame(first)
+    assert inc.describe("SKU-0")["last_week"] > 0
+
+    buf = io.StringIO()
+    df.to_csv(buf, index=False)
+    buf.seek(0)
+    info = inc.fit_csv(buf, chunk_rows=100, only_new=True)
+    assert info["rows_used"] == len(df) - len(first)
+    order = inc.rows_for(full.sku_ids.tolist())
+    assert np.allclose(inc.params["elasticity"][order], full.params["elasticity"])
+
+def test_chunk_stats_skips_rows_without_competitor_price_or_week():
+    from backend.core.forecasting import chunk_stats
+    df, _ = _history(n_sku=3, weeks=20)
+    bad = df.iloc[:6].copy()
+    bad.loc[bad.index[:3], "competitor_price"] = np.nan
+    bad.loc[bad.index[3:], "week"] = np.nan
+    mixed = chunk_stats(pd.concat([df, bad]))
+    clean = chunk_stats(df)
+    for key in ("n", "sx", "sy", "sxx", "sxy", "last_week"):
+        assert np.allclose(mixed[key], clean[key])
+
+def test_parallel_fit_csv_matches_serial():
+    df, _ = _history(n_sku=10, weeks=30)
+    buf = io.StringIO()
+    df.to_csv(buf, index=False)
+    serial, parallel = ForecastStore(), ForecastStore()
+    buf.seek(0)
+    serial.fit_csv(buf, chunk_rows=20)
+    buf.seek(0)
+    info = parallel.fit_csv(buf, chunk_rows=20, workers=2)
+    assert info["rows_used"] == len(df)
+    order = parallel.rows_for(serial.sku_ids.tolist())
+    assert np.allclose(parallel.params["elasticity"][order], serial.params["elasticity"])
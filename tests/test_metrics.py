@@ -0,0 +1,56 @@
+from fastapi.testclient import TestClient
+
+from backend.core.metrics import Registry, Counter, Histogram, SamplingProfiler
+
+def test_prometheus_text_format():
+    reg = Registry()
+    c = reg.register(Counter("jobs_total", "İşler", ("status",)))
+    h = reg.register(Histogram("lat_seconds", "Süre", buckets=(0.1, 1.0)))
+    c.labels("ok").inc()
+    c.labels(status="ok").inc(2)
+    for v in (0.05, 0.5, 5.0):
+        h.observe(v)
+    text = reg.render()
+    assert 'jobs_total{status="ok"} 3' in text
+    assert 'lat_seconds_bucket{le="0.1"} 1' in text
+    assert 'lat_seconds_bucket{le="1"} 2' in text
+    assert 'lat_seconds_bucket{le="+Inf"} 3' in text
+    assert "lat_seconds_count 3" in text and "# TYPE lat_seconds histogram" in text
+
+def test_metrics_endpoint_reports_request_and_stage_timings(monkeypatch):
+    from backend.main import app
+    client = TestClient(app)
+    state = {"stock_level": 50, "last_price": 90.0, "competitor_price": 100.0, "sales_last_week": 5}
+    for _ in range(3):
+        assert client.post("/agent/recommend-price", json={"state": state}).status_code == 200
+    resp = client.get("/metrics")
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = resp.text
+    assert 'http_request_duration_seconds_count{method="POST",path="/agent/recommend-price"}' in text
+    for stage in ("decide", "guard", "demand", "explain", "response", "framework"):
+        assert f'pricing_stage_duration_seconds_count{{endpoint="recommend_price",stage="{stage}"}}' in text
+    assert "pricing_state_lookups_total" in text and "pricing_guard_decisions_total" in text
+    assert "qtable_states " in text
+
+    assert client.get("/metrics/profile", params={"seconds": 0.05}).status_code == 403
+    monkeypatch.setenv("PROFILER_ENABLED", "1")
+    prof = client.get("/metrics/profile", params={"seconds": 0.05, "interval_ms": 1, "format": "top"})
+    assert prof.status_code == 200 and prof.text.startswith("#")
+
+def test_sampling_profiler_collects_folded_stacks():
+    import threading
+    stop = threading.Event()
+
+    def busy():
+        while not stop.is_set():
+            sum(range(1000))
+
+    t = threading.Thread(target=busy)
+    t.start()
+    try:
+        prof = SamplingProfiler(interval=0.001).run_for(0.1)
+    finally:
+        stop.set()
+        t.join()
+    assert prof.samples > 0
+    assert any("busy" in stack for stack in prof.stacks)
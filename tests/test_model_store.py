@@ -0,0 +1,20 @@
+from backend.core.rl.model_store import SnapshotStore, SnapshotWatcher
+
+def test_publish_activate_and_watch(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    watcher = SnapshotWatcher(store, poll_interval=0)
+    assert watcher.check() is None
+
+    v1 = store.publish({"1|2|3|4": [1.0, 0.0, 0.0]})
+    assert watcher.check() == v1
+    watcher.current = v1
+    v2 = store.publish({"1|2|3|4": [0.0, 2.0, 0.0]})
+    assert store.active_version() == v2
+    assert watcher.check() == v2
+    watcher.current = v2
+
+    store.activate(v1)   # geri alma
+    assert watcher.check(force=True) == v1
+    table = store.load_table(v1, 3)
+    assert table.to_dict() == {"1|2|3|4": [1.0, 0.0, 0.0]}
+    assert [v["version"] for v in store.versions()] == [v1, v2]
@@ -0,0 +1,127 @@
+import numpy as np
+
+from backend.core.rl.qtable import ArrayQTable, encode_bins, encode_bins_arr, code_to_key, key_to_code
+from backend.core.rl.qlearning_agent import QLearningAgent
+
+def test_codes_roundtrip():
+    bins = np.array([[3, 18, 19, 2], [0, 0, 0, 0], [65535, 1, 2, 70000]])
+    codes = encode_bins_arr(bins)
+    assert codes[0] == encode_bins((3, 18, 19, 2))
+    assert code_to_key(int(codes[0])) == "3|18|19|2"
+    assert code_to_key(int(codes[2])) == "32767|1|2|65535"   # doygunluk (ilk alan 15 bit)
+    assert key_to_code("3|18|19|2") == codes[0]
+
+def test_scalar_and_vector_codes_agree_at_boundary():
+    from backend.core.rl.discretizer import Discretizer
+    bins = np.array([[32767, 65535, 65535, 65535], [32768, 0, 0, 0], [70000, 70000, -3, 1],
+                     [655360 // 20, 1, 1, 1]])
+    codes = encode_bins_arr(bins)
+    assert (codes >= 0).all()
+    assert codes.tolist() == [encode_bins(b) for b in bins.tolist()]
+    assert codes[0] == codes[1] + (65535 << 32) + (65535 << 16) + 65535   # 32768 -> 32767'de doyar
+    table = ArrayQTable(3)
+    for c in codes.tolist():
+        table.row_index(c)                                                  # int64'e sığar
+    d = Discretizer.default()
+    state = {"stock_level": 2_000_000.0, "last_price": 100.0, "competitor_price": 100.0, "sales_last_week": 5.0}
+    arr = d.bins_arr(*(np.array([state[k]]) for k in ("stock_level", "last_price", "competitor_price",
+                                                      "sales_last_week")))
+    assert encode_bins(d.bins(state)) == encode_bins_arr(arr)[0]
+
+def test_legacy_import_skips_out_of_range_bins(tmp_path):
+    import pickle
+    from backend.core.rl.checkpoint import convert_pickle, read_checkpoint
+    legacy = {"0|18|20|1": [1.0, 0.0, 0.0], "-1|18|20|1": [0.0, 9.0, 0.0], (70000, 1, 1, 1): [0.0, 0.0, 5.0],
+              (2, 18, 20, 1): [0.0, 0.0, 3.0]}
+    table = ArrayQTable.from_dict(legacy, 3)
+    assert len(table) == 2 and table.lossy_keys == 2
+    assert table[key_to_code("0|18|20|1")].tolist() == [1.0, 0.0, 0.0]   # bin 0 ezilmedi
+
+    path = tmp_path / "q.pkl"
+    path.write_bytes(pickle.dumps(legacy))
+    agent = QLearningAgent([-0.05, 0.0, 0.05], q_backend="array")
+    assert agent.import_q_dict(legacy) == 2
+    assert convert_pickle(str(path), str(tmp_path / "q.npz")) == 2
+    bins, q, _, meta = read_checkpoint(str(tmp_path / "q.npz"))
+    assert len(bins) == 2 and meta["lossy_keys"] == 2
+
+def test_array_backend_matches_dict_backend():
+    states = [{"stock_level": 40 + i, "last_price": 90 + i % 7, "competitor_price": 95,
+               "sales_last_week": i % 11} for i in range(200)]
+    tables = {}
+    for backend in ("dict", "array"):
+        agent = QLearningAgent([-0.05, 0.0, 0.05], q_backend=backend)
+        for i, s in enumerate(states[:-1]):
+            agent.choose_action(s, explore=False)
+            agent.learn(agent.get_state_key(s), i % 3, float(i), agent.get_state_key(states[i + 1]))
+        tables[backend] = agent.export_q_dict()
+    assert tables["dict"] == tables["array"]
+    restored = ArrayQTable.from_dict(tables["dict"])
+    assert restored.to_dict() == tables["dict"]
+
+def test_mapped_qtable_reads_written_file(tmp_path):
+    from backend.core.rl.qtable import MappedQTable
+    table = ArrayQTable(3)
+    for i in (5, 1, 9):
+        table[encode_bins((i, i, i, i))] = [float(i), 0.0, -1.0]
+    path = str(tmp_path / "t.qtab")
+    table.write_qtab(path)
+    mapped = MappedQTable(path)
+    assert len(mapped) == 3 and mapped.to_dict() == table.to_dict()
+    assert list(mapped[encode_bins((9, 9, 9, 9))]) == [9.0, 0.0, -1.0]
+    assert mapped.get(encode_bins((2, 2, 2, 2))) is None
+    assert list(mapped.rows_for(np.array([encode_bins((1, 1, 1, 1)), 7]))) == [0, -1]
+
+    agent = QLearningAgent([-0.05, 0.0, 0.05], q_backend="array")
+    agent.q_table = mapped
+    unseen = {"stock_level": 1000, "last_price": 1, "competitor_price": 1, "sales_last_week": 1}
+    assert agent.choose_action(unseen, explore=False) == 0
+    assert len(mapped) == 3    # salt-okunur tabloya satır eklenmez
+    assert len(agent.clone().q_table) == 3
+
+def test_greedy_policy_is_readonly_and_matches_argmax(tmp_path):
+    from backend.core.rl.policy import GreedyPolicy
+    from backend.core.rl.xai.explain_decision import EXPLAIN_TIE, EXPLAIN_UNSEEN
+
+    t = ArrayQTable(n_actions=3)
+    t[key_to_code("1|2|3|4")] = [0.1, 0.5, 0.2]
+    t[key_to_code("2|2|3|4")] = [0.3, 0.3, 0.3]
+    n_before = len(t)
+
+    policy = GreedyPolicy.compile(t)
+    assert policy.lookup(key_to_code("1|2|3|4"))[0] == 1
+    assert abs(policy.lookup(key_to_code("1|2|3|4"))[1] - 0.3) < 1e-6
+    assert policy.lookup(key_to_code("2|2|3|4"))[2] == EXPLAIN_TIE
+    assert policy.lookup(key_to_code("9|9|9|9")) == (0, 0.0, EXPLAIN_UNSEEN)
+    assert len(t) == n_before          # arama tabloya yazmaz
+
+    path = str(tmp_path / "policy.npz")
+    policy.save(path)
+    loaded = GreedyPolicy.load(path)
+    acts, _, expl = loaded.lookup_many([key_to_code("1|2|3|4"), key_to_code("9|9|9|9")])
+    assert acts.tolist() == [1, 0] and expl.tolist() == [1, EXPLAIN_UNSEEN]
+
+def test_greedy_policy_loads_mapped_and_sorted(tmp_path):
+    from backend.core.rl.policy import GreedyPolicy
+    from backend.core.rl.xai.explain_decision import EXPLAIN_UNSEEN
+
+    rng = np.random.default_rng(0)
+    codes = rng.choice(1 << 40, size=500, replace=False)
+    values = rng.normal(size=(500, 3))
+    policy = GreedyPolicy.compile(ArrayQTable.from_arrays(codes, values))   # eklenme sırası: sırasız
+    assert np.all(np.diff(policy.codes) > 0)
+
+    path = str(tmp_path / "policy.pol")
+    policy.save(path)
+    loaded = GreedyPolicy.load(path)
+    assert isinstance(loaded.codes, np.memmap) and not loaded.codes.flags.writeable
+    query = np.concatenate([codes[::-1], [-1, 1 << 41]])
+    acts, conf, expl = loaded.lookup_many(query)
+    assert acts[:500].tolist() == np.argmax(values[::-1], axis=1).tolist()
+    assert expl[-2:].tolist() == [EXPLAIN_UNSEEN] * 2 and conf[-1] == 0.0
+    assert loaded.lookup(int(codes[3]))[0] == int(np.argmax(values[3]))
+
+    legacy = str(tmp_path / "legacy.npz")   # eski .npz politikaları hâlâ okunur
+    np.savez(legacy, codes=codes, actions=np.argmax(values, axis=1), confidence=np.zeros(500),
+             explain=np.zeros(500), default_action=np.int64(0))
+    assert GreedyPolicy.load(legacy).lookup(int(codes[3]))[0] == int(np.argmax(values[3]))
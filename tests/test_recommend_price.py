@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from backend.core.rl.qlearning_agent import QLearningAgent
+from backend.recommend_price import PricingPipeline, main, recommend_price_for_sku
+
+def _catalog(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "sku_id": [f"SKU-{i}" for i in range(n)],
+        "last_price": rng.uniform(40, 300, n).round(2),
+        "stock_level": rng.integers(0, 400, n),
+        "sales_last_week": rng.integers(0, 30, n),
+        "competitor_price": np.where(rng.random(n) < 0.2, np.nan, rng.uniform(40, 300, n).round(2)),
+        "unit_cost": rng.uniform(20, 150, n).round(2),
+    })
+
+def test_pipeline_matches_api_batch_path():
+    from fastapi.testclient import TestClient
+    from backend.api import agent_api
+    cat = _catalog()
+    res = PricingPipeline(agent_api.agent).run(cat)
+    assert list(res["sku_id"]) == list(cat["sku_id"])
+
+    comp = cat["competitor_price"].fillna(cat["last_price"])
+    items = [{"state": {"stock_level": int(r.stock_level), "last_price": r.last_price,
+                        "competitor_price": float(c), "sales_last_week": int(r.sales_last_week)},
+              "costs": {"unit_cost": r.unit_cost}} for r, c in zip(cat.itertuples(), comp)]
+    api = TestClient(agent_api.app).post("/agent/recommend-prices", json={"items": items}).json()["items"]
+    assert np.allclose(res["recommended_price"], [i["recommended_price"] for i in api], atol=0.011)
+    assert list(res["guard_applied"]) == [i["guard"]["applied"] for i in api]
+    assert np.allclose(res["expected_sales"], [i["demand"]["expected_sales"] for i in api], atol=0.02)
+
+def test_pipeline_cli_reprices_catalog_in_chunks(tmp_path):
+    src, out = tmp_path / "catalog.csv", tmp_path / "priced.csv"
+    _catalog(2500).to_csv(src, index=False)
+    assert main([str(src), "-o", str(out), "--chunk-rows", "1000", "--snapshots", str(tmp_path / "none"),
+                 "--checkpoint", "", "--forecast", "", "--competitors", ""]) == 0
+    priced = pd.read_csv(out)
+    assert len(priced) == 2500
+    assert (priced["recommended_price"] >= priced["min_margin_price"] - 0.01).all()
+
+    agent = QLearningAgent(action_space=[-0.05, 0.0, 0.05], q_backend="array")
+    single = PricingPipeline(agent).run(pd.DataFrame({
+        "sku_id": ["X"], "last_price": [100.0], "stock_level": [10], "sales_last_week": [5],
+        "competitor_price": [np.nan]}))
+    assert single["cps_score"].iloc[0] == 0.0 and np.isnan(single["competitor_price"].iloc[0])
+    assert recommend_price_for_sku("X", 100.0, 60.0, [4, 6], [{"price": 95.0}, {"price": 105.0}], 10) > 0
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from backend.core.rl.replay import ReplayBuffer, ReplayConfig
+
+def test_ring_buffer_overwrites_oldest():
+    buf = ReplayBuffer(capacity=5)
+    buf.add(np.arange(3), [0, 1, 2], [1.0, 2.0, 3.0], np.arange(3) + 10)
+    assert len(buf) == 3
+    buf.add(np.arange(3, 7), [0, 0, 0, 0], [4.0, 5.0, 6.0, 7.0], np.arange(3, 7) + 10)
+    assert len(buf) == 5
+    assert sorted(buf.rows.tolist()) == [2, 3, 4, 5, 6]   # 0 ve 1 üzerine yazıldı
+    assert np.array_equal(buf.next_rows - buf.rows, np.full(5, 10))
+    buf.add(np.arange(100, 112), np.zeros(12), np.zeros(12), np.zeros(12))   # partiden büyük
+    assert sorted(buf.rows.tolist()) == list(range(107, 112))
+
+def test_uniform_and_prioritized_sampling():
+    rng = np.random.default_rng(0)
+    uni = ReplayBuffer(capacity=100)
+    uni.add(np.arange(100), np.zeros(100), np.zeros(100), np.arange(100))
+    b = uni.sample(4000, rng)
+    assert np.all(b["weights"] == 1.0) and np.array_equal(b["rows"], b["idx"])
+    assert 0.8 < np.bincount(b["idx"], minlength=100).std() / 40 ** 0.5 < 1.2   # ~ binom
+
+    per = ReplayBuffer(capacity=100, prioritized=True, alpha=1.0, eps=0.0)
+    per.add(np.arange(100), np.zeros(100), np.zeros(100), np.arange(100))
+    per.update_priorities(np.arange(100), np.where(np.arange(100) == 7, 99.0, 1.0))
+    b = per.sample(4000, rng)
+    share = np.mean(b["idx"] == 7)
+    assert 0.45 < share < 0.55                               # 99 / (99 + 99)
+    assert b["weights"].max() == 1.0 and b["weights"][b["idx"] == 7].max() < 0.5
+    per.add([200], [0], [0.0], [200])                        # yeni geçiş en büyük öncelikle
+    assert per.priority[0] == 99.0
+
+def test_fit_with_replay_buffer():
+    from backend.core.rl.env_definition import EnhancedPricingEnv
+    from backend.core.rl.qlearning_agent import QLearningAgent
+    from backend.core.rules_guard import CostParams
+    env = EnhancedPricingEnv()
+    states = [{"stock_level": 30 + 5 * i, "last_price": 100 + i, "competitor_price": 110,
+               "sales_last_week": 6} for i in range(8)]
+    for prioritized in (False, True):
+        agent = QLearningAgent(env.action_space, q_backend="array")
+        cfg = ReplayConfig(capacity=500, batch_size=32, updates_per_step=2, prioritized=prioritized)
+        stats = agent.fit(env, states, CostParams(), episodes=3, seed=0, batched=True, replay=cfg)
+        assert stats["replay"]["size"] == 500                  # 3 * 8 * 24 geçiş > kapasite
+        assert stats["replay"]["samples"] > 0
+        assert np.isfinite(agent.q_table.values).all()
+    with pytest.raises(ValueError):
+        QLearningAgent(env.action_space).fit(env, states, CostParams(), episodes=1, replay=ReplayConfig())
@@ -0,0 +1,59 @@
+import random
+
+import numpy as np
+
+from backend.core.rules_guard import (
+    CostParams, CostArrays, profit, margin_pct, break_even_price, target_price_for_margin,
+    breakdown_arr,
+)
+
+def test_breakdown_arr_matches_scalar():
+    rnd = random.Random(7)
+    cps = [CostParams(unit_cost=rnd.uniform(0, 200),
+                      commission_pct=rnd.uniform(0, 0.6),
+                      payment_fee_pct=rnd.uniform(0, 0.2),
+                      tax_pct=rnd.uniform(0, 0.3),
+                      shipping_cost=rnd.uniform(-5, 40),
+                      min_margin_pct=rnd.uniform(0, 0.5)) for _ in range(500)]
+    prices = np.array([rnd.uniform(-10, 500) for _ in cps])
+    brk = breakdown_arr(prices, CostArrays.from_params(cps))
+    for i, cp in enumerate(cps):
+        p = float(prices[i])
+        assert brk["net_profit"][i] == profit(p, cp)
+        assert brk["margin_pct"][i] == margin_pct(p, cp)
+        assert brk["break_even"][i] == break_even_price(cp)
+        assert brk["min_margin_price"][i] == target_price_for_margin(cp, cp.min_margin_pct)
+
+def test_guard_cache_hits_and_evicts():
+    from backend.core.rules_guard import GuardCache, breakdown, break_even_price, target_price_for_margin
+
+    cache = GuardCache(maxsize=2)
+    a = cache.get({"unit_cost": 60})
+    assert cache.get(CostParams(unit_cost=60.0)) is a          # kanonik anahtar
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert a.break_even == break_even_price(a.cp)
+    assert a.min_margin_price == target_price_for_margin(a.cp, a.cp.min_margin_pct)
+    assert a.breakdown(123.45) == breakdown(123.45, a.cp)
+
+    cache.get({"unit_cost": 70})
+    cache.get({"unit_cost": 80})                               # en eski (60) tahliye
+    assert len(cache) == 2 and cache.evictions == 1
+    cache.get({"unit_cost": 60})
+    assert cache.misses == 4
+
+def test_cost_profile_registry_shared_between_workers(tmp_path):
+    from backend.core.cost_profiles import CostProfileRegistry
+    path = str(tmp_path / "profiles.json")
+    a = CostProfileRegistry(path, poll_interval=0)   # iki uvicorn işçisi
+    b = CostProfileRegistry(path, poll_interval=0)
+    assert a.put("tier-a", {"unit_cost": 40.0}) is True
+    assert b.get("tier-a").cp.unit_cost == 40.0
+    assert b.put("tier-b", {"unit_cost": 50.0}) is True   # a'nın profilini ezmez
+    assert sorted(p["id"] for p in a.list()) == ["tier-a", "tier-b"]
+    assert a.delete("tier-b") and b.get("tier-b") is None
+
+    slow = CostProfileRegistry(path, poll_interval=3600)
+    a.put("tier-c", {"unit_cost": 70.0})
+    assert slow.get("tier-c") is None                     # yoklama aralığı dolmadı
+    slow.poll_interval = 0
+    assert slow.get("tier-c").cp.unit_cost == 70.0